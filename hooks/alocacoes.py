@@ -0,0 +1,84 @@
+# ---------------------------------------------------------
+# arquivo: hooks/alocacoes.py
+# ---------------------------------------------------------
+# Alocação dos recursos das UCs elegíveis por eixo temático (processo SAMGe).
+#
+# tf_alocacao_uc_eixo guarda uma linha por (linha da distribuição, processo)
+# com valor diferente de zero, em vez de uma coluna por processo em
+# tf_distribuicao_elegiveis. Ler ou gravar a alocação de uma UC/eixo é um
+# acesso pela chave primária, e um processo novo no SAMGe não altera nenhuma
+# tabela. Os gatilhos do banco mantêm o saldo "A Distribuir" de cada linha.
+#
+# Para exibir, alocacoes_por_eixo monta a tabela larga (uma coluna por eixo)
+# de uma iniciativa e a mantém em cache até a próxima gravação das tabelas
+# que lê (ver hooks/cache.py). A aba de Unidades de Conservação do Cadastro
+# edita essa tabela e grava as células alteradas com gravar_alocacoes, numa
+# única transação do escritor.
+# ---------------------------------------------------------
+import pandas as pd
+
+from hooks.cache import cache_por_tabelas
+from hooks.conexao import get_connection
+from hooks.escrita import TIMEOUT_ESCRITA, executar_escrita
+
+
+def ler_alocacoes(id_iniciativa: int) -> pd.DataFrame:
+    """Alocações da iniciativa em formato longo: id_distribuicao, id_p, eixo, valor."""
+    return pd.read_sql_query("""
+        SELECT a.id_distribuicao, a.id_p, p.nome AS eixo, a.valor
+        FROM tf_distribuicao_elegiveis e
+        JOIN tf_alocacao_uc_eixo a ON a.id_distribuicao = e.id
+        JOIN td_samge_processos p ON p.id_p = a.id_p
+        WHERE e.id_iniciativa = ? AND e.ativo = 1
+        ORDER BY a.id_distribuicao, a.id_p
+    """, get_connection(), params=[int(id_iniciativa)])
+
+
+@cache_por_tabelas(
+    "tf_distribuicao_elegiveis", "tf_alocacao_uc_eixo", "td_samge_processos",
+    max_entradas=64, max_bytes=32 * 1024 * 1024, entre_processos=True,
+)
+def alocacoes_por_eixo(id_iniciativa: int) -> pd.DataFrame:
+    """
+    Tabela larga da iniciativa: uma linha por id_distribuicao (todas as UCs
+    elegíveis ativas) e uma coluna por id_p (eixo) com alocação; valores
+    ausentes são 0. As colunas são os ids, e não os nomes, que podem se repetir.
+    """
+    ids = pd.read_sql_query(
+        "SELECT id FROM tf_distribuicao_elegiveis WHERE id_iniciativa = ? AND ativo = 1 ORDER BY id",
+        get_connection(),
+        params=[int(id_iniciativa)],
+    )["id"]
+    df = ler_alocacoes(id_iniciativa)
+    tabela = df.pivot_table(index="id_distribuicao", columns="id_p", values="valor", aggfunc="sum")
+    tabela = tabela.reindex(ids, fill_value=0.0).fillna(0.0)
+    tabela.index.name = "id_distribuicao"
+    tabela.columns.name = None
+    return tabela
+
+
+def _gravar_alocacoes(conn, valores: list[tuple[int, int, float]]) -> int:
+    excluir = [(id_distribuicao, id_p) for id_distribuicao, id_p, valor in valores if not valor]
+    gravar = [(id_distribuicao, id_p, valor) for id_distribuicao, id_p, valor in valores if valor]
+    conn.executemany("DELETE FROM tf_alocacao_uc_eixo WHERE id_distribuicao = ? AND id_p = ?", excluir)
+    conn.executemany("""
+        INSERT INTO tf_alocacao_uc_eixo (id_distribuicao, id_p, valor)
+        VALUES (?, ?, ?)
+        ON CONFLICT(id_distribuicao, id_p) DO UPDATE SET valor = excluded.valor
+    """, gravar)
+    return len(valores)
+
+
+def gravar_alocacoes(valores) -> int:
+    """
+    Define os valores alocados de várias células (id_distribuicao, id_p, valor)
+    numa única transação. Valor zero (ou vazio) remove a linha, para a tabela
+    guardar só o que foi alocado. Retorna a quantidade de células gravadas.
+    """
+    valores = [
+        (int(id_distribuicao), int(id_p), round(float(valor or 0), 2))
+        for id_distribuicao, id_p, valor in valores
+    ]
+    if not valores:
+        return 0
+    return executar_escrita(_gravar_alocacoes, valores).result(timeout=TIMEOUT_ESCRITA)
@@ -0,0 +1,151 @@
+# ---------------------------------------------------------
+# arquivo: hooks/aquecimento.py
+# ---------------------------------------------------------
+# Aquecimento do cache na subida do servidor.
+#
+# Depois de um deploy, o primeiro usuário de cada página pagaria por todos os
+# caminhos frios. Os pontos de entrada (main.py e streamlit_app.py), logo
+# depois de preparar_dados(), chamam iniciar_aquecimento(), que dispara uma
+# única vez por processo uma thread em segundo plano com as consultas de
+# tarefas_aquecimento(): a base da Consulta,
+# os processos SAMGe e as ações de cada um, o catálogo de insumos e as
+# iniciativas de cada perfil e demandante. As consultas passam pelo mesmo
+# cache das páginas (hooks/consultas.py), de modo que a primeira requisição
+# real já encontra as entradas prontas; as que usam o armazém entre processos
+# (hooks/cache.py) chegam prontas também às réplicas que subirem depois.
+#
+# O Streamlit só roda o script quando chega a primeira sessão. Para que o
+# trabalho pesado aconteça antes da primeira requisição, o container roda
+# `python -m hooks.aquecimento` antes de subir o servidor: prepara o banco
+# (preparar_dados, que o servidor depois encontra pronto) e calcula as
+# consultas com entre_processos=True, que ficam no armazém para o servidor.
+#
+# Uma tarefa que falha fica registrada no progresso e não interrompe as
+# demais. O progresso aparece na página 🧮 Cache das Consultas.
+# ---------------------------------------------------------
+import functools
+import sys
+import threading
+import time
+from datetime import datetime
+
+import streamlit as st
+
+from hooks.conexao import get_connection
+from hooks.consultas import get_iniciativas_usuario, get_options_from_table, load_data_from_db
+from hooks.insumos_crud import catalogo_insumos
+from init_db import preparar_dados
+
+
+def tarefas_aquecimento() -> list[tuple[str, callable]]:
+    """(descrição, consulta sem argumentos) de cada entrada a pré-calcular, na ordem."""
+    conn = get_connection()
+    tarefas = [
+        ("Base das iniciativas (Consulta)", load_data_from_db),
+        ("Processos SAMGe", functools.partial(get_options_from_table, "td_samge_processos", "id_p", "nome")),
+        ("Ações de manejo SAMGe", functools.partial(get_options_from_table, "td_samge_acoes_manejo", "id_ac", "nome")),
+        ("Catálogo de insumos", catalogo_insumos),
+    ]
+
+    # Ações por processo, com o id como a página de Cadastro o passa (int)
+    for (id_p,) in conn.execute("SELECT id_p FROM td_samge_processos ORDER BY id_p").fetchall():
+        tarefas.append((
+            f"Ações do processo {id_p}",
+            functools.partial(get_options_from_table, "td_samge_acoes_manejo", "id_ac", "nome",
+                              filter_col="processo_id", filter_val=id_p),
+        ))
+
+    # Iniciativas de cada usuário cadastrado e de cada demandante ativo
+    perfis = conn.execute("""
+        SELECT DISTINCT perfil, setor_demandante FROM tf_usuarios
+        UNION
+        SELECT 'comum', nome_demandante FROM td_demandantes WHERE ativo = 1
+        ORDER BY 1, 2
+    """).fetchall()
+    for perfil, setor in perfis:
+        tarefas.append((
+            f"Iniciativas de {setor} ({perfil})",
+            functools.partial(get_iniciativas_usuario, perfil, setor),
+        ))
+    return tarefas
+
+
+def vai_para_o_armazem(tarefa) -> bool:
+    """Se a consulta da tarefa guarda o resultado no armazém entre processos."""
+    cache = getattr(getattr(tarefa, "func", tarefa), "cache", None)
+    return cache is not None and cache.entre_processos
+
+
+def _novo_progresso() -> dict:
+    return {
+        "situacao": "iniciando",
+        "total": 0,
+        "concluidas": 0,
+        "atual": None,
+        "erros": [],
+        "iniciado_em": datetime.now(),
+        "concluido_em": None,
+        "segundos": None,
+    }
+
+
+def _aquecer(progresso: dict, so_armazem: bool = False) -> None:
+    inicio = time.perf_counter()
+    try:
+        tarefas = tarefas_aquecimento()
+        if so_armazem:
+            tarefas = [(descricao, tarefa) for descricao, tarefa in tarefas if vai_para_o_armazem(tarefa)]
+    except Exception as e:
+        progresso["erros"].append(f"Lista de consultas: {e}")
+        progresso.update(situacao="erro", concluido_em=datetime.now())
+        return
+
+    progresso.update(situacao="aquecendo", total=len(tarefas))
+    for descricao, tarefa in tarefas:
+        progresso["atual"] = descricao
+        try:
+            tarefa()
+        except Exception as e:
+            progresso["erros"].append(f"{descricao}: {e}")
+        progresso["concluidas"] += 1
+
+    segundos = time.perf_counter() - inicio
+    progresso.update(situacao="concluído", atual=None, concluido_em=datetime.now(), segundos=round(segundos, 2))
+    print(f"🔥 Cache aquecido: {len(tarefas)} consultas em {segundos:.1f}s ({len(progresso['erros'])} erro(s))")
+
+
+@st.cache_resource(show_spinner=False)
+def iniciar_aquecimento() -> dict:
+    """
+    Dispara o aquecimento em segundo plano (uma vez por processo) e retorna o
+    dict de progresso, atualizado pela thread: situacao, total, concluidas,
+    atual, erros, iniciado_em, concluido_em e segundos.
+    """
+    progresso = _novo_progresso()
+    threading.Thread(target=_aquecer, args=(progresso,), name="aquecimento-cache", daemon=True).start()
+    return progresso
+
+
+def progresso_aquecimento() -> dict:
+    """Cópia do progresso do aquecimento deste processo."""
+    progresso = iniciar_aquecimento()
+    return dict(progresso, erros=list(progresso["erros"]))
+
+
+def aquecer_armazem() -> dict:
+    """
+    Calcula, nesta thread, só as consultas que vão para o armazém entre
+    processos (as demais ficariam na memória deste processo). Retorna o progresso.
+    """
+    progresso = _novo_progresso()
+    _aquecer(progresso, so_armazem=True)
+    return progresso
+
+
+if __name__ == "__main__":
+    # python -m hooks.aquecimento (antes de subir o servidor, ver o cabeçalho)
+    preparar_dados()
+    progresso = aquecer_armazem()
+    for erro in progresso["erros"]:
+        print(f"⚠️ {erro}")
+    sys.exit(0 if progresso["situacao"] == "concluído" else 1)
@@ -0,0 +1,570 @@
+# ---------------------------------------------------------
+# arquivo: hooks/cache.py
+# ---------------------------------------------------------
+# Cache das consultas com invalidação por versão de tabela.
+#
+# A tabela versao_tabelas guarda um contador por tabela da aplicação, que os
+# gatilhos do banco avançam a cada INSERT/UPDATE/DELETE (ver os passos 11 e 14
+# de hooks/migracoes.py); as cargas em lote do ETL suspendem os gatilhos e
+# avançam o contador uma única vez (versao_em_lote). Cada entrada de uma consulta decorada com
+# @cache_por_tabelas guarda as versões das tabelas que a consulta leu: uma
+# gravação invalida só as entradas das consultas que leem a tabela gravada, e
+# o restante do cache continua valendo. Não é preciso limpar nada depois de
+# gravar. Conferir as versões custa uma consulta por chamada, pela chave
+# primária.
+#
+# Todas as consultas em cache ficam num registro único por processo, que
+# conta acertos, falhas, tempo de cálculo e tamanho (pickle) por consulta e
+# por chave, e aplica a política declarada de cada consulta:
+#   - max_entradas: quantidade de chaves mantidas (descarta a menos usada);
+#   - max_bytes: orçamento de memória da consulta (idem);
+#   - ttl: validade, em segundos, de cada entrada.
+# Como no st.cache_data, os valores ficam guardados em pickle e cada chamada
+# recebe uma cópia própria. Dados de referência somente-leitura (catálogos,
+# hierarquia do SAMGe) usam compartilhado=True: o valor é guardado uma vez no
+# processo, imutável (arrays numpy somente-leitura, dicionários como
+# MappingProxyType), e cada chamada recebe uma visão dele, sem desserializar
+# nada; um DataFrame chega como cópia rasa, e o copy-on-write do pandas faz
+# com que alterações do chamador nunca cheguem ao valor compartilhado.
+#
+# Com várias réplicas do Streamlit na mesma máquina (processos atrás de um
+# proxy local), cada uma tem o seu registro. As consultas caras declaram
+# entre_processos=True: a entrada calculada também vai para um armazém
+# compartilhado pelas réplicas (ArmazemSQLite: database/cache_consultas.db,
+# pickle comprimido com zlib), e quem não a acha na memória procura no
+# armazém antes de calcular; uma réplica recém-iniciada já encontra o cache
+# quente. A entrada do armazém vale para a mesma consulta e argumentos e
+# para a mesma marca: identidade do banco (passo 12 de hooks/migracoes.py),
+# código da função e versões das tabelas. O armazém é só um cache: se ele
+# falhar, a consulta é calculada normalmente. Outro armazém (arquivos,
+# servidor externo) pode ser ligado com definir_armazem().
+# A página 🧮 Cache das Consultas (admin) mostra os números e permite
+# esvaziar cada consulta.
+# ---------------------------------------------------------
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from hooks.conexao import DB_PATH, get_connection
+
+# Política de quem não declara a sua
+MAX_ENTRADAS_PADRAO = 128
+MAX_BYTES_PADRAO = 64 * 1024 * 1024
+
+# Armazém entre processos padrão: arquivo, orçamento (comprimido) e espera
+# pelo arquivo ocupado por outra réplica antes de desistir (segundos)
+ARQUIVO_ARMAZEM = os.path.join(os.path.dirname(DB_PATH), "cache_consultas.db")
+MAX_BYTES_ARMAZEM = 512 * 1024 * 1024
+BUSY_TIMEOUT_ARMAZEM = 2.0
+
+# Compressão zlib dos valores no armazém (1 = a mais rápida)
+NIVEL_COMPRESSAO = 1
+
+# O orçamento do armazém é conferido a cada tantas gravações do processo
+PODA_A_CADA = 64
+
+# Retorno de CacheConsulta.obter quando não há entrada válida (None é um valor)
+AUSENTE = object()
+
+
+def somente_leitura(valor):
+    """
+    Versão imutável de `valor` para compartilhar entre sessões. DataFrame: as
+    colunas numpy passam a somente-leitura (as que já são, como as que vêm de
+    um memory-map do Arrow, não são copiadas); dict: MappingProxyType.
+    """
+    if isinstance(valor, pd.DataFrame):
+        colunas = {}
+        for col in valor.columns:
+            serie = valor[col]
+            if isinstance(serie.dtype, np.dtype):
+                dados = np.asarray(serie.array)
+                if dados.flags.writeable:
+                    dados = dados.copy()
+                    dados.flags.writeable = False
+                colunas[col] = dados
+            else:
+                colunas[col] = serie.array
+        return pd.DataFrame(colunas, index=valor.index, copy=False)
+    if isinstance(valor, dict):
+        return MappingProxyType(valor)
+    return valor
+
+
+def visao(valor):
+    """O que cada chamada recebe de um valor compartilhado (DataFrame: cópia rasa)."""
+    if isinstance(valor, pd.DataFrame):
+        return valor.copy(deep=False)
+    return valor
+
+
+def versoes_tabelas(tabelas) -> tuple:
+    """Versões atuais das `tabelas`, na ordem pedida (0 para tabelas sem contador)."""
+    tabelas = list(tabelas)
+    if not tabelas:
+        return ()
+    marcadores = ", ".join("?" for _ in tabelas)
+    versoes = dict(get_connection().execute(
+        f"SELECT tabela, versao FROM versao_tabelas WHERE tabela IN ({marcadores})", tabelas
+    ).fetchall())
+    return tuple(versoes.get(tabela, 0) for tabela in tabelas)
+
+
+def identidade_banco() -> str:
+    """Id do banco em uso (vazio se o banco ainda não tem o passo 12 das migrações)."""
+    try:
+        linha = get_connection().execute("SELECT id FROM identidade_banco").fetchone()
+    except sqlite3.OperationalError:
+        return ""
+    return linha[0] if linha else ""
+
+
+class ArmazemCache(ABC):
+    """
+    Armazém de cache compartilhado entre processos: bytes (pickle) por
+    consulta e chave, junto com a marca que os valida. Outro armazém deve
+    implementar os métodos abstratos e ser ligado com definir_armazem().
+    Falhas do armazém não devem chegar a quem consulta (ler retorna None).
+    """
+
+    @abstractmethod
+    def ler(self, consulta: str, chave: str, marca: str, ttl: float | None) -> dict | None:
+        """Entrada válida (dados, argumentos, segundos, criada_em) ou None."""
+
+    @abstractmethod
+    def gravar(self, consulta: str, chave: str, marca: str, argumentos: str, dados: bytes,
+               segundos: float) -> None:
+        """Grava (ou substitui) a entrada da consulta e chave."""
+
+    @abstractmethod
+    def esvaziar(self, consulta: str | None = None) -> None:
+        """Remove as entradas da consulta (todas, se None)."""
+
+    @abstractmethod
+    def resumo(self) -> dict[str, tuple[int, int]]:
+        """{consulta: (entradas, bytes armazenados)}."""
+
+
+class ArmazemSQLite(ArmazemCache):
+    """
+    Armazém num arquivo SQLite local, em WAL (as réplicas leem sem se
+    bloquear). Uma linha por consulta e chave, com o pickle comprimido; acima
+    de `max_bytes`, as entradas menos usadas são descartadas.
+    """
+
+    def __init__(self, caminho: str = ARQUIVO_ARMAZEM, max_bytes: int | None = MAX_BYTES_ARMAZEM):
+        self.caminho = caminho
+        self.max_bytes = max_bytes
+        self._conn: sqlite3.Connection | None = None
+        self._gravacoes = 0
+        self._lock = threading.Lock()
+
+    def _conexao(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.caminho, timeout=BUSY_TIMEOUT_ARMAZEM, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_consultas (
+                    consulta TEXT NOT NULL,
+                    chave TEXT NOT NULL,
+                    marca TEXT NOT NULL,
+                    argumentos TEXT,
+                    valor BLOB NOT NULL,
+                    bytes INTEGER NOT NULL,
+                    segundos REAL,
+                    criada_em REAL NOT NULL,
+                    usada_em REAL NOT NULL,
+                    PRIMARY KEY (consulta, chave)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_consultas_uso ON cache_consultas (usada_em)")
+            self._conn = conn
+        return self._conn
+
+    def ler(self, consulta: str, chave: str, marca: str, ttl: float | None) -> dict | None:
+        agora = time.time()
+        with self._lock:
+            try:
+                conn = self._conexao()
+                linha = conn.execute("""
+                    SELECT marca, argumentos, valor, segundos, criada_em
+                    FROM cache_consultas WHERE consulta = ? AND chave = ?
+                """, (consulta, chave)).fetchone()
+                if linha is None or linha[0] != marca or (ttl is not None and agora - linha[4] > ttl):
+                    return None
+                conn.execute(
+                    "UPDATE cache_consultas SET usada_em = ? WHERE consulta = ? AND chave = ?",
+                    (agora, consulta, chave),
+                )
+            except sqlite3.Error as e:
+                print(f"⚠️ Cache entre processos indisponível ({self.caminho}): {e}")
+                return None
+        return {"dados": zlib.decompress(linha[2]), "argumentos": linha[1], "segundos": linha[3],
+                "criada_em": linha[4]}
+
+    def gravar(self, consulta: str, chave: str, marca: str, argumentos: str, dados: bytes,
+               segundos: float) -> None:
+        comprimido = zlib.compress(dados, NIVEL_COMPRESSAO)
+        agora = time.time()
+        with self._lock:
+            try:
+                conn = self._conexao()
+                conn.execute("""
+                    INSERT INTO cache_consultas
+                        (consulta, chave, marca, argumentos, valor, bytes, segundos, criada_em, usada_em)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(consulta, chave) DO UPDATE SET
+                        marca = excluded.marca,
+                        argumentos = excluded.argumentos,
+                        valor = excluded.valor,
+                        bytes = excluded.bytes,
+                        segundos = excluded.segundos,
+                        criada_em = excluded.criada_em,
+                        usada_em = excluded.usada_em
+                """, (consulta, chave, marca, argumentos, comprimido, len(comprimido), segundos, agora, agora))
+                self._gravacoes += 1
+                if self.max_bytes is not None and self._gravacoes % PODA_A_CADA == 1:
+                    self._podar(conn)
+            except sqlite3.Error as e:
+                print(f"⚠️ Cache entre processos indisponível ({self.caminho}): {e}")
+
+    def _podar(self, conn: sqlite3.Connection) -> None:
+        """Descarta as entradas menos usadas até o armazém caber em max_bytes."""
+        conn.execute("""
+            DELETE FROM cache_consultas WHERE rowid IN (
+                SELECT rowid FROM (
+                    SELECT rowid, SUM(bytes) OVER (ORDER BY usada_em DESC) AS acumulado
+                    FROM cache_consultas
+                )
+                WHERE acumulado > ?
+            )
+        """, (self.max_bytes,))
+
+    def esvaziar(self, consulta: str | None = None) -> None:
+        with self._lock:
+            try:
+                if consulta is None:
+                    self._conexao().execute("DELETE FROM cache_consultas")
+                else:
+                    self._conexao().execute("DELETE FROM cache_consultas WHERE consulta = ?", (consulta,))
+            except sqlite3.Error as e:
+                print(f"⚠️ Cache entre processos indisponível ({self.caminho}): {e}")
+
+    def resumo(self) -> dict[str, tuple[int, int]]:
+        with self._lock:
+            try:
+                linhas = self._conexao().execute(
+                    "SELECT consulta, COUNT(*), SUM(bytes) FROM cache_consultas GROUP BY consulta"
+                ).fetchall()
+            except sqlite3.Error as e:
+                print(f"⚠️ Cache entre processos indisponível ({self.caminho}): {e}")
+                return {}
+        return {consulta: (entradas, tamanho) for consulta, entradas, tamanho in linhas}
+
+
+# Armazém entre processos em uso (None desliga); o SQLite só é aberto no primeiro uso
+_armazem: ArmazemCache | None = ArmazemSQLite()
+
+
+def definir_armazem(armazem: ArmazemCache | None) -> None:
+    """Liga outro armazém entre processos (ou None, para desligar)."""
+    global _armazem
+    _armazem = armazem
+
+
+def armazem_cache() -> ArmazemCache | None:
+    return _armazem
+
+
+class CacheConsulta:
+    """
+    Entradas e estatísticas de uma consulta em cache. Uma entrada por
+    combinação de argumentos: quando as versões das tabelas mudam, a entrada
+    é recalculada e substituída (não se acumulam versões antigas). Com
+    entre_processos, a memória do processo fica na frente do armazém.
+    """
+
+    def __init__(self, nome: str, max_entradas: int | None, max_bytes: int | None, ttl: float | None,
+                 compartilhado: bool = False, entre_processos: bool = False):
+        self.nome = nome
+        self.compartilhado = compartilhado
+        self.entre_processos = entre_processos
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # chave -> dict(argumentos, versoes, valor, bytes, criada_em, usada_em, segundos, acertos)
+        self.entradas: OrderedDict[str, dict] = OrderedDict()
+        self.bytes = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.acertos_armazem = 0
+        self.descartes = 0
+        self.segundos_calculo = 0.0
+        self.codigo: bytes | None = None
+        self._lock = threading.Lock()
+
+    def obter(self, chave: str, versoes: tuple):
+        """Valor guardado para `chave` nas `versoes` dadas (AUSENTE se não houver)."""
+        agora = time.time()
+        with self._lock:
+            entrada = self.entradas.get(chave)
+            valida = (
+                entrada is not None
+                and entrada["versoes"] == versoes
+                and (self.ttl is None or agora - entrada["criada_em"] <= self.ttl)
+            )
+            if not valida:
+                return AUSENTE
+            self.acertos += 1
+            entrada["acertos"] += 1
+            entrada["usada_em"] = agora
+            self.entradas.move_to_end(chave)
+            valor = entrada["valor"]
+        return visao(valor) if self.compartilhado else pickle.loads(valor)
+
+    def _marca(self, identidade: str, versoes: tuple) -> str:
+        return f"{identidade}:{self.codigo.hex() if self.codigo else ''}:{versoes!r}"
+
+    def obter_do_armazem(self, chave: str, versoes: tuple):
+        """
+        Procura `chave` no armazém entre processos (AUSENTE se não houver) e,
+        achando, guarda a entrada também no processo.
+        """
+        armazem = armazem_cache()
+        identidade = identidade_banco() if armazem is not None else ""
+        if not identidade:
+            return AUSENTE
+        armazenada = armazem.ler(self.nome, chave, self._marca(identidade, versoes), self.ttl)
+        if armazenada is None:
+            return AUSENTE
+        valor = pickle.loads(armazenada["dados"])
+        return self.guardar(chave, armazenada["argumentos"], versoes, valor, armazenada["segundos"], armazenada)
+
+    def guardar(self, chave: str, argumentos: str, versoes: tuple, valor, segundos: float,
+                armazenada: dict | None = None):
+        """
+        Guarda `valor` e retorna o que a chamada deve receber. `armazenada` é a
+        entrada lida do armazém, quando o valor veio dele; senão, o valor foi
+        calculado agora e, com entre_processos, segue também para o armazém.
+        """
+        if armazenada is not None:
+            dados = armazenada["dados"]
+        else:
+            dados = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        tamanho = len(dados)
+        serializado = dados
+        if self.compartilhado:
+            valor = dados = somente_leitura(valor)
+        agora = time.time()
+        with self._lock:
+            if armazenada is not None:
+                self.acertos_armazem += 1
+            else:
+                self.falhas += 1
+                self.segundos_calculo += segundos
+            anterior = self.entradas.pop(chave, None)
+            if anterior is not None:
+                self.bytes -= anterior["bytes"]
+            self.entradas[chave] = {
+                "argumentos": argumentos,
+                "versoes": versoes,
+                "valor": dados,
+                "bytes": tamanho,
+                "criada_em": armazenada["criada_em"] if armazenada is not None else agora,
+                "usada_em": agora,
+                "segundos": segundos,
+                "acertos": 0,
+            }
+            self.bytes += tamanho
+            self._aplicar_politica(agora)
+
+        armazem = armazem_cache()
+        if self.entre_processos and armazenada is None and armazem is not None:
+            identidade = identidade_banco()
+            if identidade:
+                armazem.gravar(self.nome, chave, self._marca(identidade, versoes), argumentos, serializado, segundos)
+        return visao(valor) if self.compartilhado else valor
+
+    def _aplicar_politica(self, agora: float) -> None:
+        if self.ttl is not None:
+            for chave in [c for c, e in self.entradas.items() if agora - e["criada_em"] > self.ttl]:
+                self._descartar(chave)
+        # Mantém ao menos a entrada recém-calculada, mesmo acima do orçamento
+        while len(self.entradas) > 1 and (
+            (self.max_entradas is not None and len(self.entradas) > self.max_entradas)
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+        ):
+            self._descartar(next(iter(self.entradas)))
+
+    def _descartar(self, chave: str) -> None:
+        entrada = self.entradas.pop(chave)
+        self.bytes -= entrada["bytes"]
+        self.descartes += 1
+
+    def esvaziar(self, armazem: bool = False) -> None:
+        """
+        Remove todas as entradas do processo (as estatísticas de acertos e
+        falhas são mantidas) e, com armazem=True, também as do armazém.
+        """
+        with self._lock:
+            self.entradas.clear()
+            self.bytes = 0
+        if armazem and armazem_cache() is not None:
+            armazem_cache().esvaziar(self.nome)
+
+    def listar(self) -> list[dict]:
+        """Cópia das entradas, da menos para a mais recentemente usada."""
+        with self._lock:
+            return [dict(entrada) for entrada in self.entradas.values()]
+
+
+@st.cache_resource(show_spinner=False)
+def registro_caches() -> dict[str, CacheConsulta]:
+    """Registro único por processo (compartilhado entre sessões), por nome da consulta."""
+    return {}
+
+
+def _chave(argumentos: inspect.BoundArguments) -> str:
+    texto = pickle.dumps(sorted(argumentos.arguments.items()), protocol=pickle.HIGHEST_PROTOCOL)
+    return hashlib.sha1(texto).hexdigest()
+
+
+def cache_por_tabelas(*tabelas: str, tabela_arg: str | None = None, max_entradas: int | None = MAX_ENTRADAS_PADRAO,
+                      max_bytes: int | None = MAX_BYTES_PADRAO, ttl: float | None = None,
+                      compartilhado: bool = False, entre_processos: bool = False):
+    """
+    Decorador: guarda o resultado da função por argumentos, junto com as
+    versões das `tabelas` que ela lê, com a política de descarte dada (ver
+    cabeçalho; None desliga o limite). Se a tabela lida vier de um argumento
+    (ex.: get_options_from_table), informe o nome dele em `tabela_arg`. Com
+    compartilhado=True, o valor é guardado imutável e as chamadas recebem
+    visões dele, em vez de cópias (só para quem não altera o resultado). Com
+    entre_processos=True, as entradas são compartilhadas com as outras
+    réplicas pelo armazém (para consultas caras; o resultado precisa ser
+    serializável com pickle).
+
+        @cache_por_tabelas("td_iniciativas", "tf_cadastros_iniciativas", max_entradas=64)
+        def get_iniciativas_usuario(perfil, setor): ...
+
+    A função decorada ganha .clear(), que esvazia o seu cache.
+    """
+    def decorador(func):
+        assinatura = inspect.signature(func)
+        # O arquivo entra no nome: as páginas rodam todas como __main__
+        nome = f"{os.path.basename(func.__code__.co_filename)}:{func.__qualname__}"
+        registro = registro_caches()
+        cache = registro.get(nome)
+        if cache is None:
+            cache = registro.setdefault(
+                nome, CacheConsulta(nome, max_entradas, max_bytes, ttl, compartilhado, entre_processos)
+            )
+        # As páginas redefinem as funções a cada rerun: vale a política atual,
+        # e o código alterado (desenvolvimento) invalida o que foi guardado
+        cache.max_entradas, cache.max_bytes, cache.ttl = max_entradas, max_bytes, ttl
+        cache.entre_processos = entre_processos
+        if cache.compartilhado != compartilhado:
+            cache.esvaziar()
+            cache.compartilhado = compartilhado
+        try:
+            codigo = hashlib.sha1(inspect.getsource(func).encode("utf-8")).digest()
+        except (OSError, TypeError):
+            codigo = hashlib.sha1(func.__code__.co_code).digest()
+        if cache.codigo != codigo:
+            cache.esvaziar()
+            cache.codigo = codigo
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            argumentos = assinatura.bind(*args, **kwargs)
+            argumentos.apply_defaults()
+            lidas = list(tabelas)
+            if tabela_arg is not None:
+                lidas.append(argumentos.arguments[tabela_arg])
+            versoes = versoes_tabelas(lidas)
+            chave = _chave(argumentos)
+
+            valor = cache.obter(chave, versoes)
+            if valor is AUSENTE and cache.entre_processos:
+                valor = cache.obter_do_armazem(chave, versoes)
+            if valor is AUSENTE:
+                inicio = time.perf_counter()
+                valor = func(*args, **kwargs)
+                texto = ", ".join(f"{arg}={v!r}" for arg, v in argumentos.arguments.items())
+                valor = cache.guardar(chave, texto[:200], versoes, valor, time.perf_counter() - inicio)
+            return valor
+
+        wrapper.clear = cache.esvaziar
+        wrapper.cache = cache
+        return wrapper
+
+    return decorador
+
+
+def limpar_caches() -> None:
+    """Esvazia todas as consultas do registro, o armazém entre processos e o st.cache_data."""
+    for cache in registro_caches().values():
+        cache.esvaziar()
+    if armazem_cache() is not None:
+        armazem_cache().esvaziar()
+    st.cache_data.clear()
+
+
+def estatisticas_caches() -> pd.DataFrame:
+    """Uma linha por consulta registrada: política, ocupação e acertos (no processo e no armazém)."""
+    armazenadas = armazem_cache().resumo() if armazem_cache() is not None else {}
+    linhas = []
+    for nome, cache in sorted(registro_caches().items()):
+        chamadas = cache.acertos + cache.acertos_armazem + cache.falhas
+        no_armazem, bytes_armazem = armazenadas.get(nome, (0, 0))
+        linhas.append({
+            "Consulta": nome,
+            "Compartilhada": cache.compartilhado,
+            "Entre processos": cache.entre_processos,
+            "Entradas": len(cache.entradas),
+            "Máx. entradas": cache.max_entradas,
+            "MB": round(cache.bytes / 1024 / 1024, 3),
+            "Máx. MB": round(cache.max_bytes / 1024 / 1024, 1) if cache.max_bytes is not None else None,
+            "TTL (s)": cache.ttl,
+            "Entradas no armazém": no_armazem,
+            "MB no armazém": round(bytes_armazem / 1024 / 1024, 3),
+            "Acertos": cache.acertos,
+            "Acertos do armazém": cache.acertos_armazem,
+            "Falhas": cache.falhas,
+            "% acerto": round(100 * (cache.acertos + cache.acertos_armazem) / chamadas, 1) if chamadas else None,
+            "Descartes": cache.descartes,
+            "Segundos calculando": round(cache.segundos_calculo, 3),
+        })
+    return pd.DataFrame(linhas)
+
+
+def entradas_cache(nome: str) -> pd.DataFrame:
+    """Entradas de uma consulta, da mais para a menos recentemente usada."""
+    return pd.DataFrame([
+        {
+            "Argumentos": entrada["argumentos"],
+            "Versões": str(entrada["versoes"]),
+            "KB": round(entrada["bytes"] / 1024, 1),
+            "Acertos": entrada["acertos"],
+            "Segundos calculando": round(entrada["segundos"], 4),
+            "Criada em": datetime.fromtimestamp(entrada["criada_em"]),
+            "Usada em": datetime.fromtimestamp(entrada["usada_em"]),
+        }
+        for entrada in reversed(registro_caches()[nome].listar())
+    ])
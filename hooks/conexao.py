@@ -0,0 +1,176 @@
+# ---------------------------------------------------------
+# arquivo: hooks/conexao.py
+# ---------------------------------------------------------
+# Camada única de acesso ao SQLite usada por todas as páginas.
+#
+# Cada thread de script do Streamlit recebe uma conexão própria, emprestada de
+# um pool compartilhado pelo processo (st.cache_resource). Quando a thread
+# termina, a conexão volta para o pool em vez de ser fechada, evitando o custo
+# de abrir/configurar uma conexão nova a cada rerun.
+#
+# O arquivo `<banco>.geracao` guarda a geração do banco, avançada a cada
+# republicação (ver hooks/reconstrucao.py). Conexões abertas em uma geração
+# anterior não voltam para o pool: a próxima thread recebe uma conexão nova.
+# ---------------------------------------------------------
+import os
+import sqlite3
+import threading
+
+import streamlit as st
+
+DB_PATH = "database/app_data.db"
+
+# Tempo máximo (segundos) que uma conexão espera por um lock antes de falhar
+BUSY_TIMEOUT = 15.0
+
+# Quantidade de comandos preparados mantidos em cache por conexão
+CACHED_STATEMENTS = 512
+
+# Conexões ociosas mantidas no pool (as excedentes são fechadas)
+POOL_MAX_OCIOSAS = 32
+
+# PRAGMAs aplicados a toda conexão aberta pela aplicação
+PRAGMAS = [
+    ("journal_mode", "WAL"),          # leitores não bloqueiam o escritor (e vice-versa)
+    ("synchronous", "NORMAL"),        # seguro em WAL e bem mais rápido que FULL
+    ("mmap_size", 268435456),         # 256 MB de leitura via memory-map
+    ("cache_size", -65536),           # 64 MB de page cache (valor negativo = KiB)
+    ("temp_store", "MEMORY"),
+    ("busy_timeout", int(BUSY_TIMEOUT * 1000)),
+]
+
+
+def configurar_conexao(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """
+    Aplica os PRAGMAs padrão da aplicação em uma conexão já aberta.
+    """
+    for pragma, valor in PRAGMAS:
+        conn.execute(f"PRAGMA {pragma} = {valor}")
+    return conn
+
+
+def abrir_conexao(db_path: str = DB_PATH, check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    Abre uma conexão avulsa (fora do pool) já configurada.
+    Usada pelo ETL e por rotinas que precisam de uma conexão dedicada.
+    """
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(
+        db_path,
+        timeout=BUSY_TIMEOUT,
+        cached_statements=CACHED_STATEMENTS,
+        check_same_thread=check_same_thread,
+    )
+    return configurar_conexao(conn)
+
+
+def geracao_banco(db_path: str = DB_PATH) -> int:
+    """Geração atual do banco (0 se ele nunca foi republicado)."""
+    try:
+        with open(f"{db_path}.geracao", encoding="utf-8") as arquivo:
+            return int(arquivo.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def avancar_geracao(db_path: str = DB_PATH) -> int:
+    """
+    Avança a geração do banco (gravação atômica) e retorna a nova geração.
+    Chamado por quem republica o conteúdo do banco.
+    """
+    geracao = geracao_banco(db_path) + 1
+    temporario = f"{db_path}.geracao.{os.getpid()}"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        arquivo.write(str(geracao))
+    os.replace(temporario, f"{db_path}.geracao")
+    return geracao
+
+
+class _Emprestimo:
+    """
+    Guarda a conexão emprestada a uma thread. Ao ser coletado (quando a
+    thread termina e o seu threading.local é descartado), devolve a conexão
+    ao pool.
+    """
+
+    def __init__(self, pool: "PoolConexoes", conn: sqlite3.Connection, geracao: int):
+        self.pool = pool
+        self.conn = conn
+        self.geracao = geracao
+
+    def __del__(self):
+        try:
+            self.pool.devolver(self.conn, self.geracao)
+        except Exception:
+            pass
+
+
+class PoolConexoes:
+    """
+    Pool de conexões SQLite com uma conexão por thread.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, max_ociosas: int = POOL_MAX_OCIOSAS):
+        self.db_path = db_path
+        self.max_ociosas = max_ociosas
+        # Conexões ociosas com a geração do banco em que foram abertas
+        self._ociosas: list[tuple[sqlite3.Connection, int]] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def obter(self) -> sqlite3.Connection:
+        """
+        Retorna a conexão da thread atual (emprestando uma do pool se preciso).
+        A thread fica com a mesma conexão até terminar; conexões ociosas de uma
+        geração anterior do banco são fechadas em vez de reaproveitadas.
+        """
+        emprestimo = getattr(self._local, "emprestimo", None)
+        if emprestimo is None:
+            geracao = geracao_banco(self.db_path)
+            conn = None
+            while conn is None:
+                with self._lock:
+                    if not self._ociosas:
+                        break
+                    conn, geracao_conn = self._ociosas.pop()
+                if geracao_conn != geracao:
+                    conn.close()
+                    conn = None
+            if conn is None:
+                # As conexões circulam entre threads do pool, mas nunca são
+                # usadas por duas threads ao mesmo tempo.
+                conn = abrir_conexao(self.db_path, check_same_thread=False)
+            emprestimo = _Emprestimo(self, conn, geracao)
+            self._local.emprestimo = emprestimo
+        return emprestimo.conn
+
+    def devolver(self, conn: sqlite3.Connection, geracao: int = 0) -> None:
+        """
+        Devolve uma conexão ao pool, descartando transações pendentes.
+        Se o banco mudou de geração desde o empréstimo, a conexão é fechada.
+        """
+        if geracao != geracao_banco(self.db_path):
+            conn.close()
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if len(self._ociosas) < self.max_ociosas:
+                self._ociosas.append((conn, geracao))
+                return
+        conn.close()
+
+
+@st.cache_resource(show_spinner=False)
+def get_pool(db_path: str = DB_PATH) -> PoolConexoes:
+    """Pool único por processo (compartilhado entre sessões)."""
+    return PoolConexoes(db_path)
+
+
+def get_connection(db_path: str = DB_PATH) -> sqlite3.Connection:
+    """
+    Retorna a conexão SQLite da thread atual.
+    Não feche a conexão retornada: ela pertence ao pool.
+    """
+    return get_pool(db_path).obter()
+
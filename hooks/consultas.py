@@ -0,0 +1,93 @@
+# ---------------------------------------------------------
+# arquivo: hooks/consultas.py
+# ---------------------------------------------------------
+# Consultas de leitura usadas pelas páginas e pelo aquecimento do cache
+# (hooks/aquecimento.py). Ficam aqui, e não nas páginas, para que o
+# aquecimento chame as mesmas funções e preencha as mesmas entradas de cache
+# que as páginas vão consultar.
+# ---------------------------------------------------------
+import pandas as pd
+
+from hooks.cache import cache_por_tabelas
+from hooks.conexao import get_connection
+from hooks.snapshots import ler_snapshot
+
+# Colunas de 'td_dados_base_iniciativas' usadas nas páginas de Consulta
+COLUNAS_CONSULTA = [
+    "DEMANDANTE",
+    "Nome da Proposta/Iniciativa Estruturante",
+    "Unidade de Conservação",
+    "Observações",
+    "VALOR TOTAL ALOCADO",
+    "Valor Total da Iniciativa",
+    "SALDO",
+    "Nº SEI",
+    "AÇÃO DE APLICAÇÃO",
+    "CATEGORIA UC",
+    "GR",
+    "BIOMA",
+    "UF"
+]
+
+
+def load_data_from_db():
+    """
+    Carrega os dados de 'td_dados_base_iniciativas' a partir do snapshot colunar
+    gerado pelo ETL (memory-map, só as colunas usadas). Sem snapshot, lê do SQLite.
+    """
+    df = ler_snapshot("td_dados_base_iniciativas", COLUNAS_CONSULTA)
+    if df is None:
+        conn = get_connection()
+        colunas = ", ".join(f'"{col}"' for col in COLUNAS_CONSULTA)
+        df = pd.read_sql_query(f"SELECT {colunas} FROM td_dados_base_iniciativas", conn)
+    return df
+
+
+@cache_por_tabelas("td_iniciativas", "tf_cadastros_iniciativas", "td_demandantes", max_entradas=64,
+                   entre_processos=True)
+def get_iniciativas_usuario(perfil: str, setor: str) -> pd.DataFrame:
+    """
+    Retorna as iniciativas disponíveis para o usuário,
+    filtradas por perfil e setor, se não for 'admin'.
+    """
+    conn = get_connection()
+    query = "SELECT id_iniciativa, nome_iniciativa FROM td_iniciativas WHERE ativo = 1"
+    if perfil != "admin":
+        query += """
+            AND id_iniciativa IN (
+               SELECT id_iniciativa
+               FROM tf_cadastros_iniciativas
+               WHERE ativo = 1 AND id_demandante = (
+                  SELECT id_demandante FROM td_demandantes WHERE nome_demandante = ?
+               )
+            )
+        """
+        iniciativas = pd.read_sql_query(query, conn, params=[setor])
+    else:
+        iniciativas = pd.read_sql_query(query, conn)
+    return iniciativas
+
+
+@cache_por_tabelas(tabela_arg="table_name", max_entradas=128, max_bytes=16 * 1024 * 1024, compartilhado=True)
+def get_options_from_table(
+    table_name: str,
+    id_col: str,
+    name_col: str,
+    filter_col: str | None = None,
+    filter_val: str | None = None
+) -> dict[str, str]:
+    """
+    Lê da tabela `table_name` as colunas `id_col` e `name_col`.
+    Opcionalmente filtra por `filter_col = filter_val`.
+    Retorna um dict { id_val: name_val } somente-leitura, compartilhado entre as sessões.
+    """
+    conn = get_connection()
+    query = f"SELECT {id_col}, {name_col} FROM {table_name}"
+    params = ()
+    if filter_col and filter_val is not None:
+        query += f" WHERE {filter_col} = ?"
+        params = (str(filter_val),)
+
+    df = pd.read_sql_query(query, conn, params=params)
+
+    return {str(row[id_col]): row[name_col] for _, row in df.iterrows()}
@@ -0,0 +1,217 @@
+# ---------------------------------------------------------
+# arquivo: hooks/escrita.py
+# ---------------------------------------------------------
+# Fila única de escrita no SQLite.
+#
+# Uma thread dedicada (EscritorBanco) é dona da única conexão de escrita da
+# aplicação. As páginas não executam INSERT/UPDATE/DELETE diretamente: elas
+# enfileiram "comandos" e recebem um Future. O escritor agrupa os comandos
+# pendentes em uma única transação (cada um isolado por SAVEPOINT), de modo
+# que uma falha afeta apenas o comando que falhou. Como o banco está em WAL,
+# os leitores nunca são bloqueados pelo escritor.
+#
+# Um comando é qualquer função que recebe a conexão como primeiro argumento.
+# Ele NÃO deve chamar commit()/rollback(): a transação é do escritor.
+#
+# Comandos exclusivos (executar_exclusivo) rodam sozinhos e fora de transação,
+# para operações que controlam os próprios locks, como a republicação do
+# banco pela API de backup do SQLite. Enquanto rodam, as demais escritas do
+# processo esperam na fila.
+# ---------------------------------------------------------
+import itertools
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+import streamlit as st
+
+from hooks.conexao import DB_PATH, abrir_conexao, geracao_banco
+
+# Máximo de comandos agrupados em uma mesma transação
+LOTE_MAX = 128
+
+# Tempo máximo (segundos) que a interface espera pela confirmação de uma escrita
+TIMEOUT_ESCRITA = 30.0
+
+_PARAR = object()
+
+
+class EscritorBanco(threading.Thread):
+    """
+    Thread que serializa todas as escritas no banco.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, lote_max: int = LOTE_MAX):
+        super().__init__(name="escritor-sqlite", daemon=True)
+        self.db_path = db_path
+        self.lote_max = lote_max
+        self._fila: queue.Queue = queue.Queue()
+        self._conn: sqlite3.Connection | None = None
+        self._inode: int | None = None
+        self._geracao: int | None = None
+
+    # -----------------------------------------------------------------
+    # API pública
+    # -----------------------------------------------------------------
+    def submeter(self, comando, *args, **kwargs) -> Future:
+        """Enfileira um comando de escrita e retorna um Future com o seu resultado."""
+        futuro: Future = Future()
+        self._fila.put((futuro, comando, args, kwargs, False))
+        return futuro
+
+    def submeter_exclusivo(self, comando, *args, **kwargs) -> Future:
+        """Enfileira um comando que roda sozinho, fora de transação (ver cabeçalho)."""
+        futuro: Future = Future()
+        self._fila.put((futuro, comando, args, kwargs, True))
+        return futuro
+
+    def parar(self) -> None:
+        """Encerra a thread após processar os comandos já enfileirados."""
+        self._fila.put(_PARAR)
+
+    # -----------------------------------------------------------------
+    # Laço principal
+    # -----------------------------------------------------------------
+    def run(self):
+        while True:
+            item = self._fila.get()
+            if item is _PARAR:
+                break
+
+            # Coalesce: junta tudo o que já estiver na fila em um só lote
+            lote = [item]
+            parar = False
+            while len(lote) < self.lote_max:
+                try:
+                    proximo = self._fila.get_nowait()
+                except queue.Empty:
+                    break
+                if proximo is _PARAR:
+                    parar = True
+                    break
+                lote.append(proximo)
+
+            # Comandos exclusivos quebram o lote, preservando a ordem da fila
+            for exclusivo, grupo in itertools.groupby(lote, key=lambda item: item[4]):
+                if exclusivo:
+                    for item in grupo:
+                        self._executar_exclusivo(item)
+                else:
+                    self._executar_lote(list(grupo))
+            if parar:
+                break
+
+        if self._conn is not None:
+            self._conn.close()
+
+    def _conexao(self) -> sqlite3.Connection:
+        """
+        Retorna a conexão de escrita, reabrindo-a se o arquivo do banco
+        tiver sido recriado ou o banco tiver mudado de geração desde a
+        última abertura.
+        """
+        try:
+            inode = os.stat(self.db_path).st_ino
+        except FileNotFoundError:
+            inode = None
+        geracao = geracao_banco(self.db_path)
+
+        if self._conn is None or inode != self._inode or geracao != self._geracao:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = abrir_conexao(self.db_path)
+            # Autocommit: as transações são controladas explicitamente
+            self._conn.isolation_level = None
+            self._inode = os.stat(self.db_path).st_ino
+            self._geracao = geracao
+        return self._conn
+
+    def _executar_exclusivo(self, item) -> None:
+        futuro, comando, args, kwargs, _ = item
+        if not futuro.set_running_or_notify_cancel():
+            return
+        try:
+            resultado = comando(self._conexao(), *args, **kwargs)
+        except Exception as e:
+            if self._conn is not None and self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            futuro.set_exception(e)
+        else:
+            futuro.set_result(resultado)
+
+    def _executar_lote(self, lote: list) -> None:
+        pendentes = [item for item in lote if item[0].set_running_or_notify_cancel()]
+        if not pendentes:
+            return
+
+        resultados = []
+        try:
+            conn = self._conexao()
+            conn.execute("BEGIN IMMEDIATE")
+            for futuro, comando, args, kwargs, _ in pendentes:
+                conn.execute("SAVEPOINT comando")
+                try:
+                    resultado = comando(conn, *args, **kwargs)
+                    conn.execute("RELEASE comando")
+                    resultados.append((futuro, resultado, None))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO comando")
+                    conn.execute("RELEASE comando")
+                    resultados.append((futuro, None, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            # Falha da transação como um todo (ex.: banco bloqueado por tempo demais)
+            if self._conn is not None and self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            for futuro, _, _, _, _ in pendentes:
+                futuro.set_exception(e)
+            return
+
+        for futuro, resultado, erro in resultados:
+            if erro is not None:
+                futuro.set_exception(erro)
+            else:
+                futuro.set_result(resultado)
+
+
+@st.cache_resource(show_spinner=False)
+def get_escritor(db_path: str = DB_PATH) -> EscritorBanco:
+    """Escritor único por processo (compartilhado entre sessões)."""
+    escritor = EscritorBanco(db_path)
+    escritor.start()
+    return escritor
+
+
+def executar_escrita(comando, *args, **kwargs) -> Future:
+    """
+    Enfileira `comando(conn, *args, **kwargs)` no escritor do banco.
+    Use `.result()` no Future retornado para aguardar a confirmação.
+    """
+    return get_escritor().submeter(comando, *args, **kwargs)
+
+
+def executar_exclusivo(comando, *args, **kwargs) -> Future:
+    """
+    Enfileira `comando(conn, *args, **kwargs)` para rodar sozinho e fora de
+    transação no escritor. O comando controla as próprias transações.
+    """
+    return get_escritor().submeter_exclusivo(comando, *args, **kwargs)
+
+
+# ---------------------------------------------------------
+# Comandos genéricos
+# ---------------------------------------------------------
+def _sql(conn: sqlite3.Connection, sql: str, params=()) -> int:
+    return conn.execute(sql, params).rowcount
+
+
+def executar_sql(sql: str, params=()) -> Future:
+    """Enfileira um único comando SQL. O Future retorna o número de linhas afetadas."""
+    return executar_escrita(_sql, sql, tuple(params))
+
+
+def escrever(sql: str, params=(), timeout: float = TIMEOUT_ESCRITA) -> int:
+    """Atalho: executa um comando SQL pelo escritor e aguarda a confirmação."""
+    return executar_sql(sql, params).result(timeout=timeout)
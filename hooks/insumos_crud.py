@@ -1,20 +1,18 @@
 # ---------------------------------------------------------
-# arquivo: database/insumos_crud.py
+# arquivo: hooks/insumos_crud.py
 # ---------------------------------------------------------
-import sqlite3
 import pandas as pd
 
-def get_connection():
-    return sqlite3.connect("database/app_data.db")
+from hooks.cache import cache_por_tabelas
+from hooks.conexao import get_connection
+from hooks.escrita import escrever
 
 def inserir_insumo(elemento_despesa: str, especificacao_padrao: str, descricao_insumo: str,
                    especificacao_tecnica: str, preco_referencia: float) -> None:
     """
     Insere um novo insumo na tabela td_insumos.
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
+    escrever(
         """
         INSERT INTO td_insumos (
             elemento_despesa,
@@ -27,8 +25,6 @@ def inserir_insumo(elemento_despesa: str, especificacao_padrao: str, descricao_i
         """,
         (elemento_despesa, especificacao_padrao, descricao_insumo, especificacao_tecnica, preco_referencia)
     )
-    conn.commit()
-    conn.close()
 
 def listar_insumos() -> pd.DataFrame:
     """
@@ -36,9 +32,20 @@ def listar_insumos() -> pd.DataFrame:
     """
     conn = get_connection()
     df = pd.read_sql_query("SELECT * FROM td_insumos ORDER BY id ASC", conn)
-    conn.close()
     return df
 
+@cache_por_tabelas("td_insumos", max_entradas=1, compartilhado=True)
+def catalogo_insumos() -> pd.DataFrame:
+    """
+    Catálogo de insumos usado na seleção das regras de negócio (somente-leitura,
+    compartilhado pelo processo; muda a cada gravação em td_insumos).
+    """
+    conn = get_connection()
+    return pd.read_sql_query(
+        "SELECT id, elemento_despesa, especificacao_padrao, descricao_insumo FROM td_insumos",
+        conn
+    )
+
 def atualizar_insumo(
     insumo_id: int,
     elemento_despesa: str,
@@ -50,9 +57,7 @@ def atualizar_insumo(
     """
     Atualiza os dados de um insumo existente.
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
+    escrever(
         """
         UPDATE td_insumos
         SET
@@ -65,15 +70,9 @@ def atualizar_insumo(
         """,
         (elemento_despesa, especificacao_padrao, descricao_insumo, especificacao_tecnica, preco_referencia, insumo_id)
     )
-    conn.commit()
-    conn.close()
 
 def deletar_insumo(insumo_id: int) -> None:
     """
     Deleta um insumo pelo ID.
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM td_insumos WHERE id = ?", (insumo_id,))
-    conn.commit()
-    conn.close()
+    escrever("DELETE FROM td_insumos WHERE id = ?", (insumo_id,))
@@ -0,0 +1,780 @@
+# ---------------------------------------------------------
+# arquivo: hooks/migracoes.py
+# ---------------------------------------------------------
+# Migrações versionadas do esquema do banco.
+#
+# O esquema de todas as tabelas (inclusive as alimentadas pelo ETL) é definido
+# aqui, em passos numerados e aplicados em ordem. A tabela schema_version
+# registra os passos já aplicados: abrir um banco atualizado custa uma
+# consulta, e atualizar um banco antigo aplica só os passos pendentes, sem
+# apagar tabelas nem dados de usuário.
+#
+# O ETL (init_db.py) não cria nem remove tabelas: ele recarrega ou sincroniza
+# as suas linhas (hooks/sincronizacao.py), de modo que os índices daqui são
+# preservados.
+#
+# Para mudar o esquema, acrescente um novo passo ao fim de MIGRACOES; nunca
+# altere um passo já publicado.
+# ---------------------------------------------------------
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from hooks.conexao import DB_PATH
+from hooks.escrita import executar_escrita
+from hooks.regras import normalizar_regras
+from hooks.sincronizacao import calcular_chaves, normalizar_nome
+from hooks.snapshots import criar_tabela_snapshots
+
+# Colunas que identificam uma linha das planilhas sincronizadas (ver hooks/sincronizacao.py)
+CHAVE_CADASTROS_INICIATIVAS = ["DEMANDANTE", "Nome da Proposta/Iniciativa Estruturante", "AÇÃO DE APLICAÇÃO", "CNUC"]
+CHAVE_INSUMOS = ["elemento_despesa", "especificacao_padrao", "descricao_insumo", "especificacao_tecnica"]
+CHAVE_ELEGIVEIS = ["DEMANDANTE (diretoria)", "Nome da Proposta/Iniciativa Estruturante", "AÇÃO DE APLICAÇÃO", "CNUC"]
+
+# Colunas de tf_distribuicao_elegiveis. Até o passo 9, os valores distribuídos
+# a cada processo SAMGe (eixo) eram colunas extras, acrescentadas pelo ETL
+TETOS_ELEGIVEIS = ["TetoSaldo disponível", "TetoPrevisto 2025", "TetoPrevisto 2026", "TetoPrevisto 2027"]
+COLUNAS_ELEGIVEIS = [
+    "id",
+    "DEMANDANTE (diretoria)",
+    "Nome da Proposta/Iniciativa Estruturante",
+    "AÇÃO DE APLICAÇÃO",
+    "Unidade de Conservação",
+    "CNUC",
+    *TETOS_ELEGIVEIS,
+    "TetoTotalDisponivel",
+    "A Distribuir",
+    "id_demandante",
+    "id_iniciativa",
+    "id_acao",
+]
+
+
+def _criar_esquema_inicial(conn):
+    cursor = conn.cursor()
+
+    # Controle do ETL
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS etl_manifesto (
+            fonte TEXT PRIMARY KEY,
+            arquivo TEXT NOT NULL,
+            sha256 TEXT NOT NULL,
+            tamanho INTEGER,
+            parseado_em TIMESTAMP,
+            carregado_em TIMESTAMP
+        )
+    """)
+    criar_tabela_snapshots(cursor)
+
+    # Usuários
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tf_usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cpf TEXT UNIQUE NOT NULL,
+            nome_completo TEXT NOT NULL,
+            email TEXT NOT NULL,
+            setor_demandante TEXT NOT NULL,
+            perfil TEXT NOT NULL DEFAULT 'comum' -- Pode ser 'comum' ou 'admin'
+        )
+    """)
+
+    # Base consolidada e tabelas derivadas dela
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS td_dados_base_iniciativas (
+            "DEMANDANTE" TEXT,
+            "Nome da Proposta/Iniciativa Estruturante" TEXT,
+            "Unidade de Conservação" TEXT,
+            "Observações" TEXT,
+            "VALOR TOTAL ALOCADO" REAL,
+            "Valor da Iniciativa (R$)" REAL,
+            "Valor Total da Iniciativa" REAL,
+            "SALDO" REAL,
+            "Nº SEI" INTEGER,
+            "AÇÃO DE APLICAÇÃO" TEXT,
+            "CATEGORIA UC" TEXT,
+            "CNUC" TEXT,
+            "GR" TEXT,
+            "BIOMA" TEXT,
+            "UF" TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS td_demandantes (
+            id_demandante INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome_demandante TEXT UNIQUE
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS td_iniciativas (
+            id_iniciativa INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome_iniciativa TEXT UNIQUE
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS td_acoes_aplicacao (
+            id_acao INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome_acao TEXT UNIQUE
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS td_unidades (
+            cnuc TEXT PRIMARY KEY,
+            nome_unidade TEXT,
+            gr TEXT,
+            categoria_uc TEXT,
+            bioma TEXT,
+            uf TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tf_cadastros_iniciativas (
+            "DEMANDANTE" TEXT,
+            "Nome da Proposta/Iniciativa Estruturante" TEXT,
+            "Unidade de Conservação" TEXT,
+            "Observações" TEXT,
+            "VALOR TOTAL ALOCADO" REAL,
+            "Valor da Iniciativa (R$)" REAL,
+            "Valor Total da Iniciativa" REAL,
+            "SALDO" REAL,
+            "Nº SEI" INTEGER,
+            "AÇÃO DE APLICAÇÃO" TEXT,
+            "CATEGORIA UC" TEXT,
+            "CNUC" TEXT,
+            "GR" TEXT,
+            "BIOMA" TEXT,
+            "UF" TEXT,
+            id_demandante INTEGER,
+            id_iniciativa INTEGER,
+            id_acao INTEGER
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tf_totais_consulta (
+            dimensao TEXT NOT NULL,
+            demandante TEXT NOT NULL,
+            grupo TEXT NOT NULL,
+            total_iniciativas INTEGER,
+            total_ucs INTEGER,
+            valor_total_alocado REAL,
+            valor_total_iniciativa REAL,
+            saldo REAL,
+            percentual_alocado REAL,
+            PRIMARY KEY (dimensao, demandante, grupo)
+        )
+    """)
+
+    # Resumos SEI (colunas da planilha padronizadas por ler_resumos_sei)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS td_dados_resumos_sei (
+            "diretoria" TEXT,
+            "coordenação_geral" TEXT,
+            "coordenação" TEXT,
+            "demandante" TEXT,
+            "id_resumo" INTEGER,
+            "iniciativa" TEXT,
+            "introdução" TEXT,
+            "justificativa" TEXT,
+            "objetivo_geral" TEXT,
+            "unidades_de_conservação_beneficiadas" TEXT,
+            "metodologia" TEXT
+        )
+    """)
+
+    # Distribuição das elegíveis (até o passo 9, as colunas de cada processo
+    # SAMGe eram acrescentadas pelo ETL, conforme a matriz carregada)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tf_distribuicao_elegiveis (
+            id INTEGER PRIMARY KEY,
+            "DEMANDANTE (diretoria)" TEXT,
+            "Nome da Proposta/Iniciativa Estruturante" TEXT,
+            "AÇÃO DE APLICAÇÃO" TEXT,
+            "Unidade de Conservação" TEXT,
+            "CNUC" TEXT,
+            "TetoSaldo disponível" REAL,
+            "TetoPrevisto 2025" REAL,
+            "TetoPrevisto 2026" REAL,
+            "TetoPrevisto 2027" REAL,
+            "TetoTotalDisponivel" REAL,
+            "A Distribuir" REAL,
+            id_demandante INTEGER,
+            id_iniciativa INTEGER,
+            id_acao INTEGER
+        )
+    """)
+
+    # Insumos
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS td_insumos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            elemento_despesa TEXT NOT NULL,
+            especificacao_padrao TEXT,
+            descricao_insumo TEXT,
+            especificacao_tecnica TEXT,
+            preco_referencia REAL,
+            data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # SAMGe: Macroprocessos, Processos, Ações de Manejo, Atividades
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS td_samge_macroprocessos (
+            id_m INTEGER,
+            nome TEXT,
+            descricao TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS td_samge_processos (
+            id_p INTEGER,
+            nome TEXT,
+            descricao TEXT,
+            explicacao TEXT,
+            macroprocesso_id INTEGER
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS td_samge_acoes_manejo (
+            id_ac INTEGER,
+            nome TEXT,
+            descricao TEXT,
+            explicacao TEXT,
+            entrega TEXT,
+            processo_id INTEGER
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS td_samge_atividades (
+            id_at INTEGER,
+            nome TEXT,
+            descricao TEXT,
+            explicacao TEXT,
+            subentrega TEXT,
+            acao_manejo_id INTEGER
+        )
+    """)
+
+    # Regras de negócio
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tf_cadastro_regras_negocio (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            id_iniciativa INTEGER NOT NULL,
+            usuario TEXT NOT NULL,
+            data_hora TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+            objetivo_geral TEXT NOT NULL,            -- Texto simples
+            objetivos_especificos TEXT NOT NULL,     -- JSON (lista de strings)
+            introducao TEXT NOT NULL,
+            justificativa TEXT NOT NULL,
+            metodologia TEXT NOT NULL,
+            demais_informacoes TEXT,                 -- JSON (dict)
+            eixos_tematicos TEXT NOT NULL,           -- JSON (lista de dicts)
+            acoes_manejo TEXT NOT NULL,              -- JSON (dict com ações)
+            insumos TEXT NOT NULL,                   -- JSON (dict ou lista com insumos)
+            regra TEXT NOT NULL,                     -- JSON consolidado (opcional)
+            distribuicao_ucs TEXT,                   -- JSON (DataFrame ou lista)
+            formas_contratacao TEXT,                 -- JSON (dict com detalhes)
+
+            FOREIGN KEY (id_iniciativa) REFERENCES td_iniciativas(id_iniciativa)
+        )
+    """)
+
+
+def _adicionar_coluna(conn, tabela: str, coluna: str, definicao: str):
+    """ALTER TABLE ADD COLUMN, se a coluna ainda não existir (bancos anteriores às migrações)."""
+    colunas = {col[1] for col in conn.execute(f"PRAGMA table_info({tabela})")}
+    if coluna not in colunas:
+        conn.execute(f'ALTER TABLE {tabela} ADD COLUMN "{coluna}" {definicao}')
+
+
+def _colunas_controle_insumos(conn):
+    _adicionar_coluna(conn, "td_insumos", "origem", "TEXT DEFAULT 'base_funbio'")
+    _adicionar_coluna(conn, "td_insumos", "situacao", "TEXT DEFAULT 'ativo'")
+    _adicionar_coluna(conn, "td_insumos", "registrado_por", "TEXT DEFAULT 'admin'")
+
+
+def _indices_consultas(conn):
+    # Distribuição de recursos do Cadastro (filtra pela iniciativa selecionada)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_distribuicao_elegiveis_iniciativa ON tf_distribuicao_elegiveis (id_iniciativa)")
+    # Ações de manejo de cada eixo (processo)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_samge_acoes_manejo_processo ON td_samge_acoes_manejo (processo_id)")
+    # Listagens e filtros da Gestão de Insumos
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_insumos_situacao_elemento_especificacao
+        ON td_insumos (situacao, elemento_despesa, especificacao_padrao)
+    """)
+    # Iniciativas do setor do usuário
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_cadastros_iniciativas_demandante ON tf_cadastros_iniciativas (id_demandante)")
+    # Resumo SEI da iniciativa
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_resumos_sei_id_resumo ON td_dados_resumos_sei (id_resumo)")
+
+
+def _preencher_chaves(conn, tabela: str, colunas: list, filtro: str = "1 = 1", normalizar: bool = False):
+    """Calcula a chave das linhas já carregadas, na ordem em que foram inseridas."""
+    lista_colunas = ", ".join(f'"{col}"' for col in colunas)
+    df = pd.read_sql_query(
+        f"SELECT rowid AS linha, {lista_colunas} FROM {tabela} WHERE {filtro} ORDER BY rowid", conn
+    )
+    if df.empty:
+        return
+    df["chave"] = calcular_chaves(df, colunas, normalizar)
+    conn.executemany(
+        f"UPDATE {tabela} SET chave = ? WHERE rowid = ?",
+        zip(df["chave"], df["linha"].astype(int).tolist()),
+    )
+
+
+def _chaves_sincronizacao(conn):
+    # Dimensões: a chave é o próprio nome (UNIQUE); as linhas só ganham exclusão lógica
+    for tabela in ["td_demandantes", "td_iniciativas", "td_acoes_aplicacao", "td_unidades"]:
+        _adicionar_coluna(conn, tabela, "ativo", "INTEGER NOT NULL DEFAULT 1")
+
+    _adicionar_coluna(conn, "tf_cadastros_iniciativas", "chave", "TEXT")
+    _adicionar_coluna(conn, "tf_cadastros_iniciativas", "ativo", "INTEGER NOT NULL DEFAULT 1")
+    _preencher_chaves(conn, "tf_cadastros_iniciativas", CHAVE_CADASTROS_INICIATIVAS)
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_cadastros_iniciativas_chave ON tf_cadastros_iniciativas (chave)")
+
+    # Insumos: só os vindos da planilha têm chave (os cadastrados na aplicação ficam com NULL)
+    _adicionar_coluna(conn, "td_insumos", "chave", "TEXT")
+    _preencher_chaves(conn, "td_insumos", CHAVE_INSUMOS, "origem = 'base_funbio'")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_insumos_chave ON td_insumos (chave)")
+
+
+def _recriar_tabela(conn, tabela: str, ddl: str, colunas: list):
+    """
+    Recria `tabela` com um novo DDL (o SQLite não altera chaves com ALTER TABLE),
+    copiando as linhas existentes; linhas com chave repetida ficam só com a primeira.
+    """
+    nova = f"{tabela}_nova"
+    conn.execute(f"DROP TABLE IF EXISTS {nova}")
+    conn.execute(ddl.format(tabela=nova))
+    lista_colunas = ", ".join(f'"{col}"' for col in colunas)
+    conn.execute(f"INSERT OR IGNORE INTO {nova} ({lista_colunas}) SELECT {lista_colunas} FROM {tabela} ORDER BY rowid")
+    conn.execute(f"DROP TABLE {tabela}")
+    conn.execute(f"ALTER TABLE {nova} RENAME TO {tabela}")
+
+
+def _chaves_samge_resumos(conn):
+    _recriar_tabela(conn, "td_samge_macroprocessos", """
+        CREATE TABLE {tabela} (
+            id_m INTEGER PRIMARY KEY,
+            nome TEXT NOT NULL,
+            descricao TEXT
+        )
+    """, ["id_m", "nome", "descricao"])
+    _recriar_tabela(conn, "td_samge_processos", """
+        CREATE TABLE {tabela} (
+            id_p INTEGER PRIMARY KEY,
+            nome TEXT NOT NULL,
+            descricao TEXT,
+            explicacao TEXT,
+            macroprocesso_id INTEGER NOT NULL,
+            FOREIGN KEY (macroprocesso_id) REFERENCES td_samge_macroprocessos(id_m)
+        )
+    """, ["id_p", "nome", "descricao", "explicacao", "macroprocesso_id"])
+    _recriar_tabela(conn, "td_samge_acoes_manejo", """
+        CREATE TABLE {tabela} (
+            id_ac INTEGER PRIMARY KEY,
+            nome TEXT NOT NULL,
+            descricao TEXT,
+            explicacao TEXT,
+            entrega TEXT,
+            processo_id INTEGER NOT NULL,
+            FOREIGN KEY (processo_id) REFERENCES td_samge_processos(id_p)
+        )
+    """, ["id_ac", "nome", "descricao", "explicacao", "entrega", "processo_id"])
+    _recriar_tabela(conn, "td_samge_atividades", """
+        CREATE TABLE {tabela} (
+            id_at INTEGER PRIMARY KEY,
+            nome TEXT NOT NULL,
+            descricao TEXT,
+            explicacao TEXT,
+            subentrega TEXT,
+            acao_manejo_id INTEGER NOT NULL,
+            FOREIGN KEY (acao_manejo_id) REFERENCES td_samge_acoes_manejo(id_ac)
+        )
+    """, ["id_at", "nome", "descricao", "explicacao", "subentrega", "acao_manejo_id"])
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_samge_acoes_manejo_processo ON td_samge_acoes_manejo (processo_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_samge_atividades_acao ON td_samge_atividades (acao_manejo_id)")
+
+    # id_resumo passa a ser a chave primária (dispensa o índice criado no passo 4)
+    colunas_resumos = [
+        "diretoria", "coordenação_geral", "coordenação", "demandante", "id_resumo", "iniciativa",
+        "introdução", "justificativa", "objetivo_geral", "unidades_de_conservação_beneficiadas", "metodologia",
+    ]
+    _recriar_tabela(conn, "td_dados_resumos_sei", """
+        CREATE TABLE {tabela} (
+            "diretoria" TEXT,
+            "coordenação_geral" TEXT,
+            "coordenação" TEXT,
+            "demandante" TEXT,
+            "id_resumo" INTEGER PRIMARY KEY,
+            "iniciativa" TEXT,
+            "introdução" TEXT,
+            "justificativa" TEXT,
+            "objetivo_geral" TEXT,
+            "unidades_de_conservação_beneficiadas" TEXT,
+            "metodologia" TEXT
+        )
+    """, colunas_resumos)
+
+
+def _nomes_normalizados(conn):
+    for tabela, id_col, name_col in [
+        ("td_demandantes", "id_demandante", "nome_demandante"),
+        ("td_iniciativas", "id_iniciativa", "nome_iniciativa"),
+        ("td_acoes_aplicacao", "id_acao", "nome_acao"),
+    ]:
+        _adicionar_coluna(conn, tabela, "nome_normalizado", "TEXT")
+        nomes = conn.execute(f"SELECT {id_col}, {name_col} FROM {tabela}").fetchall()
+        conn.executemany(
+            f"UPDATE {tabela} SET nome_normalizado = ? WHERE {id_col} = ?",
+            [(normalizar_nome(nome), id_) for id_, nome in nomes],
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabela}_nome_normalizado ON {tabela} (nome_normalizado)")
+
+
+def _colunas_processos_elegiveis(conn) -> list[str]:
+    """Colunas de tf_distribuicao_elegiveis com o valor distribuído a cada processo (eixo)."""
+    return [
+        col[1] for col in conn.execute("PRAGMA table_info(tf_distribuicao_elegiveis)")
+        if col[1] not in COLUNAS_ELEGIVEIS
+    ]
+
+
+def _saldo_a_distribuir(processos: list[str]) -> str:
+    """Expressão SQL do saldo: teto total menos o distribuído aos `processos`."""
+    distribuido = " + ".join(f'COALESCE("{col}", 0)' for col in processos) or "0"
+    return f'ROUND("TetoTotalDisponivel" - ({distribuido}), 2)'
+
+
+def _gatilhos_colunas_processos(conn):
+    """
+    Gatilhos do passo 8: mantêm "A Distribuir" = TetoTotalDisponivel menos o
+    total das colunas de processo, a cada INSERT ou UPDATE de um teto ou de um
+    valor distribuído. Substituídos no passo 9 pelos de tf_alocacao_uc_eixo.
+    """
+    processos = _colunas_processos_elegiveis(conn)
+    atualizar_saldo = f"""
+        UPDATE tf_distribuicao_elegiveis
+        SET "A Distribuir" = {_saldo_a_distribuir(processos)}
+        WHERE id = NEW.id;
+    """
+    colunas_gatilho = ", ".join(f'"{col}"' for col in TETOS_ELEGIVEIS + processos)
+
+    conn.execute("DROP TRIGGER IF EXISTS trg_elegiveis_a_distribuir_insert")
+    conn.execute("DROP TRIGGER IF EXISTS trg_elegiveis_a_distribuir_update")
+    conn.execute(f"""
+        CREATE TRIGGER trg_elegiveis_a_distribuir_insert
+        AFTER INSERT ON tf_distribuicao_elegiveis
+        BEGIN {atualizar_saldo} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_elegiveis_a_distribuir_update
+        AFTER UPDATE OF {colunas_gatilho} ON tf_distribuicao_elegiveis
+        BEGIN {atualizar_saldo} END
+    """)
+
+
+def _recriar_elegiveis(conn, processos: list[str], copiadas: list[str]):
+    """Recria tf_distribuicao_elegiveis com TetoTotalDisponivel gerado e as colunas de `processos`."""
+    colunas_processos = "".join(f',\n            "{col}" REAL DEFAULT 0.00' for col in processos)
+    teto_total = " + ".join(f'COALESCE("{col}", 0)' for col in TETOS_ELEGIVEIS)
+    _recriar_tabela(conn, "tf_distribuicao_elegiveis", f"""
+        CREATE TABLE {{tabela}} (
+            id INTEGER PRIMARY KEY,
+            "DEMANDANTE (diretoria)" TEXT,
+            "Nome da Proposta/Iniciativa Estruturante" TEXT,
+            "AÇÃO DE APLICAÇÃO" TEXT,
+            "Unidade de Conservação" TEXT,
+            "CNUC" TEXT,
+            "TetoSaldo disponível" REAL,
+            "TetoPrevisto 2025" REAL,
+            "TetoPrevisto 2026" REAL,
+            "TetoPrevisto 2027" REAL,
+            "TetoTotalDisponivel" REAL GENERATED ALWAYS AS (ROUND({teto_total}, 2)) STORED,
+            "A Distribuir" REAL,
+            id_demandante INTEGER,
+            id_iniciativa INTEGER,
+            id_acao INTEGER{colunas_processos}
+        )
+    """, copiadas)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_distribuicao_elegiveis_iniciativa ON tf_distribuicao_elegiveis (id_iniciativa)")
+
+
+def _teto_gerado_elegiveis(conn):
+    # Coluna gerada STORED não pode ser acrescentada com ALTER TABLE: a tabela
+    # é recriada, levando junto as colunas de processo que o ETL já criou
+    processos = _colunas_processos_elegiveis(conn)
+    copiadas = [col for col in COLUNAS_ELEGIVEIS if col != "TetoTotalDisponivel"] + processos
+    _recriar_elegiveis(conn, processos, copiadas)
+
+    # Saldos já gravados passam a seguir a mesma regra dos gatilhos
+    conn.execute(f'UPDATE tf_distribuicao_elegiveis SET "A Distribuir" = {_saldo_a_distribuir(processos)}')
+    _gatilhos_colunas_processos(conn)
+
+
+
+# Saldo de cada linha das elegíveis: teto total menos o alocado aos eixos
+# (a soma usa a chave primária de tf_alocacao_uc_eixo)
+SALDO_A_DISTRIBUIR = """
+    UPDATE tf_distribuicao_elegiveis
+    SET "A Distribuir" = ROUND("TetoTotalDisponivel" - COALESCE((
+        SELECT SUM(a.valor)
+        FROM tf_alocacao_uc_eixo a
+        WHERE a.id_distribuicao = tf_distribuicao_elegiveis.id
+    ), 0), 2)
+"""
+
+
+def _alocacao_uc_eixo(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tf_alocacao_uc_eixo (
+            id_distribuicao INTEGER NOT NULL,
+            id_p INTEGER NOT NULL,
+            valor REAL NOT NULL DEFAULT 0.00,
+            PRIMARY KEY (id_distribuicao, id_p),
+            FOREIGN KEY (id_distribuicao) REFERENCES tf_distribuicao_elegiveis(id),
+            FOREIGN KEY (id_p) REFERENCES td_samge_processos(id_p)
+        ) WITHOUT ROWID
+    """)
+    # Totais por eixo (a chave primária já atende às consultas por linha)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_alocacao_uc_eixo_processo ON tf_alocacao_uc_eixo (id_p)")
+
+    # Valores já distribuídos nas colunas de processo (só os diferentes de zero)
+    processos = _colunas_processos_elegiveis(conn)
+    for processo in processos:
+        conn.execute(f"""
+            INSERT OR IGNORE INTO tf_alocacao_uc_eixo (id_distribuicao, id_p, valor)
+            SELECT e.id, p.id_p, e."{processo}"
+            FROM tf_distribuicao_elegiveis e
+            JOIN (SELECT MIN(id_p) AS id_p FROM td_samge_processos WHERE nome = ?) p ON p.id_p IS NOT NULL
+            WHERE COALESCE(e."{processo}", 0) <> 0
+        """, (processo,))
+
+    # Sem as colunas de processo, a tabela não muda de forma quando o SAMGe muda
+    conn.execute("DROP TRIGGER IF EXISTS trg_elegiveis_a_distribuir_insert")
+    conn.execute("DROP TRIGGER IF EXISTS trg_elegiveis_a_distribuir_update")
+    _recriar_elegiveis(conn, [], [col for col in COLUNAS_ELEGIVEIS if col != "TetoTotalDisponivel"])
+    conn.execute(SALDO_A_DISTRIBUIR)
+
+    # "A Distribuir" acompanha os tetos da linha e as alocações dos seus eixos
+    colunas_tetos = ", ".join(f'"{col}"' for col in TETOS_ELEGIVEIS)
+    for nome, evento, tabela, linhas in [
+        ("trg_elegiveis_a_distribuir_insert", "INSERT", "tf_distribuicao_elegiveis", "NEW.id"),
+        ("trg_elegiveis_a_distribuir_update", f"UPDATE OF {colunas_tetos}", "tf_distribuicao_elegiveis", "NEW.id"),
+        ("trg_alocacao_a_distribuir_insert", "INSERT", "tf_alocacao_uc_eixo", "NEW.id_distribuicao"),
+        ("trg_alocacao_a_distribuir_update", "UPDATE", "tf_alocacao_uc_eixo", "OLD.id_distribuicao, NEW.id_distribuicao"),
+        ("trg_alocacao_a_distribuir_delete", "DELETE", "tf_alocacao_uc_eixo", "OLD.id_distribuicao"),
+    ]:
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {nome}
+            AFTER {evento} ON {tabela}
+            BEGIN {SALDO_A_DISTRIBUIR} WHERE id IN ({linhas}); END
+        """)
+
+
+
+def _execucoes_etl(conn):
+    # Uma linha por etapa de cada execução do ETL (init_db.executar_etl)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS etl_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            execucao INTEGER NOT NULL,
+            etapa TEXT NOT NULL,
+            situacao TEXT NOT NULL,              -- 'carregada', 'ignorada' ou 'erro'
+            incremental INTEGER NOT NULL DEFAULT 0,
+            iniciada_em TIMESTAMP,
+            segundos_leitura REAL,
+            segundos_carga REAL,
+            segundos_total REAL,
+            linhas_lidas INTEGER,
+            linhas_carregadas INTEGER,
+            bytes_lidos INTEGER,
+            leitura_em_cache INTEGER,
+            erro TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_etl_runs_execucao ON etl_runs (execucao)")
+
+
+# Tabelas da aplicação cujas gravações avançam o contador de versao_tabelas
+# (as consultas em cache incluem as versões das tabelas que leem na chave)
+TABELAS_VERSIONADAS = [
+    "td_acoes_aplicacao",
+    "td_dados_base_iniciativas",
+    "td_dados_resumos_sei",
+    "td_demandantes",
+    "td_iniciativas",
+    "td_insumos",
+    "td_samge_acoes_manejo",
+    "td_samge_atividades",
+    "td_samge_macroprocessos",
+    "td_samge_processos",
+    "td_unidades",
+    "tf_alocacao_uc_eixo",
+    "tf_cadastro_regras_negocio",
+    "tf_cadastros_iniciativas",
+    "tf_distribuicao_elegiveis",
+    "tf_regra_acao",
+    "tf_regra_atual",
+    "tf_regra_eixo",
+    "tf_regra_insumo",
+    "tf_totais_consulta",
+    "tf_usuarios",
+]
+
+
+def _versao_tabelas(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS versao_tabelas (
+            tabela TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    conn.executemany(
+        "INSERT OR IGNORE INTO versao_tabelas (tabela, versao) VALUES (?, 0)",
+        [(tabela,) for tabela in TABELAS_VERSIONADAS],
+    )
+    # Toda gravação avança a versão da tabela, venha ela da aplicação, do ETL
+    # ou da linha de comando, na mesma transação da gravação
+    for tabela in TABELAS_VERSIONADAS:
+        for evento in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_versao_{tabela}_{evento.lower()}
+                AFTER {evento} ON {tabela}
+                BEGIN UPDATE versao_tabelas SET versao = versao + 1 WHERE tabela = '{tabela}'; END
+            """)
+
+
+def _identidade_banco(conn):
+    # Identifica o banco no cache entre processos (hooks/cache.py): um banco
+    # construído do zero recomeça os contadores de versão, mas não o id. A
+    # reconstrução copia o banco em uso e mantém o id, e as versões só avançam
+    conn.execute("CREATE TABLE IF NOT EXISTS identidade_banco (id TEXT NOT NULL)")
+    conn.execute("""
+        INSERT INTO identidade_banco (id)
+        SELECT lower(hex(randomblob(16))) WHERE NOT EXISTS (SELECT 1 FROM identidade_banco)
+    """)
+
+
+@contextmanager
+def _versao_uma_vez(conn, tabela: str):
+    """
+    Passo que regrava todas as linhas de `tabela`: o gatilho de versão de
+    UPDATE (passo 11) fica fora durante o passo e a versão avança uma única
+    vez no fim. Tudo dentro do SAVEPOINT do passo.
+    """
+    gatilho = f"trg_versao_{tabela}_update"
+    definicao = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (gatilho,)
+    ).fetchone()
+    if definicao is not None:
+        conn.execute(f"DROP TRIGGER {gatilho}")
+    yield
+    if definicao is not None:
+        conn.execute(definicao[0])
+        conn.execute("UPDATE versao_tabelas SET versao = versao + 1 WHERE tabela = ?", (tabela,))
+
+
+def _chaves_elegiveis(conn):
+    # As alocações (tf_alocacao_uc_eixo) apontam para os IDs das elegíveis: a
+    # carga passa a sincronizar as linhas pela chave, sem renumerar nem apagar.
+    # A chave usa os nomes normalizados: até aqui, a carga gravava o
+    # demandante, a iniciativa e a ação em minúsculas, e a planilha não
+    _adicionar_coluna(conn, "tf_distribuicao_elegiveis", "chave", "TEXT")
+    _adicionar_coluna(conn, "tf_distribuicao_elegiveis", "ativo", "INTEGER NOT NULL DEFAULT 1")
+    with _versao_uma_vez(conn, "tf_distribuicao_elegiveis"):
+        _preencher_chaves(conn, "tf_distribuicao_elegiveis", CHAVE_ELEGIVEIS, normalizar=True)
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_distribuicao_elegiveis_chave ON tf_distribuicao_elegiveis (chave)")
+
+
+def _versao_em_lote(conn):
+    # Cargas em lote (versao_em_lote, em hooks/sincronizacao.py) marcam a
+    # tabela em_lote: os gatilhos deixam de avançar a versão a cada linha e a
+    # carga a avança uma única vez no fim, na mesma transação
+    _adicionar_coluna(conn, "versao_tabelas", "em_lote", "INTEGER NOT NULL DEFAULT 0")
+    for tabela in TABELAS_VERSIONADAS:
+        for evento in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(f"DROP TRIGGER IF EXISTS trg_versao_{tabela}_{evento.lower()}")
+            conn.execute(f"""
+                CREATE TRIGGER trg_versao_{tabela}_{evento.lower()}
+                AFTER {evento} ON {tabela}
+                WHEN NOT (SELECT em_lote FROM versao_tabelas WHERE tabela = '{tabela}')
+                BEGIN UPDATE versao_tabelas SET versao = versao + 1 WHERE tabela = '{tabela}'; END
+            """)
+
+
+# (versão, descrição, passo). Só acrescente passos novos ao fim da lista.
+MIGRACOES = [
+    (1, "Esquema inicial das tabelas", _criar_esquema_inicial),
+    (2, "Colunas origem/situacao/registrado_por em td_insumos", _colunas_controle_insumos),
+    (3, "Tabelas filhas das regras e ponteiro da versão atual", normalizar_regras),
+    (4, "Índices das consultas frequentes", _indices_consultas),
+    (5, "Chaves de sincronização e exclusão lógica das tabelas de referência", _chaves_sincronizacao),
+    (6, "Chaves primárias das tabelas do SAMGe e dos resumos SEI", _chaves_samge_resumos),
+    (7, "Nomes normalizados nas dimensões (resolução de IDs das elegíveis)", _nomes_normalizados),
+    (8, "TetoTotalDisponivel gerado e gatilhos de \"A Distribuir\" nas elegíveis", _teto_gerado_elegiveis),
+    (9, "Alocações por UC e eixo em tf_alocacao_uc_eixo (formato longo)", _alocacao_uc_eixo),
+    (10, "Registro das execuções do ETL (etl_runs)", _execucoes_etl),
+    (11, "Contadores de versão por tabela (versao_tabelas)", _versao_tabelas),
+    (12, "Identidade do banco (cache entre processos)", _identidade_banco),
+    (13, "Chave de sincronização e exclusão lógica em tf_distribuicao_elegiveis", _chaves_elegiveis),
+    (14, "Versão avançada uma vez por carga em lote (versao_tabelas.em_lote)", _versao_em_lote),
+]
+
+VERSAO_ESQUEMA = MIGRACOES[-1][0]
+
+
+def versao_esquema(conn) -> int:
+    """Última versão aplicada ao banco (0 se nenhuma)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            versao INTEGER PRIMARY KEY,
+            descricao TEXT NOT NULL,
+            aplicada_em TIMESTAMP
+        )
+    """)
+    return conn.execute("SELECT COALESCE(MAX(versao), 0) FROM schema_version").fetchone()[0]
+
+
+def aplicar_migracoes(conn) -> list[int]:
+    """
+    Aplica, em ordem, os passos de MIGRACOES ainda não registrados em
+    schema_version, cada um atômico (SAVEPOINT). Pode rodar dentro de uma
+    transação já aberta (escritor) ou numa conexão avulsa (ETL).
+    Retorna as versões aplicadas.
+    """
+    if versao_esquema(conn) >= VERSAO_ESQUEMA:
+        return []
+
+    aplicadas = []
+    for versao, descricao, passo in MIGRACOES:
+        conn.execute("SAVEPOINT migracao")
+        try:
+            ja_aplicada = conn.execute(
+                "SELECT 1 FROM schema_version WHERE versao = ?", (versao,)
+            ).fetchone()
+            if ja_aplicada is None:
+                passo(conn)
+                conn.execute(
+                    "INSERT INTO schema_version (versao, descricao, aplicada_em) VALUES (?, ?, ?)",
+                    (versao, descricao, datetime.now().isoformat(timespec="seconds")),
+                )
+                aplicadas.append(versao)
+            conn.execute("RELEASE migracao")
+        except Exception:
+            conn.execute("ROLLBACK TO migracao")
+            conn.execute("RELEASE migracao")
+            raise
+
+    if aplicadas:
+        print(f"✅ Migrações aplicadas: {aplicadas}")
+    return aplicadas
+
+
+@st.cache_resource(show_spinner=False)
+def preparar_banco(db_path: str = DB_PATH) -> list[int]:
+    """Aplica as migrações pendentes (uma vez por processo) pela thread escritora."""
+    return executar_escrita(aplicar_migracoes).result()
@@ -0,0 +1,274 @@
+# ---------------------------------------------------------
+# arquivo: hooks/reconstrucao.py
+# ---------------------------------------------------------
+# "Recriar Banco de Dados" sem tirar o banco do ar.
+#
+# 1. Prévia (em segundo plano, sem travar a página do admin): o banco em uso
+#    é copiado pela API de backup do SQLite para `<banco>.nova-<id>`, as
+#    versões de versao_tabelas no momento da cópia são guardadas, o ETL roda
+#    na cópia, que é validada (verificar_banco), e as duas versões são
+#    comparadas tabela a tabela.
+# 2. Publicação (após a confirmação): o escritor do banco, com as demais
+#    escritas do processo esperando na fila, confere se as planilhas e as
+#    versões de versao_tabelas do banco em uso são as mesmas da prévia. Se
+#    alguma gravação (deste ou de outro processo) entrou desde a cópia, a
+#    publicação é recusada, para não sobrescrevê-la, e a prévia precisa ser
+#    gerada de novo. Senão, a cópia já validada é copiada PARA DENTRO do banco
+#    em uso, também pela API de backup. Por fim, avança a geração do banco
+#    (hooks/conexao.py), para que as conexões do pool sejam renovadas, e
+#    remove os snapshots colunares que o banco publicado não usa mais.
+# 3. Descarte: a cópia e os snapshots gerados só para ela são removidos.
+#
+# O arquivo do banco não é trocado com os.replace: em WAL, o -wal e o -shm do
+# banco em uso continuam associados ao nome e seriam aplicados sobre o arquivo
+# novo. A cópia por backup é uma única transação de escrita: as leituras em
+# andamento continuam vendo o conteúdo antigo e as seguintes já veem o novo.
+# ---------------------------------------------------------
+import os
+import sqlite3
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+import streamlit as st
+
+from hooks.conexao import DB_PATH, abrir_conexao, avancar_geracao
+from hooks.escrita import executar_exclusivo
+from hooks.snapshots import remover_snapshots_antigos, snapshots_registrados
+from hooks.trava import trava_arquivo
+from init_db import (
+    ETAPAS,
+    FONTES,
+    calcular_sha256,
+    gravar_marca_pronto,
+    init_database,
+    verificar_banco,
+)
+
+# Tempo máximo (segundos) que a publicação espera na fila do escritor
+TIMEOUT_PUBLICACAO = 300.0
+
+
+def remover_copia(destino: str) -> None:
+    """Remove a cópia preparada junto com os arquivos auxiliares do WAL."""
+    for sufixo in ("", "-wal", "-shm"):
+        if os.path.exists(destino + sufixo):
+            os.remove(destino + sufixo)
+
+
+def descartar_copia(db_path: str, destino: str) -> None:
+    """Remove a cópia e os snapshots gravados só para ela (os do banco em uso ficam)."""
+    if os.path.exists(destino):
+        for arquivo in snapshots_registrados(destino) - snapshots_registrados(db_path):
+            if os.path.exists(arquivo):
+                os.remove(arquivo)
+    remover_copia(destino)
+
+
+def versoes_tabelas(conn: sqlite3.Connection) -> dict:
+    """{tabela: versão} de versao_tabelas."""
+    return dict(conn.execute("SELECT tabela, versao FROM versao_tabelas").fetchall())
+
+
+def construir_copia(db_path: str, destino: str, incremental: bool) -> tuple[list[dict], list[str], dict]:
+    """
+    Copia o banco em uso para `destino`, roda o ETL na cópia e a valida.
+    Retorna os registros de etl_runs, os problemas encontrados (vazio se ok)
+    e as versões de versao_tabelas do banco em uso no momento da cópia.
+    """
+    remover_copia(destino)
+    origem = abrir_conexao(db_path)
+    copia = sqlite3.connect(destino)
+    try:
+        origem.backup(copia)
+        # Lidas da cópia: são exatamente as do conteúdo copiado
+        versoes = versoes_tabelas(copia)
+    finally:
+        copia.close()
+        origem.close()
+
+    # Os snapshots da cópia vão para o mesmo diretório; os do banco em uso ficam.
+    # Os usuários já vieram do banco em uso.
+    registros = init_database(
+        incremental, etapas=list(ETAPAS), db_path=destino, criar_usuarios=False, podar_snapshots=False
+    )
+    problemas = [
+        f"Etapa '{registro['etapa']}' falhou: {registro['erro']}"
+        for registro in registros if registro["situacao"] == "erro"
+    ]
+    return registros, problemas + verificar_banco(destino), versoes
+
+
+def comparar_bancos(atual: str, novo: str) -> pd.DataFrame:
+    """
+    Linhas por tabela no banco em uso e na cópia. Quando a tabela tem as mesmas
+    colunas nos dois, conta também as linhas que só existem em um deles
+    (uma linha alterada aparece nas duas contagens).
+    """
+    conn = sqlite3.connect(f"file:{novo}?mode=ro", uri=True)
+    try:
+        conn.execute("ATTACH DATABASE ? AS atual", (f"file:{atual}?mode=ro",))
+        listar = "SELECT name FROM {}.sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        tabelas_novas = {row[0] for row in conn.execute(listar.format("main"))}
+        tabelas_atuais = {row[0] for row in conn.execute(listar.format("atual"))}
+
+        linhas = []
+        for tabela in sorted(tabelas_novas | tabelas_atuais):
+            contar = 'SELECT COUNT(*) FROM {}."{}"'
+            antes = conn.execute(contar.format("atual", tabela)).fetchone()[0] if tabela in tabelas_atuais else 0
+            depois = conn.execute(contar.format("main", tabela)).fetchone()[0] if tabela in tabelas_novas else 0
+
+            incluidas = removidas = None
+            colunas_novas = [col[1] for col in conn.execute(f'PRAGMA main.table_xinfo("{tabela}")')]
+            colunas_atuais = [col[1] for col in conn.execute(f'PRAGMA atual.table_xinfo("{tabela}")')]
+            if colunas_novas == colunas_atuais:
+                exceto = 'SELECT COUNT(*) FROM (SELECT * FROM {}."{t}" EXCEPT SELECT * FROM {}."{t}")'
+                incluidas = conn.execute(exceto.format("main", "atual", t=tabela)).fetchone()[0]
+                removidas = conn.execute(exceto.format("atual", "main", t=tabela)).fetchone()[0]
+
+            linhas.append({
+                "Tabela": tabela,
+                "Linhas atuais": antes,
+                "Linhas novas": depois,
+                "Diferença": depois - antes,
+                "Incluídas/alteradas": incluidas,
+                "Removidas/alteradas": removidas,
+            })
+    finally:
+        conn.close()
+
+    comparacao = pd.DataFrame(linhas)
+    for col in ["Incluídas/alteradas", "Removidas/alteradas"]:
+        comparacao[col] = comparacao[col].astype("Int64")
+    return comparacao
+
+
+def _shas_fontes() -> dict:
+    return {fonte: calcular_sha256(caminho) for fonte, caminho in FONTES.items() if os.path.exists(caminho)}
+
+
+def preparar_reconstrucao(incremental: bool = True, db_path: str = DB_PATH) -> dict:
+    """
+    Prévia da reconstrução: constrói e valida a cópia e a compara com o banco
+    em uso. O banco em uso não é alterado.
+    """
+    shas = _shas_fontes()
+    destino = f"{db_path}.nova-{uuid.uuid4().hex[:8]}"
+    try:
+        registros, problemas, versoes = construir_copia(db_path, destino, incremental)
+    except Exception:
+        descartar_copia(db_path, destino)
+        raise
+    return {
+        "db_path": db_path,
+        "destino": destino,
+        "incremental": incremental,
+        "shas": shas,
+        "versoes": versoes,
+        "registros": registros,
+        "problemas": problemas,
+        "comparacao": comparar_bancos(db_path, destino) if not problemas else None,
+    }
+
+
+@st.cache_resource(show_spinner=False)
+def _executor() -> ThreadPoolExecutor:
+    """Uma prévia por vez no processo, fora da thread do script."""
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="reconstrucao")
+
+
+def iniciar_reconstrucao(incremental: bool = True, db_path: str = DB_PATH) -> Future:
+    """Dispara a prévia em segundo plano; o Future retorna o dict de preparar_reconstrucao."""
+    return _executor().submit(preparar_reconstrucao, incremental, db_path)
+
+
+def _publicar(conn: sqlite3.Connection, preparo: dict) -> int:
+    """Comando exclusivo do escritor: confere e publica a cópia validada (ver cabeçalho)."""
+    db_path, destino = preparo["db_path"], preparo["destino"]
+    with trava_arquivo(f"{db_path}.lock"):
+        shas = _shas_fontes()
+        if shas != preparo["shas"]:
+            raise RuntimeError("As planilhas de dados/ mudaram desde a prévia. Gere a prévia novamente.")
+
+        versoes = versoes_tabelas(conn)
+        alteradas = sorted(
+            tabela for tabela in versoes.keys() | preparo["versoes"].keys()
+            if versoes.get(tabela) != preparo["versoes"].get(tabela)
+        )
+        if alteradas:
+            raise RuntimeError(
+                f"O banco em uso foi alterado desde a prévia ({', '.join(alteradas)}). "
+                "Gere a prévia novamente."
+            )
+
+        copia = sqlite3.connect(destino)
+        try:
+            copia.backup(conn)
+        finally:
+            copia.close()
+        geracao = avancar_geracao(db_path)
+        gravar_marca_pronto(db_path, shas)
+        remover_snapshots_antigos(conn)
+    remover_copia(destino)
+    return geracao
+
+
+def publicar_reconstrucao(preparo: dict) -> int:
+    """Publica a reconstrução preparada no banco em uso. Retorna a nova geração do banco."""
+    return executar_exclusivo(_publicar, preparo).result(timeout=TIMEOUT_PUBLICACAO)
+
+
+def painel_reconstrucao() -> None:
+    """
+    Controles do admin para recriar o banco: gerar a prévia, acompanhar,
+    conferir a comparação e confirmar ou descartar.
+    """
+    futuro = st.session_state.get("reconstrucao")
+
+    if futuro is None:
+        completa = st.checkbox("Reler todas as planilhas", value=False, key="reconstrucao_completa")
+        if st.button("🔄 Recriar Banco de Dados"):
+            st.session_state["reconstrucao"] = iniciar_reconstrucao(incremental=not completa)
+            st.rerun()
+        return
+
+    if not futuro.done():
+        st.info("⏳ Preparando o novo banco em segundo plano. O banco atual continua em uso.")
+        if st.button("🔁 Atualizar situação"):
+            st.rerun()
+        return
+
+    try:
+        preparo = futuro.result()
+    except Exception as e:
+        st.error(f"Erro ao preparar o banco: {e}")
+        if st.button("OK"):
+            del st.session_state["reconstrucao"]
+            st.rerun()
+        return
+
+    if preparo["problemas"]:
+        st.error("O novo banco não passou na validação:")
+        for problema in preparo["problemas"]:
+            st.write(f"❌ {problema}")
+    else:
+        st.write("📋 Comparação com o banco atual:")
+        st.dataframe(preparo["comparacao"], hide_index=True)
+
+    confirmar = st.button("✅ Publicar novo banco", disabled=bool(preparo["problemas"]))
+    descartar = st.button("✖ Descartar")
+    if confirmar:
+        try:
+            with st.spinner("Publicando o novo banco..."):
+                publicar_reconstrucao(preparo)
+            # Não é preciso limpar o cache: as tabelas alteradas mudaram de
+            # versão e as consultas delas mudam de chave (hooks/cache.py)
+            del st.session_state["reconstrucao"]
+            st.success("Banco de dados recriado com sucesso!")
+            st.rerun()
+        except Exception as e:
+            st.error(f"Erro ao recriar o banco: {e}")
+    elif descartar:
+        descartar_copia(preparo["db_path"], preparo["destino"])
+        del st.session_state["reconstrucao"]
+        st.rerun()
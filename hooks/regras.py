@@ -0,0 +1,160 @@
+# ---------------------------------------------------------
+# arquivo: hooks/regras.py
+# ---------------------------------------------------------
+# Tabelas filhas de tf_cadastro_regras_negocio.
+#
+# A árvore eixos -> ações de manejo -> insumos de cada versão da regra continua
+# gravada em JSON (eixos_tematicos), que é o que o Cadastro edita, e também é
+# gravada em forma relacional e indexada, na mesma transação:
+#   tf_regra_eixo    (id_regra, id_iniciativa, id_eixo, nome_eixo, ordem)
+#   tf_regra_acao    (id_regra, id_iniciativa, id_eixo, id_ac, ordem)
+#   tf_regra_insumo  (id_regra, id_iniciativa, id_eixo, id_ac, id_insumo, ordem)
+# Assim, perguntas como "quais iniciativas usam o insumo X" viram consultas
+# por índice em vez de varrer o JSON em Python.
+#
+# tf_regra_atual aponta, para cada iniciativa, a versão vigente da regra
+# (a última gravada). Buscar a regra atual de uma ou de todas as iniciativas
+# é uma leitura por chave primária, independente do tamanho do histórico.
+# ---------------------------------------------------------
+import json
+
+
+def criar_tabelas_regra(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tf_regra_eixo (
+            id_regra INTEGER NOT NULL,
+            id_iniciativa INTEGER NOT NULL,
+            id_eixo INTEGER NOT NULL,
+            nome_eixo TEXT,
+            ordem INTEGER NOT NULL,
+            PRIMARY KEY (id_regra, id_eixo),
+            FOREIGN KEY (id_regra) REFERENCES tf_cadastro_regras_negocio(id)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tf_regra_acao (
+            id_regra INTEGER NOT NULL,
+            id_iniciativa INTEGER NOT NULL,
+            id_eixo INTEGER NOT NULL,
+            id_ac INTEGER NOT NULL,
+            ordem INTEGER NOT NULL,
+            PRIMARY KEY (id_regra, id_eixo, id_ac),
+            FOREIGN KEY (id_regra) REFERENCES tf_cadastro_regras_negocio(id),
+            FOREIGN KEY (id_ac) REFERENCES td_samge_acoes_manejo(id_ac)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tf_regra_insumo (
+            id_regra INTEGER NOT NULL,
+            id_iniciativa INTEGER NOT NULL,
+            id_eixo INTEGER NOT NULL,
+            id_ac INTEGER NOT NULL,
+            id_insumo INTEGER NOT NULL,
+            ordem INTEGER NOT NULL,
+            PRIMARY KEY (id_regra, id_eixo, id_ac, id_insumo),
+            FOREIGN KEY (id_regra) REFERENCES tf_cadastro_regras_negocio(id),
+            FOREIGN KEY (id_insumo) REFERENCES td_insumos(id)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tf_regra_atual (
+            id_iniciativa INTEGER PRIMARY KEY,
+            id_regra INTEGER NOT NULL UNIQUE,
+            FOREIGN KEY (id_iniciativa) REFERENCES td_iniciativas(id_iniciativa),
+            FOREIGN KEY (id_regra) REFERENCES tf_cadastro_regras_negocio(id)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_regras_negocio_iniciativa_data
+        ON tf_cadastro_regras_negocio (id_iniciativa, data_hora)
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_regra_eixo_iniciativa ON tf_regra_eixo (id_iniciativa)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_regra_acao_iniciativa ON tf_regra_acao (id_iniciativa)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_regra_acao_id_ac ON tf_regra_acao (id_ac)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_regra_insumo_iniciativa ON tf_regra_insumo (id_iniciativa)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_regra_insumo_id_insumo ON tf_regra_insumo (id_insumo)")
+
+
+def gravar_itens_regra(conn, id_regra: int, id_iniciativa: int, eixos_tematicos: list[dict]):
+    """
+    Grava a árvore de eixos/ações/insumos de uma versão da regra nas tabelas filhas.
+    Deve rodar na mesma transação que o INSERT em tf_cadastro_regras_negocio.
+    """
+    eixos, acoes, insumos = [], [], []
+    for ordem_eixo, eixo in enumerate(eixos_tematicos or []):
+        id_eixo = int(eixo["id_eixo"])
+        eixos.append((id_regra, id_iniciativa, id_eixo, eixo.get("nome_eixo"), ordem_eixo))
+        for ordem_acao, (id_ac, dados_acao) in enumerate((eixo.get("acoes_manejo") or {}).items()):
+            acoes.append((id_regra, id_iniciativa, id_eixo, id_ac, ordem_acao))
+            for ordem_insumo, id_insumo in enumerate((dados_acao or {}).get("insumos", [])):
+                insumos.append((id_regra, id_iniciativa, id_eixo, id_ac, int(id_insumo), ordem_insumo))
+
+    cursor = conn.cursor()
+    cursor.executemany("""
+        INSERT OR IGNORE INTO tf_regra_eixo (id_regra, id_iniciativa, id_eixo, nome_eixo, ordem)
+        VALUES (?, ?, ?, ?, ?)
+    """, eixos)
+    cursor.executemany("""
+        INSERT OR IGNORE INTO tf_regra_acao (id_regra, id_iniciativa, id_eixo, id_ac, ordem)
+        VALUES (?, ?, ?, ?, ?)
+    """, acoes)
+    cursor.executemany("""
+        INSERT OR IGNORE INTO tf_regra_insumo (id_regra, id_iniciativa, id_eixo, id_ac, id_insumo, ordem)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, insumos)
+
+
+def marcar_regra_atual(conn, id_iniciativa: int, id_regra: int):
+    """Aponta `id_regra` como a versão vigente da iniciativa (mesma transação do INSERT)."""
+    conn.execute("""
+        INSERT INTO tf_regra_atual (id_iniciativa, id_regra)
+        VALUES (?, ?)
+        ON CONFLICT(id_iniciativa) DO UPDATE SET id_regra = excluded.id_regra
+    """, (id_iniciativa, id_regra))
+
+
+def remover_itens_regra(conn, id_regra: int):
+    """Remove os itens das tabelas filhas de uma versão da regra."""
+    for tabela in ("tf_regra_insumo", "tf_regra_acao", "tf_regra_eixo"):
+        conn.execute(f"DELETE FROM {tabela} WHERE id_regra = ?", (id_regra,))
+
+
+def normalizar_regras(conn) -> int:
+    """
+    Passo de migração (hooks/migracoes.py): cria as tabelas filhas e preenche
+    os itens e o ponteiro da versão atual das regras gravadas antes delas existirem.
+    Retorna a quantidade de versões normalizadas.
+    """
+    cursor = conn.cursor()
+    criar_tabelas_regra(cursor)
+
+    pendentes = cursor.execute("""
+        SELECT id, id_iniciativa, eixos_tematicos
+        FROM tf_cadastro_regras_negocio
+        WHERE id NOT IN (SELECT id_regra FROM tf_regra_eixo)
+    """).fetchall()
+
+    for id_regra, id_iniciativa, eixos_json in pendentes:
+        try:
+            eixos = json.loads(eixos_json) if eixos_json else []
+        except json.JSONDecodeError:
+            continue
+        gravar_itens_regra(conn, id_regra, id_iniciativa, eixos)
+
+    # Iniciativas ainda sem ponteiro: a versão mais recente vira a vigente
+    cursor.execute("""
+        INSERT INTO tf_regra_atual (id_iniciativa, id_regra)
+        SELECT ini.id_iniciativa, (
+            SELECT r.id
+            FROM tf_cadastro_regras_negocio r
+            WHERE r.id_iniciativa = ini.id_iniciativa
+            ORDER BY r.data_hora DESC, r.id DESC
+            LIMIT 1
+        )
+        FROM (SELECT DISTINCT id_iniciativa FROM tf_cadastro_regras_negocio) ini
+        WHERE ini.id_iniciativa NOT IN (SELECT id_iniciativa FROM tf_regra_atual)
+    """)
+    return len(pendentes)
+
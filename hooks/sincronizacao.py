@@ -0,0 +1,201 @@
+# ---------------------------------------------------------
+# arquivo: hooks/sincronizacao.py
+# ---------------------------------------------------------
+# Carga das tabelas do ETL no esquema declarado pelas migrações.
+#
+# recarregar_tabela substitui todas as linhas de uma tabela cujos IDs não são
+# referenciados por outras (SAMGe, resumos SEI):
+# os valores são convertidos para os tipos declarados, as linhas repetidas na
+# chave são descartadas antes do INSERT e a tabela nunca é recriada, então
+# chaves, restrições e índices são preservados.
+#
+# Em vez de apagar e recriar as tabelas a cada carga (o que renumera os IDs
+# guardados nas regras de negócio e nas alocações por eixo), o ETL compara as linhas da planilha com
+# as do banco por uma chave estável e aplica só a diferença:
+#   - linhas novas são inseridas;
+#   - linhas existentes só são atualizadas se algum valor mudou;
+#   - linhas que sumiram da planilha são desativadas (exclusão lógica).
+# IDs já atribuídos nunca mudam e nada é apagado.
+#
+# As duas cargas rodam dentro de versao_em_lote: os gatilhos de versão da
+# tabela ficam suspensos e a versão (hooks/cache.py) avança uma única vez no
+# fim da carga, em vez de uma vez por linha gravada.
+# ---------------------------------------------------------
+import hashlib
+from contextlib import contextmanager
+
+import pandas as pd
+
+# Tipo do pandas usado para cada tipo declarado no SQLite
+TIPOS_PANDAS = {
+    "INTEGER": "Int64",
+    "REAL": "float64",
+    "TEXT": "string",
+}
+
+
+def normalizar_nome(nome) -> str | None:
+    """Forma usada para casar nomes entre planilhas: sem espaços nas pontas e em minúsculas."""
+    if nome is None or pd.isna(nome):
+        return None
+    return str(nome).strip().lower()
+
+
+def calcular_chaves(df: pd.DataFrame, colunas: list, normalizar: bool = False) -> pd.Series:
+    """
+    Chave estável de cada linha: hash das `colunas` de negócio mais a ordem da
+    linha entre as que repetem esses valores (a planilha pode ter linhas iguais).
+    Com normalizar=True, os valores passam por normalizar_nome antes do hash,
+    e a chave não depende de espaços nas pontas nem de maiúsculas.
+    """
+    valores = df[colunas]
+    if normalizar:
+        valores = valores.apply(lambda coluna: coluna.map(normalizar_nome))
+    valores = valores.astype("string").fillna("")
+    ordem = valores.groupby(colunas, sort=False).cumcount().astype(str)
+    texto = valores.agg("\x1f".join, axis=1) + "\x1f" + ordem
+    return texto.map(lambda t: hashlib.sha1(t.encode("utf-8")).hexdigest())
+
+
+def linhas_sql(df: pd.DataFrame):
+    """Tuplas prontas para executemany (tipos nativos do Python, nulos como None)."""
+    return df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
+
+def esvaziar_tabela(cursor, tabela: str):
+    """Apaga as linhas da tabela e reinicia o seu AUTOINCREMENT (como um DROP/CREATE faria)."""
+    cursor.execute(f"DELETE FROM {tabela}")
+    cursor.execute("DELETE FROM sqlite_sequence WHERE name = ?", (tabela,))
+
+
+@contextmanager
+def versao_em_lote(cursor, tabela: str):
+    """
+    Carga em lote de `tabela`: suspende os gatilhos de versão da tabela
+    (passo 14 de hooks/migracoes.py) e, no fim, avança a versão uma única vez
+    se alguma linha foi gravada. Tudo na transação da carga: não faça commit
+    dentro do bloco.
+    """
+    conn = cursor.connection
+    conn.execute("UPDATE versao_tabelas SET em_lote = 1 WHERE tabela = ?", (tabela,))
+    alteracoes = conn.total_changes
+    try:
+        yield
+    finally:
+        gravou = conn.total_changes > alteracoes
+        conn.execute(
+            "UPDATE versao_tabelas SET em_lote = 0, versao = versao + ? WHERE tabela = ?",
+            (int(gravou), tabela),
+        )
+
+
+def converter_tipos(cursor, tabela: str, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte as colunas de `df` para os tipos declarados em `tabela`.
+    Falha (ValueError) se `df` tiver colunas que a tabela não declara.
+    """
+    declaradas = {col[1]: col[2].upper() for col in cursor.execute(f"PRAGMA table_info({tabela})")}
+    faltando = [col for col in df.columns if col not in declaradas]
+    if faltando:
+        raise ValueError(f"Colunas não declaradas em {tabela}: {faltando}")
+
+    df = df.copy()
+    for col in df.columns:
+        tipo = TIPOS_PANDAS.get(declaradas[col])
+        if tipo == "string":
+            df[col] = df[col].astype("string")
+        elif tipo is not None:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(tipo)
+    return df
+
+
+def recarregar_tabela(cursor, tabela: str, df: pd.DataFrame, chave: list | None = None) -> int:
+    """
+    Substitui as linhas de `tabela` pelas de `df` com um único executemany,
+    mantendo o esquema declarado. Com `chave`, descarta as linhas sem chave e
+    as repetidas (fica a primeira). Retorna a quantidade de linhas inseridas.
+    """
+    df = converter_tipos(cursor, tabela, df)
+    if chave:
+        df = df.dropna(subset=chave)
+        repetidas = df.duplicated(subset=chave)
+        if repetidas.any():
+            print(f"⚠️ {tabela}: {int(repetidas.sum())} linhas com {', '.join(chave)} repetido descartadas.")
+            df = df[~repetidas]
+
+    lista_colunas = ", ".join(f'"{col}"' for col in df.columns)
+    marcadores = ", ".join("?" for _ in df.columns)
+    with versao_em_lote(cursor, tabela):
+        esvaziar_tabela(cursor, tabela)
+        cursor.executemany(f"INSERT INTO {tabela} ({lista_colunas}) VALUES ({marcadores})", linhas_sql(df))
+    return len(df)
+
+
+def sincronizar_tabela(
+    cursor,
+    tabela: str,
+    chave: str,
+    df: pd.DataFrame,
+    inativar: str = "ativo = 0",
+    reativar: str | None = "ativo = 1",
+    ao_atualizar: list | None = None,
+) -> dict:
+    """
+    Sincroniza `tabela` com as linhas de `df` pela coluna `chave` (UNIQUE na tabela)
+    com INSERT ... ON CONFLICT DO UPDATE.
+
+    - `inativar`: SET aplicado às linhas cuja chave não veio em `df`;
+    - `reativar`: SET aplicado às linhas que voltaram (None para não reativar);
+    - `ao_atualizar`: SETs extras aplicados quando a linha muda
+      (ex.: "data_atualizacao = CURRENT_TIMESTAMP").
+
+    Retorna a quantidade de linhas inseridas, atualizadas e inativadas.
+    """
+    colunas = list(df.columns)
+    atualizaveis = [col for col in colunas if col != chave]
+
+    atribuicoes = [f'"{col}" = excluded."{col}"' for col in atualizaveis] + list(ao_atualizar or [])
+    mudou = [f'{tabela}."{col}" IS NOT excluded."{col}"' for col in atualizaveis]
+    if reativar:
+        atribuicoes.append(reativar)
+        mudou.append(f"NOT ({reativar})")
+
+    existentes = {
+        row[0] for row in cursor.execute(f'SELECT "{chave}" FROM {tabela} WHERE "{chave}" IS NOT NULL')
+    }
+    ja_existe = df[chave].isin(existentes)
+
+    with versao_em_lote(cursor, tabela):
+        # Linhas existentes: o UPDATE só grava se algum valor mudou. Elas não passam
+        # pelo INSERT porque, em tabelas AUTOINCREMENT, cada conflito consumiria um ID.
+        alteradas = 0
+        if mudou:
+            sets = [f'"{col}" = ?' for col in atualizaveis] + list(ao_atualizar or []) + ([reativar] if reativar else [])
+            diferencas = [f'"{col}" IS NOT ?' for col in atualizaveis] + ([f"NOT ({reativar})"] if reativar else [])
+            cursor.executemany(
+                f'UPDATE {tabela} SET {", ".join(sets)} WHERE "{chave}" = ? AND ({" OR ".join(diferencas)})',
+                (
+                    valores[1:] + (valores[0],) + valores[1:]
+                    for valores in linhas_sql(df.loc[ja_existe, [chave] + atualizaveis])
+                ),
+            )
+            alteradas = max(cursor.rowcount, 0)
+
+        # Linhas novas
+        lista_colunas = ", ".join(f'"{col}"' for col in colunas)
+        marcadores = ", ".join("?" for _ in colunas)
+        conflito = f"DO UPDATE SET {', '.join(atribuicoes)} WHERE {' OR '.join(mudou)}" if mudou else "DO NOTHING"
+        cursor.executemany(f"""
+            INSERT INTO {tabela} ({lista_colunas}) VALUES ({marcadores})
+            ON CONFLICT("{chave}") {conflito}
+        """, linhas_sql(df.loc[~ja_existe, colunas]))
+        inseridas = max(cursor.rowcount, 0)
+
+        # Linhas que sumiram da planilha
+        cursor.executemany(
+            f'UPDATE {tabela} SET {inativar} WHERE "{chave}" = ? AND NOT ({inativar})',
+            ((valor,) for valor in existentes - set(df[chave])),
+        )
+        inativadas = max(cursor.rowcount, 0)
+
+    return {"inseridas": inseridas, "atualizadas": alteradas, "inativadas": inativadas}
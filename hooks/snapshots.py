@@ -0,0 +1,178 @@
+# ---------------------------------------------------------
+# arquivo: hooks/snapshots.py
+# ---------------------------------------------------------
+# Snapshots colunares de tabelas somente-leitura geradas pelo ETL.
+#
+# O ETL grava a tabela em um arquivo Arrow IPC (Feather v2) sem compressão,
+# com a versão no nome, no diretório snapshots/ ao lado do banco em que roda,
+# e registra o nome do arquivo vigente em etl_snapshots. As páginas abrem o
+# arquivo via memory-map e leem só as colunas de que precisam: as páginas
+# físicas ficam no cache do SO, compartilhadas entre sessões e processos, em
+# vez de uma cópia privada por cache do Streamlit.
+#
+# Gravar um snapshot não remove as versões anteriores: a prévia da
+# reconstrução (hooks/reconstrucao.py) roda o ETL numa cópia do banco, no
+# mesmo diretório, e o banco em uso continua apontando para a sua versão
+# (se a prévia for descartada, os snapshots só dela são removidos).
+# As versões antigas só são removidas (remover_snapshots_antigos) depois de
+# uma carga no banco em uso ou da publicação da cópia.
+#
+# O DataFrame de cada projeção é montado uma vez por processo, somente-leitura
+# (as colunas numéricas sem nulos e as de texto apontam para o próprio
+# memory-map), e cada chamada recebe uma cópia rasa (hooks/cache.py).
+# ---------------------------------------------------------
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import streamlit as st
+
+from hooks.cache import somente_leitura, visao
+from hooks.conexao import DB_PATH, get_connection
+
+
+def criar_tabela_snapshots(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS etl_snapshots (
+            tabela TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL,
+            arquivo TEXT NOT NULL,
+            linhas INTEGER,
+            gerado_em TIMESTAMP
+        )
+    """)
+
+
+def diretorio_snapshots(db_path: str) -> str:
+    """Diretório dos snapshots do banco `db_path` (snapshots/, ao lado do arquivo)."""
+    return os.path.join(os.path.dirname(db_path), "snapshots")
+
+
+def _arquivo_banco(conn) -> str:
+    """Caminho do arquivo do banco principal da conexão."""
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+
+def _versoes_existentes(tabela: str, snapshot_dir: str) -> dict:
+    """Retorna {versão: caminho} dos snapshots da tabela presentes no diretório."""
+    padrao = re.compile(rf"^{re.escape(tabela)}-v(\d+)\.arrow$")
+    versoes = {}
+    if not os.path.isdir(snapshot_dir):
+        return versoes
+    for nome in os.listdir(snapshot_dir):
+        encontrado = padrao.match(nome)
+        if encontrado:
+            versoes[int(encontrado.group(1))] = os.path.join(snapshot_dir, nome)
+    return versoes
+
+
+def gravar_snapshot(conn, tabela: str, df: pd.DataFrame) -> str:
+    """
+    Grava `df` como nova versão do snapshot de `tabela`, no diretório de
+    snapshots do banco da conexão, e a registra em etl_snapshots. As versões
+    anteriores ficam no diretório. Retorna o caminho do arquivo.
+    """
+    snapshot_dir = diretorio_snapshots(_arquivo_banco(conn))
+    os.makedirs(snapshot_dir, exist_ok=True)
+    versao = max(_versoes_existentes(tabela, snapshot_dir), default=0) + 1
+    nome = f"{tabela}-v{versao}.arrow"
+    arquivo = os.path.join(snapshot_dir, nome)
+
+    # Sem compressão: é o que permite ler as colunas direto do memory-map
+    temporario = arquivo + ".tmp"
+    feather.write_feather(df.reset_index(drop=True), temporario, compression="uncompressed")
+    os.replace(temporario, arquivo)
+
+    criar_tabela_snapshots(conn.cursor())
+    conn.execute("""
+        INSERT INTO etl_snapshots (tabela, versao, arquivo, linhas, gerado_em)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(tabela) DO UPDATE SET
+            versao = excluded.versao,
+            arquivo = excluded.arquivo,
+            linhas = excluded.linhas,
+            gerado_em = excluded.gerado_em
+    """, (tabela, versao, nome, len(df), datetime.now().isoformat(timespec="seconds")))
+    conn.commit()
+    return arquivo
+
+
+def remover_snapshots_antigos(conn) -> list[str]:
+    """
+    Remove, de cada tabela registrada em etl_snapshots do banco da conexão,
+    as versões anteriores à vigente. Versões mais novas (de uma prévia ainda
+    não publicada) são mantidas. Chame só sobre o banco em uso. Retorna os
+    arquivos removidos.
+    """
+    snapshot_dir = diretorio_snapshots(_arquivo_banco(conn))
+    try:
+        vigentes = conn.execute("SELECT tabela, versao FROM etl_snapshots").fetchall()
+    except sqlite3.OperationalError:
+        return []
+
+    removidos = []
+    for tabela, vigente in vigentes:
+        for versao, caminho in _versoes_existentes(tabela, snapshot_dir).items():
+            # Processos que ainda mapeiam uma versão antiga continuam lendo o arquivo removido
+            if versao < vigente:
+                os.remove(caminho)
+                removidos.append(caminho)
+    return removidos
+
+
+def snapshots_registrados(db_path: str) -> set[str]:
+    """Caminhos dos snapshots registrados em etl_snapshots do banco `db_path` (sem o pool)."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        registros = conn.execute("SELECT arquivo FROM etl_snapshots").fetchall()
+    except sqlite3.OperationalError:
+        return set()
+    finally:
+        conn.close()
+    return {os.path.join(diretorio_snapshots(db_path), os.path.basename(arquivo)) for (arquivo,) in registros}
+
+
+def arquivo_snapshot(tabela: str, db_path: str = DB_PATH) -> str | None:
+    """Caminho do snapshot vigente da tabela, ou None se não houver."""
+    try:
+        registro = get_connection(db_path).execute(
+            "SELECT arquivo FROM etl_snapshots WHERE tabela = ?", (tabela,)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    if registro is None:
+        return None
+    # Registros antigos guardam o caminho completo; vale só o nome do arquivo
+    arquivo = os.path.join(diretorio_snapshots(db_path), os.path.basename(registro[0]))
+    return arquivo if os.path.exists(arquivo) else None
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _abrir_snapshot(arquivo: str) -> pa.Table:
+    """Tabela Arrow mapeada em memória (uma por arquivo, compartilhada entre sessões)."""
+    return feather.read_table(arquivo, memory_map=True)
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _quadro_snapshot(arquivo: str, colunas: tuple | None) -> pd.DataFrame:
+    """Projeção do snapshot como DataFrame somente-leitura, compartilhado entre sessões."""
+    tabela_arrow = _abrir_snapshot(arquivo)
+    if colunas is not None:
+        tabela_arrow = tabela_arrow.select(list(colunas))
+    # split_blocks: uma coluna por bloco, sem consolidar (e copiar) as colunas numéricas
+    return somente_leitura(tabela_arrow.to_pandas(split_blocks=True))
+
+
+def ler_snapshot(tabela: str, colunas: list | None = None) -> pd.DataFrame | None:
+    """
+    Lê o snapshot vigente da tabela, projetando apenas `colunas`.
+    Retorna None se o ETL ainda não gerou o snapshot.
+    """
+    arquivo = arquivo_snapshot(tabela)
+    if arquivo is None:
+        return None
+    return visao(_quadro_snapshot(arquivo, tuple(colunas) if colunas is not None else None))
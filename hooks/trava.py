@@ -0,0 +1,41 @@
+# ---------------------------------------------------------
+# arquivo: hooks/trava.py
+# ---------------------------------------------------------
+# Trava exclusiva entre processos baseada em arquivo (flock no Linux/macOS,
+# msvcrt no Windows). O sistema operacional libera a trava se o processo
+# morrer, então um processo interrompido não deixa a trava presa.
+# ---------------------------------------------------------
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def trava_arquivo(caminho: str):
+    """Bloqueia até obter a trava exclusiva de `caminho` (criado se preciso)."""
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    with open(caminho, "a+") as arquivo:
+        if fcntl is not None:
+            fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX)
+        else:
+            arquivo.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(arquivo.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(arquivo.fileno(), fcntl.LOCK_UN)
+            else:
+                arquivo.seek(0)
+                msvcrt.locking(arquivo.fileno(), msvcrt.LK_UNLCK, 1)
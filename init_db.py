@@ -1,245 +1,256 @@
+import argparse
+import hashlib
 import json
+import multiprocessing
 import numpy as np
 import pandas as pd
-import sqlite3
 import os
+import sqlite3
 import streamlit as st
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from hooks.conexao import abrir_conexao
+from hooks.escrita import executar_escrita
+from hooks.migracoes import (
+    CHAVE_CADASTROS_INICIATIVAS,
+    CHAVE_ELEGIVEIS,
+    CHAVE_INSUMOS,
+    VERSAO_ESQUEMA,
+    aplicar_migracoes,
+    preparar_banco,
+)
+from hooks.sincronizacao import (
+    calcular_chaves,
+    converter_tipos,
+    esvaziar_tabela,
+    normalizar_nome,
+    recarregar_tabela,
+    sincronizar_tabela,
+    versao_em_lote,
+)
+from hooks.snapshots import gravar_snapshot, remover_snapshots_antigos
+from hooks.trava import trava_arquivo
+
+
+DB_PATH = "database/app_data.db"
+
+# ---------------------------------------------------------
+# Fontes de dados do ETL
+# ---------------------------------------------------------
+# Cada planilha de dados/ alimenta um conjunto fixo de tabelas. O manifesto
+# (etl_manifesto) guarda o SHA-256 de cada planilha carregada: numa
+# atualização incremental, só as etapas cujas planilhas mudaram são refeitas.
+FONTES = {
+    "samge": "dados/matrizConceitual_linguagemSAMGe.xlsx",
+    "base": "dados/base_iniciativas_consolidada.xlsx",
+    "resumos": "dados/base_iniciativas_resumos_sei.xlsx",
+    "elegiveis": "dados/base_iniciativas_elegiveis.xlsx",
+    "insumos": "dados/base_insumos.xlsx",
+}
+
+TABELAS_POR_FONTE = {
+    "samge": ["td_samge_macroprocessos", "td_samge_processos", "td_samge_acoes_manejo", "td_samge_atividades"],
+    "base": ["td_dados_base_iniciativas", "td_demandantes", "td_iniciativas", "td_acoes_aplicacao",
+             "td_unidades", "tf_cadastros_iniciativas", "tf_totais_consulta"],
+    "resumos": ["td_dados_resumos_sei"],
+    "elegiveis": ["tf_distribuicao_elegiveis"],
+    "insumos": ["td_insumos"],
+}
+
+# Dependências entre as etapas (o ETL é um DAG): a distribuição usa os IDs
+# das dimensões da base (os processos do SAMGe não mudam a forma da tabela:
+# as alocações por eixo ficam em tf_alocacao_uc_eixo). As demais etapas são
+# independentes.
+DEPENDENCIAS = {
+    "elegiveis": ["base"],
+}
+
+# Etapas que precisam ser refeitas quando outra fonte é recarregada
+DEPENDENTES = {
+    fonte: [etapa for etapa, deps in DEPENDENCIAS.items() if fonte in deps]
+    for fonte in FONTES
+}
+
+# Etapas cuja falha não interrompe o ETL (é registrada em etl_runs e no log)
+ETAPAS_OPCIONAIS = {"insumos"}
+
+# Leituras simultâneas no pool de processos (uma por planilha, no máximo)
+MAX_PROCESSOS_LEITURA = 4
+
+# Volume mínimo (bytes) das planilhas a ler para usar o pool: cada processo
+# novo gasta ~1-2 s importando pandas/streamlit, mais do que ler planilhas pequenas
+MIN_BYTES_LEITURA_PARALELA = 8 * 1024 * 1024
+
+# Cache das planilhas já lidas (um arquivo por fonte, identificado pelo SHA-256)
+CACHE_ETL_DIR = "database/cache_etl"
+
+# Incrementar sempre que a lógica de leitura (ler_*) mudar, invalidando o cache
+VERSAO_CACHE = 3
+
+# Colunas da base consolidada usadas pela aplicação
+COLUNAS_BASE = [
+    "DEMANDANTE",
+    "Nome da Proposta/Iniciativa Estruturante",
+    "Unidade de Conservação",
+    "Observações",
+    "VALOR TOTAL ALOCADO",
+    "Valor da Iniciativa (R$)",
+    "Valor Total da Iniciativa",
+    "SALDO",
+    "Nº SEI",
+    "AÇÃO DE APLICAÇÃO",
+    "CATEGORIA UC",
+    "CNUC",
+    "GR",
+    "BIOMA",
+    "UF"
+]
+
+COLUNAS_MONETARIAS_BASE = [
+    "VALOR TOTAL ALOCADO",
+    "Valor da Iniciativa (R$)",
+    "Valor Total da Iniciativa",
+    "SALDO",
+]
+
+# Dimensões dos totais exibidos nas páginas de Consulta (tf_totais_consulta)
+DIMENSOES_TOTAIS = [
+    "DEMANDANTE",
+    "Nome da Proposta/Iniciativa Estruturante",
+    "AÇÃO DE APLICAÇÃO",
+    "Unidade de Conservação",
+    "GR",
+    "BIOMA",
+    "CATEGORIA UC",
+    "UF",
+]
+
+# Valor da coluna `demandante` de tf_totais_consulta para os totais de todos os demandantes
+DEMANDANTE_TODOS = "*"
+
+# Dimensões referenciadas por tf_distribuicao_elegiveis:
+# (tabela, coluna de ID, coluna com o nome na planilha de elegíveis)
+DIMENSOES_ELEGIVEIS = [
+    ("td_demandantes", "id_demandante", "DEMANDANTE (diretoria)"),
+    ("td_iniciativas", "id_iniciativa", "Nome da Proposta/Iniciativa Estruturante"),
+    ("td_acoes_aplicacao", "id_acao", "AÇÃO DE APLICAÇÃO"),
+]
+
+
+# ---------------------------------------------------------
+# Manifesto e cache de leitura
+# ---------------------------------------------------------
+def calcular_sha256(caminho: str) -> str:
+    """Calcula o SHA-256 de um arquivo lendo-o em blocos."""
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def fonte_alterada(conn, fonte: str, sha: str) -> bool:
+    """
+    Indica se a fonte precisa ser recarregada: o arquivo mudou desde a última
+    carga (ou nunca foi carregado) ou a sua tabela principal está vazia.
+    """
+    registro = conn.execute("SELECT sha256 FROM etl_manifesto WHERE fonte = ?", (fonte,)).fetchone()
+    if registro is None or registro[0] != sha:
+        return True
+
+    tabela_principal = TABELAS_POR_FONTE[fonte][0]
+    return conn.execute(f"SELECT 1 FROM {tabela_principal} LIMIT 1").fetchone() is None
+
+
+def registrar_carga(conn, fonte: str, sha: str, parseado_em: datetime):
+    """Atualiza o manifesto após carregar uma fonte e invalida as etapas dependentes."""
+    caminho = FONTES[fonte]
+    conn.execute("""
+        INSERT INTO etl_manifesto (fonte, arquivo, sha256, tamanho, parseado_em, carregado_em)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(fonte) DO UPDATE SET
+            arquivo = excluded.arquivo,
+            sha256 = excluded.sha256,
+            tamanho = excluded.tamanho,
+            parseado_em = excluded.parseado_em,
+            carregado_em = excluded.carregado_em
+    """, (
+        fonte,
+        caminho,
+        sha,
+        os.path.getsize(caminho),
+        parseado_em.isoformat(timespec="seconds"),
+        datetime.now().isoformat(timespec="seconds"),
+    ))
+    for dependente in DEPENDENTES.get(fonte, []):
+        conn.execute("DELETE FROM etl_manifesto WHERE fonte = ?", (dependente,))
+    conn.commit()
 
 
-def init_database():
-    # 📌 Caminhos dos arquivos de dados e do banco
-    json_path = "dados/base_iniciativas_consolidada.json"
-    excel_path = "dados/base_iniciativas_resumos_sei.xlsx"
-    excel_path_elegiveis = "dados/base_iniciativas_elegiveis.xlsx"
-    db_path = "database/app_data.db"
-
-    # Credenciais do usuário admin (vêm do [Secrets] do Streamlit)
-    admin_cpf = st.secrets["ADMIN_CPF"]
-    admin_nome = st.secrets["ADMIN_NOME"]
-    admin_email = st.secrets["ADMIN_EMAIL"]
-    admin_setor = st.secrets["ADMIN_SETOR"]
-    admin_perfil = st.secrets["ADMIN_PERFIL"]
-
-    # 📌 Criando diretório do banco de dados se não existir
-    os.makedirs("database", exist_ok=True)
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    # ----------------------------------------------------------------------------
-    # 1) TABELA DE USUÁRIOS
-    # ----------------------------------------------------------------------------
-    cursor.execute(""" DROP TABLE IF EXISTS tf_usuarios """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS tf_usuarios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            cpf TEXT UNIQUE NOT NULL,
-            nome_completo TEXT NOT NULL,
-            email TEXT NOT NULL,
-            setor_demandante TEXT NOT NULL,
-            perfil TEXT NOT NULL DEFAULT 'comum' -- Pode ser 'comum' ou 'admin'
-        )
-    """)
-
-    # Cria (ou ignora) um usuário admin master
-    cursor.execute("""
-        INSERT OR IGNORE INTO tf_usuarios (cpf, nome_completo, email, setor_demandante, perfil)
-        VALUES (?, ?, ?, ?, ?)
-    """, (admin_cpf, admin_nome, admin_email, admin_setor, admin_perfil))
-
-    # Cria (ou ignora) um usuário com perfil cocam
-    cursor.execute("""
-        INSERT OR IGNORE INTO tf_usuarios (cpf, nome_completo, email, setor_demandante, perfil)
-        VALUES (?, ?, ?, ?, ?)
-    """, ("11111111111", "COCAM", " ", "COCAM", "cocam"))
-
-
-
-    # Caminho do arquivo carregado
-    file_path = "dados/base_iniciativas_consolidada.xlsx"
-
-    # Carregar o arquivo Excel
-    xls = pd.ExcelFile(file_path)
+def caminho_cache(fonte: str, sha: str) -> str:
+    """Arquivo do cache de leitura da fonte para a versão `sha` da planilha."""
+    return os.path.join(CACHE_ETL_DIR, f"{fonte}-v{VERSAO_CACHE}-{sha}.pkl")
 
-    # Listar as planilhas disponíveis
-    xls.sheet_names
 
-    # Carregar a planilha específica
-    df = pd.read_excel(xls, sheet_name="BASE_INICIATIVAS_CONSOLIDADA")
+def ler_fonte(fonte: str, sha: str, leitor):
+    """
+    Retorna (DataFrame, momento da leitura) da fonte, reaproveitando o cache
+    em disco quando a planilha não mudou desde a última leitura.
+    """
+    os.makedirs(CACHE_ETL_DIR, exist_ok=True)
+    cache_path = caminho_cache(fonte, sha)
 
-    # Exibir as primeiras linhas e colunas disponíveis
-    df.head(), df.columns
+    if os.path.exists(cache_path):
+        return pd.read_pickle(cache_path), datetime.fromtimestamp(os.path.getmtime(cache_path))
 
+    df = leitor(FONTES[fonte])
 
-    # Converter o DataFrame para uma estrutura de dicionários
-    json_data = df.to_dict(orient="records")
+    # Remove leituras antigas da mesma fonte antes de gravar a nova
+    for nome in os.listdir(CACHE_ETL_DIR):
+        if nome.startswith(f"{fonte}-"):
+            os.remove(os.path.join(CACHE_ETL_DIR, nome))
+    df.to_pickle(cache_path)
+    return df, datetime.now()
 
-    # Caminho para salvar o arquivo JSON
-    json_file_path = "dados/base_iniciativas_consolidada.json"
 
-    # Salvar como JSON formatado
-    with open(json_file_path, "w", encoding="utf-8") as json_file:
-        json.dump(json_data, json_file, ensure_ascii=False, indent=4)
-    
+# ---------------------------------------------------------
+# Leitura das planilhas
+# ---------------------------------------------------------
+def ler_base_consolidada(file_path: str) -> pd.DataFrame:
+    # Carregar a planilha específica (CNUC é um código, não um número)
+    df = pd.read_excel(
+        file_path,
+        sheet_name="BASE_INICIATIVAS_CONSOLIDADA",
+        engine="openpyxl",
+        dtype={"CNUC": str},
+    )
 
-    # Retornar o caminho do arquivo JSON gerado
-    # json_file_path
+    # Selecionar colunas relevantes
+    df_base = df[COLUNAS_BASE].copy()
 
+    # Converter "Nº SEI" para inteiro (anulável), tratar "-" como nulo
+    df_base["Nº SEI"] = pd.to_numeric(df_base["Nº SEI"].replace("-", np.nan), errors="coerce").astype("Int64")
 
+    # Valores monetários sempre em float64
+    for col in COLUNAS_MONETARIAS_BASE:
+        df_base[col] = pd.to_numeric(df_base[col], errors="coerce").astype("float64")
 
-    # ----------------------------------------------------------------------------
-    # 2) LEITURA DA BASE JSON (df_base) E CRIAÇÃO DE TABELAS DE APOIO
-    # ----------------------------------------------------------------------------
-    df_base = pd.read_json(json_path)
+    return df_base
 
-    # Converter "Nº SEI" para numérico, tratar "-" como NaN
-    df_base["Nº SEI"] = df_base["Nº SEI"].astype(str).replace("-", np.nan)
-    df_base["Nº SEI"] = pd.to_numeric(df_base["Nº SEI"], errors="coerce")
 
-    # Selecionar colunas relevantes
-    colunas_base = [
-        "DEMANDANTE",
-        "Nome da Proposta/Iniciativa Estruturante",
-        "Unidade de Conservação",
-        "Observações",
-        "VALOR TOTAL ALOCADO",
-        "Valor da Iniciativa (R$)",
-        "Valor Total da Iniciativa",
-        "SALDO",
-        "Nº SEI",
-        "AÇÃO DE APLICAÇÃO",
-        "CATEGORIA UC",
-        "CNUC",
-        "GR",
-        "BIOMA",
-        "UF"
-    ]
-    df_base = df_base[colunas_base]
-
-    # Criar tabela fixa de consulta
-    cursor.execute(""" DROP TABLE IF EXISTS td_dados_base_iniciativas """)
-    df_base.to_sql("td_dados_base_iniciativas", conn, if_exists="replace", index=False)
-
-    # ----------------------------------------------------------------------------
-    # 3) LEITURA DA PLANILHA (EXCEL) COM RESUMOS SEI
-    # ----------------------------------------------------------------------------
+def ler_resumos_sei(excel_path: str) -> pd.DataFrame:
     df_resumos = pd.read_excel(excel_path, sheet_name="Planilha1", engine="openpyxl")
     df_resumos.dropna(how="all", inplace=True)
 
     # Padroniza colunas (minúsculas, underscores)
     df_resumos.columns = [col.strip().lower().replace(" ", "_") for col in df_resumos.columns]
-
-    # Cria tabela para armazenar resumos SEI
-    cursor.execute(""" DROP TABLE IF EXISTS td_dados_resumos_sei """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS td_dados_resumos_sei (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            diretoria TEXT,
-            coordenacao_geral TEXT,
-            coordenacao TEXT,
-            demandante TEXT,
-            id_resumo TEXT,
-            iniciativa TEXT,
-            introducao TEXT,
-            justificativa TEXT,
-            objetivo_geral TEXT,
-            unidades_conservacao TEXT,
-            metodologia TEXT
-        )
-    """)
-    conn.commit()
-
-    # Salva dados do Excel na tabela
-    df_resumos.to_sql("td_dados_resumos_sei", conn, if_exists="replace", index=False)
-
-    # ----------------------------------------------------------------------------
-    # 4) CRIAÇÃO DAS TABELAS DIMENSÃO
-    # ----------------------------------------------------------------------------
-    cursor.execute(""" DROP TABLE IF EXISTS td_demandantes """)
-    cursor.execute(""" DROP TABLE IF EXISTS td_iniciativas """)
-    cursor.execute(""" DROP TABLE IF EXISTS td_acoes_aplicacao """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS td_demandantes (
-            id_demandante INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome_demandante TEXT UNIQUE
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS td_iniciativas (
-            id_iniciativa INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome_iniciativa TEXT UNIQUE
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS td_acoes_aplicacao (
-            id_acao INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome_acao TEXT UNIQUE
-        )
-    """)
-
-    # ----------------------------------------------------------------------------
-    # 5) TABELA DE UNIDADES
-    # ----------------------------------------------------------------------------
-    cursor.execute(""" DROP TABLE IF EXISTS td_unidades """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS td_unidades (
-            cnuc TEXT PRIMARY KEY,
-            nome_unidade TEXT,
-            gr TEXT,
-            categoria_uc TEXT,
-            bioma TEXT,
-            uf TEXT
-        )
-    """)
-
-    # ----------------------------------------------------------------------------
-    # 6) TABELA FATO - tf_cadastros_iniciativas
-    # ----------------------------------------------------------------------------
-    cursor.execute(""" DROP TABLE IF EXISTS tf_cadastros_iniciativas """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS tf_cadastros_iniciativas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            id_demandante INTEGER,
-            id_iniciativa INTEGER,
-            id_acao INTEGER,
-            cnuc TEXT,
-            id_composto TEXT UNIQUE,
-            observacoes TEXT,
-            saldo REAL,
-            valor_total_alocado REAL,
-            valor_iniciativa REAL,
-            valor_total_iniciativa REAL,
-            num_sei TEXT,
-            formas_contratacao TEXT,
-            FOREIGN KEY (id_demandante) REFERENCES td_demandantes(id_demandante),
-            FOREIGN KEY (id_iniciativa) REFERENCES td_iniciativas(id_iniciativa),
-            FOREIGN KEY (id_acao) REFERENCES td_acoes_aplicacao(id_acao),
-            FOREIGN KEY (cnuc) REFERENCES td_unidades(cnuc)
-        )
-    """)
-
-
-    # ----------------------------------------------------------------------------
-    # CRIA TABELA tf_distribuicao_elegiveis
-    # ----------------------------------------------------------------------------
-    cursor.execute(""" DROP TABLE IF EXISTS tf_distribuicao_elegiveis """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS tf_distribuicao_elegiveis (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            "DEMANDANTE (diretoria)" TEXT,
-            "Nome da Proposta/Iniciativa Estruturante" TEXT,
-            "AÇÃO DE APLICAÇÃO" TEXT,
-            "Unidade de Conservação" TEXT,
-            CNUC TEXT,
-            "TetoSaldo disponível" REAL,
-            "TetoPrevisto 2025" REAL,
-            "TetoPrevisto 2026" REAL,
-            "TetoPrevisto 2027" REAL,
-            "TetoTotalDisponivel" REAL,
-            "A Distribuir" REAL
-        )
-    """)
+    return df_resumos
 
 
+def ler_elegiveis(excel_path_elegiveis: str) -> pd.DataFrame:
     # Lê o arquivo base_iniciativas_elegiveis.xlsx
     df_elegiveis = pd.read_excel(excel_path_elegiveis, engine="openpyxl")
 
@@ -255,16 +266,8 @@ def init_database():
     for col in colunas_numericas:
         df_elegiveis[col] = pd.to_numeric(df_elegiveis[col], errors="coerce").round(2).fillna(0.00)
 
-    # Criar a coluna "TetoTotalDisponivel" antes de inserir no banco
-    df_elegiveis["TetoTotalDisponivel"] = (
-        df_elegiveis["TetoSaldo disponível"] +
-        df_elegiveis["TetoPrevisto 2025"] +
-        df_elegiveis["TetoPrevisto 2026"] +
-        df_elegiveis["TetoPrevisto 2027"]
-    ).round(2)
-
-    # Inicializa a coluna "A Distribuir" como NULL
-    df_elegiveis["A Distribuir"] = None
+    # "TetoTotalDisponivel" é coluna gerada no banco e "A Distribuir" é mantida
+    # pelos gatilhos de tf_distribuicao_elegiveis (hooks/migracoes.py)
 
     # Define as colunas necessárias
     colunas_elegiveis = [
@@ -276,451 +279,840 @@ def init_database():
         "TetoSaldo disponível",
         "TetoPrevisto 2025",
         "TetoPrevisto 2026",
-        "TetoPrevisto 2027",
-        "TetoTotalDisponivel",
-        "A Distribuir"
+        "TetoPrevisto 2027"
     ]
 
     # Filtra as colunas necessárias (ou renomeie caso sejam diferentes)
     df_distribuicao = df_elegiveis[colunas_elegiveis].copy()
 
     # (Opcional) Se quiser preencher tetos nulos com zero:
-    df_distribuicao[
-        [
-            "TetoSaldo disponível",
-            "TetoPrevisto 2025",
-            "TetoPrevisto 2026",
-            "TetoPrevisto 2027"
-        ]
-    ] = df_distribuicao[
-        [
-            "TetoSaldo disponível",
-            "TetoPrevisto 2025",
-            "TetoPrevisto 2026",
-            "TetoPrevisto 2027"
-        ]
-    ].fillna(0)
-
-    # Popula a nova tabela tf_distribuicao_elegiveis
-    df_distribuicao.to_sql("tf_distribuicao_elegiveis", conn, if_exists="append", index=False)
-
-
-    # ----------------------------------------------------------------------
-    # 1️⃣ Recuperar os processos da tabela `td_samge_processos`
-    # ----------------------------------------------------------------------
-    df_processos = pd.read_sql_query("SELECT nome FROM td_samge_processos", conn)
-    nomes_processos = [row["nome"] for _, row in df_processos.iterrows()]
-
-    # ----------------------------------------------------------------------
-    # 2️⃣ Adicionar colunas para cada processo na tabela `tf_distribuicao_elegiveis`
-    # ----------------------------------------------------------------------
-    cursor.execute("PRAGMA table_info(tf_distribuicao_elegiveis)")
-    colunas_existentes = {col[1] for col in cursor.fetchall()}
-
-    for processo in nomes_processos:
-        if processo not in colunas_existentes:
-            cursor.execute(f'ALTER TABLE tf_distribuicao_elegiveis ADD COLUMN "{processo}" REAL DEFAULT 0.00')
-
-
-    # ----------------------------------------------------------------------
-    # 3️⃣ Criar a coluna `TetoTotalDisponivel`, se não existir
-    # ----------------------------------------------------------------------
-    if "TetoTotalDisponivel" not in colunas_existentes:
-        cursor.execute('ALTER TABLE tf_distribuicao_elegiveis ADD COLUMN "TetoTotalDisponivel" REAL')
-
-    # Atualizar os valores de `TetoTotalDisponivel`
-    cursor.execute("""
-        UPDATE tf_distribuicao_elegiveis
-        SET TetoTotalDisponivel = COALESCE("TetoSaldo disponível", 0) +
-                                  COALESCE("TetoPrevisto 2025", 0) +
-                                  COALESCE("TetoPrevisto 2026", 0) +
-                                  COALESCE("TetoPrevisto 2027", 0)
-    """)
-
-    # ----------------------------------------------------------------------
-    # 4️⃣ Criar a coluna `"A Distribuir"`, se não existir (mas sem calcular ainda)
-    # ----------------------------------------------------------------------
-    if "A Distribuir" not in colunas_existentes:
-        cursor.execute('ALTER TABLE tf_distribuicao_elegiveis ADD COLUMN "A Distribuir" REAL NULL')
-
-    # popular a coluna "A Distribuir" com valores iguais a teto total disponível
-    cursor.execute("""
-        UPDATE tf_distribuicao_elegiveis
-        SET "A Distribuir" = TetoTotalDisponivel
-    """)
-    
-
-    # ----------------------------------------------------------------------------
-    # Ajuste na Tabela tf_distribuicao_elegiveis para incluir os IDs
-    # ----------------------------------------------------------------------------
-    cursor.execute("PRAGMA table_info(tf_distribuicao_elegiveis)")
-    colunas_existentes = {col[1] for col in cursor.fetchall()}
-
-    # Criar as colunas de IDs se ainda não existirem
-    if "id_demandante" not in colunas_existentes:
-        cursor.execute('ALTER TABLE tf_distribuicao_elegiveis ADD COLUMN "id_demandante" INTEGER')
-
-    if "id_iniciativa" not in colunas_existentes:
-        cursor.execute('ALTER TABLE tf_distribuicao_elegiveis ADD COLUMN "id_iniciativa" INTEGER')
+    df_distribuicao[colunas_numericas] = df_distribuicao[colunas_numericas].fillna(0)
+    return df_distribuicao
+
+
+def ler_insumos(excel_insumos_path: str) -> pd.DataFrame:
+    df_raw = pd.read_excel(excel_insumos_path, sheet_name=0)
+
+    # Garante colunas mínimas
+    if "Especificação Técnica (detalhamento)" not in df_raw.columns:
+        df_raw["Especificação Técnica (detalhamento)"] = ""
+
+    df_insumos = df_raw.rename(columns={
+        "Elemento de Despesa": "elemento_despesa",
+        "Especificação Padrão": "especificacao_padrao",
+        "Descrição do Insumo": "descricao_insumo",
+        "Especificação Técnica (detalhamento)": "especificacao_tecnica",
+        "Valor ATUALIZADO EM Dezembro/2024": "valor_referencia"
+    })
+
+    # # Ajusta valores numéricos
+    # df_insumos["valor_referencia"] = (
+    #     df_insumos["valor_referencia"]
+    #     .astype(str)
+    #     .str.replace(".", "")   # remove milhar
+    #     .str.replace(",", ".")  # vírgula decimal -> ponto
+    # )
+    df_insumos["valor_referencia"] = pd.to_numeric(df_insumos["valor_referencia"], errors="coerce").fillna(0.0)
+
+    # Seleciona colunas na ordem
+    df_insumos = df_insumos[[
+        "elemento_despesa",
+        "especificacao_padrao",
+        "descricao_insumo",
+        "especificacao_tecnica",
+        "valor_referencia"
+    ]]
+
+    # Renomeia "valor_referencia" -> "preco_referencia"
+    return df_insumos.rename(columns={"valor_referencia": "preco_referencia"})
+
+
+def ler_samge(excel_path: str) -> pd.DataFrame:
+    # Lê o Excel do SAMGe
+    df = pd.read_excel(excel_path, engine="openpyxl")
 
-    if "id_acao" not in colunas_existentes:
-        cursor.execute('ALTER TABLE tf_distribuicao_elegiveis ADD COLUMN "id_acao" INTEGER')
+    # Padroniza colunas
+    df.columns = df.columns.str.strip()
+    return df
+
+
+# ---------------------------------------------------------
+# Carga das tabelas
+# ---------------------------------------------------------
+# O esquema das tabelas é definido pelas migrações (hooks/migracoes.py): as
+# cargas só repovoam as linhas (recarregar_tabela), preservando tipos, chaves
+# e índices. Tabelas cujos IDs são referenciados pelas regras de negócio ou
+# pelas alocações (dimensões, unidades, tabela fato, insumos e elegíveis) são
+# sincronizadas, nunca esvaziadas.
+def relatar_sincronizacao(tabela: str, contagem: dict):
+    print(
+        f"🔄 {tabela}: {contagem['inseridas']} inseridas, "
+        f"{contagem['atualizadas']} atualizadas, {contagem['inativadas']} inativadas."
+    )
+
+
+def popular_dimensao(cursor, tabela: str, id_col: str, name_col: str, valores: pd.Series) -> dict:
+    """
+    Sincroniza os valores únicos de uma dimensão (o nome é a chave, os IDs
+    existentes são mantidos) e retorna o mapeamento {nome: id} lido da própria tabela.
+    O nome normalizado (nome_normalizado) é usado para casar os nomes das elegíveis.
+    """
+    unicos = pd.DataFrame({name_col: valores.dropna().drop_duplicates()})
+    unicos["nome_normalizado"] = unicos[name_col].map(normalizar_nome)
+    relatar_sincronizacao(tabela, sincronizar_tabela(cursor, tabela, name_col, unicos))
+    cursor.execute(f"SELECT {name_col}, {id_col} FROM {tabela}")
+    return dict(cursor.fetchall())
+
+
+def materializar_totais(conn):
+    """
+    Recalcula tf_totais_consulta a partir de td_dados_base_iniciativas: para cada
+    dimensão em DIMENSOES_TOTAIS, os totais de todos os demandantes
+    (demandante = DEMANDANTE_TODOS) e os de cada demandante.
+    """
+    cursor = conn.cursor()
+    with versao_em_lote(cursor, "tf_totais_consulta"):
+        esvaziar_tabela(cursor, "tf_totais_consulta")
+
+        for dimensao in DIMENSOES_TOTAIS:
+            for escopo, agrupamento in [
+                (f"'{DEMANDANTE_TODOS}'", f'"{dimensao}"'),       # todos os demandantes
+                ('"DEMANDANTE"', f'"DEMANDANTE", "{dimensao}"'),  # por demandante
+            ]:
+                cursor.execute(f"""
+                    INSERT INTO tf_totais_consulta
+                    SELECT
+                        ?,
+                        {escopo},
+                        "{dimensao}",
+                        COUNT(DISTINCT "Nome da Proposta/Iniciativa Estruturante"),
+                        COUNT(DISTINCT "Unidade de Conservação"),
+                        TOTAL("VALOR TOTAL ALOCADO"),
+                        TOTAL("Valor Total da Iniciativa"),
+                        TOTAL("SALDO"),
+                        CASE
+                            WHEN TOTAL("Valor Total da Iniciativa") > 0
+                            THEN ROUND(TOTAL("VALOR TOTAL ALOCADO") * 100.0 / TOTAL("Valor Total da Iniciativa"), 2)
+                            ELSE 0
+                        END
+                    FROM td_dados_base_iniciativas
+                    WHERE "{dimensao}" IS NOT NULL AND {escopo} IS NOT NULL
+                    GROUP BY {agrupamento}
+                """, (dimensao,))
 
     conn.commit()
-    
-    
-    print("✅ `tf_distribuicao_elegiveis` atualizado com novas colunas, sem cálculo automático para 'A Distribuir'!")
-    print("✅ Banco de dados atualizado com a nova tabela tf_distribuicao_elegiveis!")
 
 
-    # ----------------------------------------------------------------------------
-    # 7) TABELA PRINCIPAL DE REGRAS DE NEGÓCIO
-    # ----------------------------------------------------------------------------
-    cursor.execute(""" DROP TABLE IF EXISTS tf_cadastro_regras_negocio """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS tf_cadastro_regras_negocio (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            id_iniciativa INTEGER NOT NULL,
-            usuario TEXT NOT NULL,
-            data_hora TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-
-            objetivo_geral TEXT NOT NULL,            -- Texto simples
-            objetivos_especificos TEXT NOT NULL,     -- JSON (lista de strings)
-            introducao TEXT NOT NULL,
-            justificativa TEXT NOT NULL,
-            metodologia TEXT NOT NULL,
-            demais_informacoes TEXT,                 -- JSON (dict)
-            eixos_tematicos TEXT NOT NULL,           -- JSON (lista de dicts)
-            acoes_manejo TEXT NOT NULL,              -- JSON (dict com ações)
-            insumos TEXT NOT NULL,                   -- JSON (dict ou lista com insumos)
-            regra TEXT NOT NULL,                     -- JSON consolidado (opcional)
-            distribuicao_ucs TEXT,                   -- JSON (DataFrame ou lista)
-            formas_contratacao TEXT,                 -- JSON (dict com detalhes)
-
-            FOREIGN KEY (id_iniciativa) REFERENCES td_iniciativas(id_iniciativa)
-        )
-    """)
+def carregar_base(conn, df_base: pd.DataFrame):
+    cursor = conn.cursor()
+    df_base = df_base.copy()
 
     # ----------------------------------------------------------------------------
-    # 8) TABELA DE INSUMOS
+    # 2) TABELA FIXA DE CONSULTA (df_base)
     # ----------------------------------------------------------------------------
-    cursor.execute(""" DROP TABLE IF EXISTS td_insumos """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS td_insumos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            elemento_despesa TEXT NOT NULL,
-            especificacao_padrao TEXT,
-            descricao_insumo TEXT,
-            especificacao_tecnica TEXT,
-            preco_referencia REAL,
-            data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
+    recarregar_tabela(cursor, "td_dados_base_iniciativas", df_base)
     conn.commit()
 
+    # Snapshot colunar lido pelas páginas de Consulta (ver hooks/snapshots.py)
+    gravar_snapshot(conn, "td_dados_base_iniciativas", df_base)
 
-    # verifica se colunas origem, situacao e registrado_por existem na tabela td_insumos
-    # se não existirem, cria as colunas com valores default
-    cursor.execute("PRAGMA table_info(td_insumos)")
-    columns = cursor.fetchall()
-    columns = [col[1] for col in columns]
-    if "origem" not in columns:
-        cursor.execute(""" ALTER TABLE td_insumos ADD COLUMN origem TEXT DEFAULT 'base_funbio' """)
-    if "situacao" not in columns:
-        cursor.execute(""" ALTER TABLE td_insumos ADD COLUMN situacao TEXT DEFAULT 'ativo' """)
-    if "registrado_por" not in columns:
-        cursor.execute(""" ALTER TABLE td_insumos ADD COLUMN registrado_por TEXT DEFAULT 'admin' """)
-    conn.commit()
-
+    # Totais por dimensão exibidos nas páginas de Consulta
+    materializar_totais(conn)
 
     # ----------------------------------------------------------------------------
     # 9) POPULA AS TABELAS DIMENSÃO (demandantes, iniciativas, ações, unidades)
-    # ----------------------------------------------------------------------------
-    # Insere valores únicos
-    for table, column, name_col in [
-        ("td_demandantes", "DEMANDANTE", "nome_demandante"),
-        ("td_iniciativas", "Nome da Proposta/Iniciativa Estruturante", "nome_iniciativa"),
-        ("td_acoes_aplicacao", "AÇÃO DE APLICAÇÃO", "nome_acao")
-    ]:
-        unique_values = df_base[column].dropna().unique()
-        for value in unique_values:
-            cursor.execute(f"INSERT OR IGNORE INTO {table} ({name_col}) VALUES (?)", (value,))
-
-    # Popula td_unidades
-    unidades_unicas = df_base[["CNUC", "Unidade de Conservação", "GR", "CATEGORIA UC", "BIOMA", "UF"]].drop_duplicates()
-    for _, row in unidades_unicas.iterrows():
-        cursor.execute("""
-            INSERT OR IGNORE INTO td_unidades (cnuc, nome_unidade, gr, categoria_uc, bioma, uf)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            row["CNUC"],
-            row["Unidade de Conservação"],
-            row["GR"],
-            row["CATEGORIA UC"],
-            row["BIOMA"],
-            row["UF"]
-        ))
-
-    conn.commit()
-
-    # ----------------------------------------------------------------------------
     # 10) CRIA MAPEAMENTOS DE ID (p/ relacionar no tf_cadastros_iniciativas)
     # ----------------------------------------------------------------------------
+    # Dimensões, unidades e tabela fato são sincronizadas na mesma transação
     id_maps = {}
     for table, column, id_col, name_col in [
         ("td_demandantes", "DEMANDANTE", "id_demandante", "nome_demandante"),
         ("td_iniciativas", "Nome da Proposta/Iniciativa Estruturante", "id_iniciativa", "nome_iniciativa"),
         ("td_acoes_aplicacao", "AÇÃO DE APLICAÇÃO", "id_acao", "nome_acao")
     ]:
-        df_map = pd.read_sql_query(f"SELECT * FROM {table}", conn)
-        id_maps[table] = df_map.set_index(name_col)[id_col].to_dict()
+        id_maps[table] = popular_dimensao(cursor, table, id_col, name_col, df_base[column])
 
-    # Preenche colunas ID na df_base
-    df_base["id_demandante"] = df_base["DEMANDANTE"].map(id_maps["td_demandantes"]).fillna(-1)
-    df_base["id_iniciativa"] = df_base["Nome da Proposta/Iniciativa Estruturante"].map(id_maps["td_iniciativas"]).fillna(-1)
-    df_base["id_acao"] = df_base["AÇÃO DE APLICAÇÃO"].map(id_maps["td_acoes_aplicacao"]).fillna(-1)
+    # Sincroniza td_unidades (o CNUC é a chave)
+    unidades_unicas = (
+        df_base[["CNUC", "Unidade de Conservação", "GR", "CATEGORIA UC", "BIOMA", "UF"]]
+        .dropna(subset=["CNUC"])
+        .drop_duplicates(subset=["CNUC"])
+    )
+    unidades_unicas.columns = ["cnuc", "nome_unidade", "gr", "categoria_uc", "bioma", "uf"]
+    relatar_sincronizacao("td_unidades", sincronizar_tabela(cursor, "td_unidades", "cnuc", unidades_unicas))
 
-    # Salva na tabela fato
-    df_base.to_sql("tf_cadastros_iniciativas", conn, if_exists="replace", index=False)
+    # Preenche colunas ID na df_base
+    df_base["id_demandante"] = df_base["DEMANDANTE"].map(id_maps["td_demandantes"]).fillna(-1).astype(int)
+    df_base["id_iniciativa"] = df_base["Nome da Proposta/Iniciativa Estruturante"].map(id_maps["td_iniciativas"]).fillna(-1).astype(int)
+    df_base["id_acao"] = df_base["AÇÃO DE APLICAÇÃO"].map(id_maps["td_acoes_aplicacao"]).fillna(-1).astype(int)
+
+    # Sincroniza a tabela fato (chave calculada a partir de demandante, iniciativa, ação e UC)
+    df_base["chave"] = calcular_chaves(df_base, CHAVE_CADASTROS_INICIATIVAS)
+    relatar_sincronizacao(
+        "tf_cadastros_iniciativas",
+        sincronizar_tabela(cursor, "tf_cadastros_iniciativas", "chave", df_base),
+    )
+    conn.commit()
 
 
+def carregar_resumos(conn, df_resumos: pd.DataFrame):
+    cursor = conn.cursor()
 
     # ----------------------------------------------------------------------------
-    # Criar Mapeamento de IDs (para relacionar na tf_distribuicao_elegiveis)
+    # 3) RESUMOS SEI
     # ----------------------------------------------------------------------------
-    id_maps = {}
+    recarregar_tabela(cursor, "td_dados_resumos_sei", df_resumos, chave=["id_resumo"])
+    conn.commit()
 
-    for table, column_in_distribuicao, id_col, name_col in [
-        ("td_demandantes", "DEMANDANTE (diretoria)", "id_demandante", "nome_demandante"),
-        ("td_iniciativas", "Nome da Proposta/Iniciativa Estruturante", "id_iniciativa", "nome_iniciativa"),
-        ("td_acoes_aplicacao", "AÇÃO DE APLICAÇÃO", "id_acao", "nome_acao")
-    ]:
-        df_map = pd.read_sql_query(f"SELECT * FROM {table}", conn)
-        
-        # 🔹 Normaliza os nomes para evitar erros por espaços extras ou maiúsculas/minúsculas
-        df_map[name_col] = df_map[name_col].astype(str).str.strip().str.lower()
-        
-        id_maps[table] = df_map.set_index(name_col)[id_col].to_dict()
-
-    # 🔍 Carregar os dados da tabela `tf_distribuicao_elegiveis`
-    df_distribuicao = pd.read_sql_query("SELECT * FROM tf_distribuicao_elegiveis", conn)
-
-    # 🔹 Normalizar os nomes das colunas na tabela de distribuição de elegíveis
-    df_distribuicao["DEMANDANTE (diretoria)"] = df_distribuicao["DEMANDANTE (diretoria)"].astype(str).str.strip().str.lower()
-    df_distribuicao["Nome da Proposta/Iniciativa Estruturante"] = df_distribuicao["Nome da Proposta/Iniciativa Estruturante"].astype(str).str.strip().str.lower()
-    df_distribuicao["AÇÃO DE APLICAÇÃO"] = df_distribuicao["AÇÃO DE APLICAÇÃO"].astype(str).str.strip().str.lower()
-
-    # 🔹 Substitui os valores por IDs corretos
-    df_distribuicao["id_demandante"] = df_distribuicao["DEMANDANTE (diretoria)"].map(id_maps["td_demandantes"]).fillna(-1).astype(int)
-    df_distribuicao["id_iniciativa"] = df_distribuicao["Nome da Proposta/Iniciativa Estruturante"].map(id_maps["td_iniciativas"]).fillna(-1).astype(int)
-    df_distribuicao["id_acao"] = df_distribuicao["AÇÃO DE APLICAÇÃO"].map(id_maps["td_acoes_aplicacao"]).fillna(-1).astype(int)
-
-    # 🔹 Salvar os dados atualizados na tabela
-    df_distribuicao.to_sql("tf_distribuicao_elegiveis", conn, if_exists="replace", index=False)
-
-    # 🔍 Verificar se ainda há IDs inválidos
-    df_check = pd.read_sql_query("""
-        SELECT * FROM tf_distribuicao_elegiveis 
-        WHERE id_demandante = -1 OR id_iniciativa = -1 OR id_acao = -1
-    """, conn)
-
-    if df_check.empty:
-        print("✅ Todos os IDs foram mapeados corretamente!")
-    else:
-        print("⚠️ Existem registros sem ID correto! Verifique os nomes na tabela.")
 
+def resolver_ids_elegiveis(conn) -> pd.DataFrame:
+    """
+    Preenche id_demandante, id_iniciativa e id_acao de tf_distribuicao_elegiveis
+    com um único UPDATE ... FROM, casando o nome normalizado de cada linha com o
+    nome_normalizado das dimensões (-1 quando não há correspondência).
+
+    Retorna as linhas não resolvidas: id e, para cada dimensão sem correspondência,
+    o nome original (None nas dimensões resolvidas).
+    """
+    conn.create_function("normalizar_nome", 1, normalizar_nome, deterministic=True)
+
+    colunas = ",\n".join(
+        f"COALESCE(d{n}.{id_col}, -1) AS {id_col}"
+        for n, (tabela, id_col, coluna) in enumerate(DIMENSOES_ELEGIVEIS)
+    )
+    juncoes = "\n".join(
+        f'LEFT JOIN {tabela} d{n} ON d{n}.nome_normalizado = normalizar_nome(e."{coluna}")'
+        for n, (tabela, id_col, coluna) in enumerate(DIMENSOES_ELEGIVEIS)
+    )
+    atribuicoes = ", ".join(f"{id_col} = r.{id_col}" for tabela, id_col, coluna in DIMENSOES_ELEGIVEIS)
+    mudou = " OR ".join(
+        f"tf_distribuicao_elegiveis.{id_col} IS NOT r.{id_col}" for tabela, id_col, coluna in DIMENSOES_ELEGIVEIS
+    )
+    cursor = conn.cursor()
+    with versao_em_lote(cursor, "tf_distribuicao_elegiveis"):
+        cursor.execute(f"""
+            UPDATE tf_distribuicao_elegiveis
+            SET {atribuicoes}
+            FROM (
+                SELECT e.id, {colunas}
+                FROM tf_distribuicao_elegiveis e
+                {juncoes}
+            ) AS r
+            WHERE tf_distribuicao_elegiveis.id = r.id
+              AND ({mudou})
+        """)
     conn.commit()
 
+    nao_resolvidos = ", ".join(
+        f'CASE WHEN {id_col} = -1 THEN "{coluna}" END AS "{coluna}"'
+        for tabela, id_col, coluna in DIMENSOES_ELEGIVEIS
+    )
+    filtro = " OR ".join(f"{id_col} = -1" for tabela, id_col, coluna in DIMENSOES_ELEGIVEIS)
+    return pd.read_sql_query(
+        f"SELECT id, {nao_resolvidos} FROM tf_distribuicao_elegiveis WHERE ativo = 1 AND ({filtro}) ORDER BY id",
+        conn,
+    ).set_index("id")
+
+
+def carregar_elegiveis(conn, df_distribuicao: pd.DataFrame):
+    cursor = conn.cursor()
 
     # ----------------------------------------------------------------------------
-    # 11) CARREGA INSUMOS A PARTIR DO EXCEL base_insumos.xlsx
+    # Sincroniza tf_distribuicao_elegiveis pela chave (demandante, iniciativa,
+    # ação e UC, com os nomes normalizados): os IDs já atribuídos não mudam, e as alocações por eixo
+    # (tf_alocacao_uc_eixo), que apontam para eles, são preservadas. Linhas que
+    # saíram da planilha são inativadas, com as suas alocações.
     # ----------------------------------------------------------------------------
-    try:
-        excel_insumos_path = "dados/base_insumos.xlsx"
-        df_raw = pd.read_excel(excel_insumos_path, sheet_name=0)
-
-        # Garante colunas mínimas
-        if "Especificação Técnica (detalhamento)" not in df_raw.columns:
-            df_raw["Especificação Técnica (detalhamento)"] = ""
-
-        df_insumos = df_raw.rename(columns={
-            "Elemento de Despesa": "elemento_despesa",
-            "Especificação Padrão": "especificacao_padrao",
-            "Descrição do Insumo": "descricao_insumo",
-            "Especificação Técnica (detalhamento)": "especificacao_tecnica",
-            "Valor ATUALIZADO EM Dezembro/2024": "valor_referencia"
-        })
-
-        # # Ajusta valores numéricos
-        # df_insumos["valor_referencia"] = (
-        #     df_insumos["valor_referencia"]
-        #     .astype(str)
-        #     .str.replace(".", "")   # remove milhar
-        #     .str.replace(",", ".")  # vírgula decimal -> ponto
-        # )
-        df_insumos["valor_referencia"] = pd.to_numeric(df_insumos["valor_referencia"], errors="coerce").fillna(0.0)
-
-        # Seleciona colunas na ordem
-        df_insumos = df_insumos[[
-            "elemento_despesa",
-            "especificacao_padrao",
-            "descricao_insumo",
-            "especificacao_tecnica",
-            "valor_referencia"
-        ]]
-
-        # Renomeia "valor_referencia" -> "preco_referencia"
-        df_insumos.rename(columns={"valor_referencia": "preco_referencia"}, inplace=True)
-
-        # Insere no banco (append)
-        df_insumos.to_sql("td_insumos", conn, if_exists="append", index=False)
-        print("✅ Tabela td_insumos populada com sucesso a partir do Excel!")
-    except Exception as e:
-        print("❌ Erro ao tentar popular td_insumos:", e)
+    # TetoTotalDisponivel é calculado pelo banco (coluna gerada) e "A Distribuir"
+    # é mantida pelos gatilhos de INSERT e de UPDATE dos tetos
+    df_distribuicao = converter_tipos(cursor, "tf_distribuicao_elegiveis", df_distribuicao)
+    df_distribuicao["chave"] = calcular_chaves(df_distribuicao, CHAVE_ELEGIVEIS, normalizar=True)
+    relatar_sincronizacao(
+        "tf_distribuicao_elegiveis",
+        sincronizar_tabela(cursor, "tf_distribuicao_elegiveis", "chave", df_distribuicao),
+    )
+    conn.commit()
 
-    conn.close()
-    print("✅ Banco de dados inicializado com sucesso!")
+    # ----------------------------------------------------------------------------
+    # Relaciona os IDs das dimensões (no próprio banco)
+    # ----------------------------------------------------------------------------
+    sem_id = resolver_ids_elegiveis(conn)
+    if sem_id.empty:
+        print("✅ Todos os IDs foram mapeados corretamente!")
+    else:
+        print(f"⚠️ Existem {len(sem_id)} registros sem ID correto! Verifique os nomes na tabela:")
+        for coluna in sem_id.columns:
+            nomes = sem_id[coluna].dropna().unique()
+            if len(nomes):
+                print(f"   - {coluna}: {', '.join(map(str, nomes))}")
 
 
-def init_samge_database():
-    # Caminho do arquivo Excel com os dados do SAMGe
-    excel_path = "dados/matrizConceitual_linguagemSAMGe.xlsx"
-    db_path = "database/app_data.db"
+def carregar_insumos(conn, df_insumos: pd.DataFrame):
+    cursor = conn.cursor()
 
-    """Cria as tabelas do SAMGe no banco de dados e popula com os dados do Excel."""
-    if not os.path.exists(excel_path):
-        print("❌ Arquivo do SAMGe não encontrado!")
-        return
+    # ----------------------------------------------------------------------------
+    # 8) 11) SINCRONIZA INSUMOS A PARTIR DO EXCEL base_insumos.xlsx
+    # ----------------------------------------------------------------------------
+    # Só as linhas vindas da planilha têm chave: insumos cadastrados na
+    # aplicação, e a situação definida pelos gestores, não são alterados.
+    # Insumos que saíram da planilha são desativados.
+    df_insumos = df_insumos.copy()
+    df_insumos["chave"] = calcular_chaves(df_insumos, CHAVE_INSUMOS)
+    relatar_sincronizacao("td_insumos", sincronizar_tabela(
+        cursor,
+        "td_insumos",
+        "chave",
+        df_insumos,
+        inativar="situacao = 'desativado'",
+        reativar=None,
+        ao_atualizar=["data_atualizacao = CURRENT_TIMESTAMP"],
+    ))
+    conn.commit()
+    print("✅ Tabela td_insumos sincronizada com sucesso a partir do Excel!")
 
-    conn = sqlite3.connect(db_path)
+
+def carregar_samge(conn, df: pd.DataFrame):
     cursor = conn.cursor()
 
     # ----------------------------------------------------------------------------
     # Tabelas do SAMGe: Macroprocessos, Processos, Ações de Manejo, Atividades
     # ----------------------------------------------------------------------------
-    cursor.execute(""" DROP TABLE IF EXISTS td_samge_macroprocessos """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS td_samge_macroprocessos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            id_m TEXT UNIQUE NOT NULL,
-            nome TEXT NOT NULL,
-            descricao TEXT
+    # Cada ID é chave primária: linhas repetidas da matriz ficam só com a primeira
+    # ocorrência. As quatro tabelas são recarregadas na mesma transação.
+
+    # Insere Macroprocessos
+    macroprocessos = df[["ID-M", "Macroprocesso"]].drop_duplicates()
+    macroprocessos.columns = ["id_m", "nome"]
+    macroprocessos["descricao"] = None
+    recarregar_tabela(cursor, "td_samge_macroprocessos", macroprocessos, chave=["id_m"])
+
+    # Insere Processos
+    processos = df[["ID-P", "Processo", "Descrição do Processo", "Explicação do Processo", "ID-M"]].drop_duplicates()
+    processos.columns = ["id_p", "nome", "descricao", "explicacao", "macroprocesso_id"]
+    recarregar_tabela(cursor, "td_samge_processos", processos, chave=["id_p"])
+
+    # Insere Ações de Manejo
+    acoes_manejo = df[["ID-AC", "Ação de Manejo", "Descrição da Ação de Manejo", "Explicação da Ação de Manejo", "Entrega", "ID-P"]].drop_duplicates()
+    acoes_manejo.columns = ["id_ac", "nome", "descricao", "explicacao", "entrega", "processo_id"]
+    recarregar_tabela(cursor, "td_samge_acoes_manejo", acoes_manejo, chave=["id_ac"])
+
+    # Insere Atividades
+    atividades = df[["ID-AT", "Atividade", "Descrição da Atividade", "Explicação da Atividade", "Subentrega", "ID-AC"]].drop_duplicates()
+    atividades.columns = ["id_at", "nome", "descricao", "explicacao", "subentrega", "acao_manejo_id"]
+    recarregar_tabela(cursor, "td_samge_atividades", atividades, chave=["id_at"])
+    conn.commit()
+
+
+# ---------------------------------------------------------
+# Execução das etapas (DAG)
+# ---------------------------------------------------------
+# Cada etapa lê a sua planilha e carrega as suas tabelas. As leituras sem
+# cache rodam em paralelo num pool de processos, quando o volume compensa o
+# custo de iniciar os processos; as cargas rodam em série, numa única
+# conexão, na ordem das dependências. Cada etapa de cada execução
+# é registrada em etl_runs (tempos, linhas e bytes lidos).
+ETAPAS = {
+    "samge": (ler_samge, carregar_samge),
+    "base": (ler_base_consolidada, carregar_base),
+    "resumos": (ler_resumos_sei, carregar_resumos),
+    "elegiveis": (ler_elegiveis, carregar_elegiveis),
+    "insumos": (ler_insumos, carregar_insumos),
+}
+
+# Etapas carregadas por init_database (o SAMGe fica com init_samge_database)
+ETAPAS_APLICACAO = ["base", "resumos", "elegiveis", "insumos"]
+
+
+def ordenar_etapas(etapas: list) -> list:
+    """Ordena `etapas` de modo que cada uma venha depois das suas dependências."""
+    ordem = []
+
+    def visitar(etapa, caminho=()):
+        if etapa in ordem:
+            return
+        if etapa in caminho:
+            raise ValueError(f"Dependência circular entre as etapas: {' -> '.join(caminho + (etapa,))}")
+        for dependencia in DEPENDENCIAS.get(etapa, []):
+            if dependencia in etapas:
+                visitar(dependencia, caminho + (etapa,))
+        ordem.append(etapa)
+
+    for etapa in FONTES:
+        if etapa in etapas:
+            visitar(etapa)
+    return ordem
+
+
+def ler_etapa(fonte: str, sha: str):
+    """
+    Lê a planilha da etapa (ou o cache) e mede a leitura.
+    Roda no pool de processos, então só recebe e devolve objetos serializáveis.
+    """
+    em_cache = os.path.exists(caminho_cache(fonte, sha))
+    inicio = time.perf_counter()
+    df, parseado_em = ler_fonte(fonte, sha, ETAPAS[fonte][0])
+    metricas = {
+        "segundos_leitura": time.perf_counter() - inicio,
+        "linhas_lidas": len(df),
+        "bytes_lidos": os.path.getsize(caminho_cache(fonte, sha) if em_cache else FONTES[fonte]),
+        "leitura_em_cache": int(em_cache),
+    }
+    return df, parseado_em, metricas
+
+
+def registrar_execucao(conn, execucao: int, etapa: str, situacao: str, incremental: bool,
+                       iniciada_em: datetime, **metricas) -> dict:
+    """Grava uma linha em etl_runs e a retorna como dict."""
+    registro = {
+        "execucao": execucao,
+        "etapa": etapa,
+        "situacao": situacao,
+        "incremental": int(incremental),
+        "iniciada_em": iniciada_em.isoformat(timespec="seconds"),
+        **metricas,
+    }
+    colunas = ", ".join(registro)
+    marcadores = ", ".join("?" for _ in registro)
+    conn.execute(f"INSERT INTO etl_runs ({colunas}) VALUES ({marcadores})", tuple(registro.values()))
+    conn.commit()
+    return registro
+
+
+def executar_etl(conn, etapas: list, incremental: bool = False, paralelo: bool = True) -> list[dict]:
+    """
+    Executa as `etapas` do ETL respeitando DEPENDENCIAS.
+
+    No modo incremental, uma etapa é ignorada se a planilha não mudou e
+    nenhuma das suas dependências vai ser recarregada. As planilhas sem
+    cache são lidas em paralelo (processos separados); as cargas são
+    feitas em série, em ordem. Uma falha interrompe o ETL, exceto nas
+    ETAPAS_OPCIONAIS. Retorna os registros gravados em etl_runs.
+    """
+    ordem = ordenar_etapas(etapas)
+    execucao = conn.execute("SELECT COALESCE(MAX(execucao), 0) + 1 FROM etl_runs").fetchone()[0]
+    registros = []
+
+    # Etapas a refazer (a dependência recarregada invalida as dependentes)
+    shas = {fonte: calcular_sha256(FONTES[fonte]) for fonte in ordem}
+    pendentes = []
+    for fonte in ordem:
+        if (not incremental or fonte_alterada(conn, fonte, shas[fonte])
+                or any(dep in pendentes for dep in DEPENDENCIAS.get(fonte, []))):
+            pendentes.append(fonte)
+        else:
+            print(f"⏭️ {FONTES[fonte]} sem alterações, etapa '{fonte}' ignorada.")
+            registros.append(registrar_execucao(conn, execucao, fonte, "ignorada", incremental, datetime.now()))
+
+    # Leituras sem cache vão para o pool; as com cache são lidas na hora da carga
+    sem_cache = [fonte for fonte in pendentes if not os.path.exists(caminho_cache(fonte, shas[fonte]))]
+    bytes_sem_cache = sum(os.path.getsize(FONTES[fonte]) for fonte in sem_cache)
+    pool, leituras = None, {}
+    if paralelo and len(sem_cache) > 1 and bytes_sem_cache >= MIN_BYTES_LEITURA_PARALELA:
+        # "spawn": o processo do Streamlit tem threads, o que torna o fork inseguro
+        pool = ProcessPoolExecutor(
+            max_workers=min(len(sem_cache), MAX_PROCESSOS_LEITURA),
+            mp_context=multiprocessing.get_context("spawn"),
         )
-    """)
+        leituras = {fonte: pool.submit(ler_etapa, fonte, shas[fonte]) for fonte in sem_cache}
 
-    cursor.execute(""" DROP TABLE IF EXISTS td_samge_processos """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS td_samge_processos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            id_p TEXT UNIQUE NOT NULL,
-            macroprocesso_id TEXT NOT NULL,
-            nome TEXT NOT NULL,
-            descricao TEXT,
-            explicacao TEXT,
-            FOREIGN KEY (macroprocesso_id) REFERENCES td_samge_macroprocessos(id_m)
+    falhas = set()
+    try:
+        for fonte in pendentes:
+            iniciada_em = datetime.now()
+            dependencias_com_falha = [dep for dep in DEPENDENCIAS.get(fonte, []) if dep in falhas]
+            if dependencias_com_falha:
+                falhas.add(fonte)
+                registros.append(registrar_execucao(
+                    conn, execucao, fonte, "ignorada", incremental, iniciada_em,
+                    erro=f"dependência com falha: {', '.join(dependencias_com_falha)}",
+                ))
+                continue
+
+            metricas = {}
+            try:
+                if fonte in leituras:
+                    df, parseado_em, metricas = leituras[fonte].result()
+                else:
+                    df, parseado_em, metricas = ler_etapa(fonte, shas[fonte])
+
+                inicio_carga = time.perf_counter()
+                ETAPAS[fonte][1](conn, df)
+                registrar_carga(conn, fonte, shas[fonte], parseado_em)
+                metricas["segundos_carga"] = time.perf_counter() - inicio_carga
+                metricas["segundos_total"] = metricas["segundos_leitura"] + metricas["segundos_carga"]
+                metricas["linhas_carregadas"] = sum(
+                    conn.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+                    for tabela in TABELAS_POR_FONTE[fonte]
+                )
+                registros.append(registrar_execucao(conn, execucao, fonte, "carregada", incremental, iniciada_em, **metricas))
+            except Exception as e:
+                conn.rollback()
+                falhas.add(fonte)
+                registros.append(registrar_execucao(
+                    conn, execucao, fonte, "erro", incremental, iniciada_em, **metricas, erro=str(e),
+                ))
+                if fonte not in ETAPAS_OPCIONAIS:
+                    raise
+                print(f"❌ Erro na etapa '{fonte}':", e)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    for registro in registros:
+        if registro["situacao"] == "carregada":
+            print(
+                f"⏱️ {registro['etapa']}: leitura {registro['segundos_leitura']:.2f}s"
+                f"{' (cache)' if registro['leitura_em_cache'] else ''}, "
+                f"carga {registro['segundos_carga']:.2f}s, {registro['linhas_carregadas']} linhas"
+            )
+    return registros
+
+
+# ---------------------------------------------------------
+# Credenciais do usuário admin
+# ---------------------------------------------------------
+CHAVES_ADMIN = ["ADMIN_CPF", "ADMIN_NOME", "ADMIN_EMAIL", "ADMIN_SETOR", "ADMIN_PERFIL"]
+
+# Arquivo TOML lido quando as credenciais não estão no ambiente
+ARQUIVO_CREDENCIAIS = ".streamlit/secrets.toml"
+
+
+def ler_toml(caminho: str) -> dict:
+    try:
+        import tomllib
+    except ImportError:  # Python < 3.11: o pacote toml vem com o Streamlit
+        import toml
+        return toml.load(caminho)
+    with open(caminho, "rb") as arquivo:
+        return tomllib.load(arquivo)
+
+
+def credenciais_admin(arquivo: str | None = None) -> dict:
+    """
+    Credenciais do usuário admin, na ordem:
+    variáveis de ambiente ADMIN_*; arquivo TOML (`arquivo`, a variável
+    ADMIN_CREDENCIAIS ou .streamlit/secrets.toml); [Secrets] do Streamlit.
+    Falha (KeyError) se faltar alguma chave.
+    """
+    if all(os.environ.get(chave) for chave in CHAVES_ADMIN):
+        return {chave: os.environ[chave] for chave in CHAVES_ADMIN}
+
+    arquivo = arquivo or os.environ.get("ADMIN_CREDENCIAIS") or ARQUIVO_CREDENCIAIS
+    origem = ler_toml(arquivo) if os.path.exists(arquivo) else st.secrets
+    faltando = [chave for chave in CHAVES_ADMIN if chave not in origem]
+    if faltando:
+        raise KeyError(f"Credenciais do admin incompletas (faltam {', '.join(faltando)})")
+    return {chave: str(origem[chave]) for chave in CHAVES_ADMIN}
+
+
+def credenciais_disponiveis() -> dict | None:
+    """
+    credenciais_admin() para a inicialização da aplicação, ou None se não
+    houver credenciais configuradas: os usuários padrão não são criados, com
+    um aviso, e a aplicação sobe mesmo assim.
+    """
+    try:
+        return credenciais_admin()
+    except (KeyError, FileNotFoundError) as e:
+        print(
+            f"⚠️ Usuários padrão não criados: {e}. Defina as variáveis ADMIN_* (ou "
+            ".streamlit/secrets.toml) e rode `python -m init_db incremental` para criá-los."
         )
-    """)
+        return None
+
 
-    cursor.execute(""" DROP TABLE IF EXISTS td_samge_acoes_manejo """)
+# ---------------------------------------------------------
+# Inicialização do banco
+# ---------------------------------------------------------
+def criar_usuarios_padrao(conn, credenciais: dict):
+    """Cria (ou ignora, se já existirem) o usuário admin master e o usuário COCAM."""
+    cursor = conn.cursor()
+
+    # Cria (ou ignora) um usuário admin master
     cursor.execute("""
-        CREATE TABLE IF NOT EXISTS td_samge_acoes_manejo (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            id_ac TEXT UNIQUE NOT NULL,
-            processo_id TEXT NOT NULL,
-            nome TEXT NOT NULL,
-            descricao TEXT,
-            explicacao TEXT,
-            entrega TEXT,
-            FOREIGN KEY (processo_id) REFERENCES td_samge_processos(id_p)
-        )
-    """)
+        INSERT OR IGNORE INTO tf_usuarios (cpf, nome_completo, email, setor_demandante, perfil)
+        VALUES (?, ?, ?, ?, ?)
+    """, (
+        credenciais["ADMIN_CPF"],
+        credenciais["ADMIN_NOME"],
+        credenciais["ADMIN_EMAIL"],
+        credenciais["ADMIN_SETOR"],
+        credenciais["ADMIN_PERFIL"],
+    ))
 
-    cursor.execute(""" DROP TABLE IF EXISTS td_samge_atividades """)
+    # Cria (ou ignora) um usuário com perfil cocam
     cursor.execute("""
-        CREATE TABLE IF NOT EXISTS td_samge_atividades (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            id_at TEXT UNIQUE NOT NULL,
-            acao_manejo_id TEXT NOT NULL,
-            nome TEXT NOT NULL,
-            descricao TEXT,
-            explicacao TEXT,
-            subentrega TEXT,
-            FOREIGN KEY (acao_manejo_id) REFERENCES td_samge_acoes_manejo(id_ac)
-        )
-    """)
+        INSERT OR IGNORE INTO tf_usuarios (cpf, nome_completo, email, setor_demandante, perfil)
+        VALUES (?, ?, ?, ?, ?)
+    """, ("11111111111", "COCAM", " ", "COCAM", "cocam"))
 
-    conn.commit()
 
-    # Lê o Excel do SAMGe
-    df = pd.read_excel(excel_path, engine="openpyxl")
+def init_database(incremental: bool = False, etapas: list = ETAPAS_APLICACAO,
+                  credenciais: dict | None = None, criar_usuarios: bool = True,
+                  db_path: str = DB_PATH, podar_snapshots: bool = True) -> list[dict]:
+    """
+    Cria/atualiza as tabelas da aplicação a partir das planilhas de dados/.
+
+    Com incremental=True, só recarrega as tabelas alimentadas por planilhas
+    que mudaram desde a última carga (ver etl_manifesto); senão, todas as
+    planilhas são relidas. Em ambos os casos, usuários, regras de negócio e
+    IDs já atribuídos são preservados. `credenciais` são as do usuário admin
+    (padrão: credenciais_admin()); com criar_usuarios=False (build da imagem,
+    sem segredos), os usuários padrão não são criados. Com
+    podar_snapshots=False (cópia da prévia da reconstrução), as versões
+    antigas dos snapshots, ainda usadas pelo banco em uso, são mantidas.
+    Retorna os registros de etl_runs.
+    """
+    # 📌 Criando diretório do banco de dados se não existir
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = abrir_conexao(db_path)
 
-    # Padroniza colunas
-    df.columns = df.columns.str.strip()
+    # Cria as tabelas e índices que faltarem (ver hooks/migracoes.py)
+    aplicar_migracoes(conn)
 
     # ----------------------------------------------------------------------------
-    # Insere Macroprocessos
+    # 1) USUÁRIOS
     # ----------------------------------------------------------------------------
-    macroprocessos = df[["ID-M", "Macroprocesso"]].drop_duplicates()
-    macroprocessos.columns = ["id_m", "nome"]
-    macroprocessos["descricao"] = None
-    macroprocessos.to_sql("td_samge_macroprocessos", conn, if_exists="replace", index=False)
+    # Credenciais do usuário admin (ambiente, arquivo ou [Secrets] do Streamlit)
+    if criar_usuarios:
+        criar_usuarios_padrao(conn, credenciais or credenciais_admin())
+        conn.commit()
 
     # ----------------------------------------------------------------------------
-    # Insere Processos
+    # 2) a 11) BASE CONSOLIDADA, RESUMOS SEI, ELEGÍVEIS E INSUMOS
     # ----------------------------------------------------------------------------
-    processos = df[["ID-P", "Processo", "Descrição do Processo", "Explicação do Processo", "ID-M"]].drop_duplicates()
-    processos.columns = ["id_p", "nome", "descricao", "explicacao", "macroprocesso_id"]
-    processos.to_sql("td_samge_processos", conn, if_exists="replace", index=False)
-
-    DB_PATH = "database/app_data.db"
-    
-    def remover_processos_duplicados():
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+    try:
+        registros = executar_etl(conn, etapas, incremental)
+        if podar_snapshots:
+            remover_snapshots_antigos(conn)
+    finally:
+        conn.close()
+    print("✅ Banco de dados inicializado com sucesso!")
+    return registros
 
-        # 🔍 Identificar registros duplicados (com mesmo id_p)
-        df_processos = pd.read_sql_query("SELECT * FROM td_samge_processos", conn)
 
-        if df_processos.duplicated(subset=["id_p"]).any():
-            print("⚠️ Processos duplicados encontrados! Removendo duplicatas...")
+def init_samge_database(incremental: bool = False, db_path: str = DB_PATH) -> list[dict]:
+    """
+    Cria as tabelas do SAMGe no banco de dados e popula com os dados do Excel.
+    Retorna os registros de etl_runs (vazio se a planilha não existir).
+    """
+    if not os.path.exists(FONTES["samge"]):
+        print("❌ Arquivo do SAMGe não encontrado!")
+        return []
 
-            # Mantemos apenas o primeiro registro de cada `id_p`
-            df_processos = df_processos.drop_duplicates(subset=["id_p"], keep="first")
+    conn = abrir_conexao(db_path)
+    aplicar_migracoes(conn)
 
-            # Apaga os registros duplicados da tabela
-            cursor.execute("DELETE FROM td_samge_processos")
+    try:
+        registros = executar_etl(conn, ["samge"], incremental)
+    finally:
+        conn.close()
+    if any(registro["situacao"] == "carregada" for registro in registros):
+        print("✅ Banco de dados SAMGe atualizado com sucesso!")
+    return registros
+
+
+# ---------------------------------------------------------
+# Verificação do banco
+# ---------------------------------------------------------
+def fontes_divergentes(conn) -> list[str]:
+    """Fontes cujas planilhas em dados/ não batem com o manifesto (ou cujas tabelas estão vazias)."""
+    return [
+        fonte for fonte, caminho in FONTES.items()
+        if os.path.exists(caminho) and fonte_alterada(conn, fonte, calcular_sha256(caminho))
+    ]
 
-            # Insere novamente os registros sem duplicatas
-            df_processos.to_sql("td_samge_processos", conn, if_exists="append", index=False)
 
-            conn.commit()
-            print("✅ Processos duplicados removidos!")
-        else:
-            print("✅ Nenhum processo duplicado encontrado.")
+def verificar_banco(db_path: str = DB_PATH) -> list[str]:
+    """
+    Confere, sem alterar nada, se o banco está íntegro e em dia com o esquema
+    e com as planilhas de dados/. Retorna a lista de problemas (vazia se ok).
+    """
+    if not os.path.exists(db_path):
+        return [f"Banco {db_path} não encontrado"]
 
+    problemas = []
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        integridade = conn.execute("PRAGMA quick_check").fetchone()[0]
+        if integridade != "ok":
+            problemas.append(f"Integridade: {integridade}")
+
+        tabelas = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        versao = (
+            conn.execute("SELECT COALESCE(MAX(versao), 0) FROM schema_version").fetchone()[0]
+            if "schema_version" in tabelas else 0
+        )
+        if versao < VERSAO_ESQUEMA:
+            problemas.append(f"Esquema na versão {versao} (atual: {VERSAO_ESQUEMA})")
+            return problemas
+
+        for caminho in FONTES.values():
+            if not os.path.exists(caminho):
+                problemas.append(f"Planilha {caminho} não encontrada")
+        for fonte in fontes_divergentes(conn):
+            problemas.append(f"Etapa '{fonte}' desatualizada ou vazia ({FONTES[fonte]})")
+    finally:
         conn.close()
+    return problemas
 
-    # Executar a remoção de duplicatas
-    remover_processos_duplicados()
 
-    # ----------------------------------------------------------------------------
-    # Insere Ações de Manejo
-    # ----------------------------------------------------------------------------
-    acoes_manejo = df[["ID-AC", "Ação de Manejo", "Descrição da Ação de Manejo", "Explicação da Ação de Manejo", "Entrega", "ID-P"]].drop_duplicates()
-    acoes_manejo.columns = ["id_ac", "nome", "descricao", "explicacao", "entrega", "processo_id"]
-    acoes_manejo.to_sql("td_samge_acoes_manejo", conn, if_exists="replace", index=False)
+# ---------------------------------------------------------
+# Inicialização da aplicação
+# ---------------------------------------------------------
+def marca_pronto(db_path: str, shas: dict) -> dict:
+    """Conteúdo da marca de banco pronto: esquema, arquivo do banco e planilhas conferidas."""
+    return {
+        "versao_esquema": VERSAO_ESQUEMA,
+        "inode": os.stat(db_path).st_ino,
+        "fontes": shas,
+    }
 
-    # ----------------------------------------------------------------------------
-    # Insere Atividades
-    # ----------------------------------------------------------------------------
-    atividades = df[["ID-AT", "Atividade", "Descrição da Atividade", "Explicação da Atividade", "Subentrega", "ID-AC"]].drop_duplicates()
-    atividades.columns = ["id_at", "nome", "descricao", "explicacao", "subentrega", "acao_manejo_id"]
-    atividades.to_sql("td_samge_atividades", conn, if_exists="replace", index=False)
 
-    conn.close()
-    print("✅ Banco de dados SAMGe atualizado com sucesso!")
+def banco_pronto(db_path: str, shas: dict) -> bool:
+    """Indica se a marca `<banco>.pronto` confere com o banco atual e com as planilhas."""
+    try:
+        with open(f"{db_path}.pronto", encoding="utf-8") as arquivo:
+            return json.load(arquivo) == marca_pronto(db_path, shas)
+    except (OSError, ValueError):
+        return False
+
+
+def gravar_marca_pronto(db_path: str, shas: dict):
+    """Grava a marca `<banco>.pronto` para o banco atual e as planilhas conferidas."""
+    with open(f"{db_path}.pronto", "w", encoding="utf-8") as arquivo:
+        json.dump(marca_pronto(db_path, shas), arquivo)
+
+
+def construir_banco(db_path: str = DB_PATH, credenciais: dict | None = None):
+    """
+    Constrói o banco do zero ao lado do definitivo e só então o move para
+    `db_path` (os.replace): um banco pela metade nunca fica visível. Sem
+    `credenciais`, os usuários padrão não são criados.
+    """
+    temporario = f"{db_path}.construindo"
+    for sufixo in ("", "-wal", "-shm"):
+        if os.path.exists(temporario + sufixo):
+            os.remove(temporario + sufixo)
+    # Ao fechar a última conexão, o SQLite incorpora o WAL ao arquivo principal
+    init_database(etapas=list(ETAPAS), credenciais=credenciais, criar_usuarios=credenciais is not None,
+                  db_path=temporario)
+    os.replace(temporario, db_path)
+
+
+@st.cache_resource(show_spinner="Preparando o banco de dados...")
+def preparar_dados(db_path: str = DB_PATH) -> list[str]:
+    """
+    Uma vez por processo, antes da primeira página: o banco vem pronto da
+    imagem (python -m init_db full no build), então normalmente só se confere
+    o manifesto com as planilhas de dados/ e se garantem os usuários padrão
+    (sem credenciais configuradas, só com um aviso; ver credenciais_disponiveis).
+    Se o banco não existir, é construído; se alguma planilha divergir do
+    manifesto, as etapas afetadas são recarregadas (incremental).
+
+    Entre processos, o trabalho roda sob a trava `<banco>.lock` e termina
+    gravando a marca `<banco>.pronto`: quem chega depois espera a trava e,
+    encontrando a marca em dia, não refaz nada. Dentro do processo, o
+    st.cache_resource faz as demais sessões esperarem a primeira.
+    Retorna as fontes que divergiam.
+    """
+    shas = {fonte: calcular_sha256(caminho) for fonte, caminho in FONTES.items() if os.path.exists(caminho)}
+    if banco_pronto(db_path, shas):
+        preparar_banco(db_path)
+        return []
+
+    with trava_arquivo(f"{db_path}.lock"):
+        # Outro processo pode ter preparado o banco enquanto este esperava
+        if banco_pronto(db_path, shas):
+            preparar_banco(db_path)
+            return []
+
+        # Sem credenciais configuradas, a aplicação sobe sem os usuários padrão
+        credenciais = credenciais_disponiveis()
+        if not os.path.exists(db_path):
+            construir_banco(db_path, credenciais)
+            divergentes = list(FONTES)
+        else:
+            preparar_banco(db_path)
+            conn = abrir_conexao(db_path)
+            try:
+                divergentes = fontes_divergentes(conn)
+            finally:
+                conn.close()
+
+            if divergentes:
+                print(f"🔄 Planilhas diferentes do manifesto: {', '.join(divergentes)}")
+                init_database(incremental=True, etapas=list(ETAPAS), credenciais=credenciais,
+                              criar_usuarios=credenciais is not None, db_path=db_path)
+            elif credenciais is not None:
+                executar_escrita(criar_usuarios_padrao, credenciais).result()
+
+        preparar_banco(db_path)
+        gravar_marca_pronto(db_path, shas)
+    return divergentes
+
+
+# ---------------------------------------------------------
+# Linha de comando: python -m init_db <comando>
+# ---------------------------------------------------------
+# Roda o ETL sem o Streamlit (cron, build do container). Deve ser executado
+# na raiz do projeto; o código de saída é diferente de zero em caso de falha.
+def main(argv: list | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m init_db",
+        description="Carga do banco de dados a partir das planilhas de dados/.",
+    )
+    carga = argparse.ArgumentParser(add_help=False)
+    carga.add_argument(
+        "--credenciais",
+        help="arquivo TOML com as chaves ADMIN_* (padrão: variáveis de ambiente ou .streamlit/secrets.toml)",
+    )
+    carga.add_argument(
+        "--sem-usuarios",
+        action="store_true",
+        help="não cria os usuários padrão nem lê credenciais (ex.: build da imagem)",
+    )
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    comandos.add_parser("full", parents=[carga], help="relê todas as planilhas e recarrega todas as etapas")
+    comandos.add_parser("incremental", parents=[carga], help="recarrega só as etapas cujas planilhas mudaram")
+    for nome, etapa in [("samge-only", "samge"), ("insumos-only", "insumos")]:
+        subparser = comandos.add_parser(nome, parents=[carga], help=f"recarrega só a etapa '{etapa}'")
+        subparser.add_argument("--incremental", action="store_true", help="ignora a etapa se a planilha não mudou")
+    comandos.add_parser("verify", help="confere integridade, esquema e manifesto (não altera o banco)")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    try:
+        if args.comando == "verify":
+            problemas = verificar_banco()
+            for problema in problemas:
+                print(f"❌ {problema}")
+            if not problemas:
+                print("✅ Banco íntegro e em dia com as planilhas.")
+            return 1 if problemas else 0
+
+        if args.comando == "samge-only":
+            registros = init_samge_database(incremental=args.incremental)
+            if not registros:
+                return 1
+        else:
+            credenciais = None if args.sem_usuarios else credenciais_admin(args.credenciais)
+            if args.comando == "insumos-only":
+                etapas, incremental = ["insumos"], args.incremental
+            else:
+                etapas, incremental = list(ETAPAS), args.comando == "incremental"
+            registros = init_database(incremental, etapas, credenciais, criar_usuarios=not args.sem_usuarios)
+    except Exception as e:
+        print(f"❌ {args.comando} falhou após {time.perf_counter() - inicio:.2f}s: {e}", file=sys.stderr)
+        return 1
+
+    erros = [registro["etapa"] for registro in registros if registro["situacao"] == "erro"]
+    print(f"⏱️ {args.comando}: {time.perf_counter() - inicio:.2f}s no total")
+    if erros:
+        print(f"❌ Etapas com erro: {', '.join(erros)}", file=sys.stderr)
+        return 1
+    return 0
 
 
 if __name__ == "__main__":
-    init_samge_database()
-    init_database()
+    sys.exit(main())
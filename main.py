@@ -1,19 +1,21 @@
 import streamlit as st
-import sqlite3
 import os
 import time
 import base64
 
-# Importe as funções de inicialização (se necessário)
-from init_db import init_database, init_samge_database
+# Importe a função de inicialização
+from init_db import preparar_dados
+from hooks.aquecimento import iniciar_aquecimento
+from hooks.conexao import get_connection
+from hooks.escrita import escrever
 
-# Caminho onde o DB será criado
-db_path = "database/app_data.db"
+# Banco pronto para uso (uma vez por processo): o banco vem construído da
+# imagem; aqui só se aplicam as migrações pendentes e se confere o manifesto
+# das planilhas, recarregando as etapas que divergirem (ou criando o banco)
+preparar_dados()
 
-# Verifica se o banco já existe. Caso não exista, cria.
-if not os.path.exists(db_path):
-    init_database()
-    init_samge_database()
+# Pré-calcula em segundo plano as consultas das páginas (uma vez por processo)
+iniciar_aquecimento()
 
 # --------------------------------------------------
 # Configuração da página
@@ -83,26 +85,20 @@ st.markdown(
 # Funções de banco de dados
 # --------------------------------------------------
 def buscar_usuario(cpf):
-    conn = sqlite3.connect(db_path)
+    conn = get_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT nome_completo, email, setor_demandante, perfil FROM tf_usuarios WHERE cpf = ?", (cpf,))
     usuario = cursor.fetchone()
-    conn.close()
     return usuario  # Retorna None se não existir
 
 def atualizar_setor(cpf, novo_setor):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE tf_usuarios SET setor_demandante = ? WHERE cpf = ?", (novo_setor, cpf))
-    conn.commit()
-    conn.close()
+    escrever("UPDATE tf_usuarios SET setor_demandante = ? WHERE cpf = ?", (novo_setor, cpf))
 
 def obter_setores_demandantes():
-    conn = sqlite3.connect(db_path)
+    conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute("SELECT DISTINCT nome_demandante FROM td_demandantes ORDER BY nome_demandante")
+    cursor.execute("SELECT DISTINCT nome_demandante FROM td_demandantes WHERE ativo = 1 ORDER BY nome_demandante")
     setores = [row[0] for row in cursor.fetchall()]
-    conn.close()
     return setores
 
 def validar_cpf(cpf):
@@ -1,11 +1,13 @@
 import streamlit as st
 import pandas as pd
-import sqlite3
 import os
 import numpy as np
 
-from init_db import init_database
-from init_db import init_samge_database
+from init_db import DEMANDANTE_TODOS
+from hooks.cache import limpar_caches
+from hooks.conexao import get_connection
+from hooks.consultas import load_data_from_db
+from hooks.reconstrucao import painel_reconstrucao
 
 
 db_path = "database/app_data.db"
@@ -31,15 +33,6 @@ st.set_page_config(
 
 st.subheader("Informações sobre as Iniciativas Estruturantes")
 
-@st.cache_data
-def load_data_from_db():
-    """Carrega os dados da tabela 'td_dados_base_iniciativas' do SQLite."""
-    conn = sqlite3.connect(db_path)
-    df = pd.read_sql_query("SELECT * FROM td_dados_base_iniciativas", conn)
-    conn.close()
-    return df
-
-
 
 # 📌 Verifica se o banco de dados existe antes de continuar
 if not os.path.exists(db_path):
@@ -126,19 +119,11 @@ else:
         if st.session_state.get("usuario_logado") and st.session_state.get("perfil") == "admin":
             # 📌 Expander de Configurações (agora no final)
             with st.sidebar.expander("⚙️ Configurações", expanded=False):
-                if st.button("🔄 Recriar Banco de Dados"):
-                    if os.path.exists(db_path):
-                        os.remove(db_path)
-                    try:
-                        init_database()
-                        init_samge_database()
-                        st.success("Banco de dados recriado com sucesso!")
-                        st.rerun()
-                    except Exception as e:
-                        st.error(f"Erro ao recriar o banco: {e}")
+                # Constrói e valida o banco novo ao lado do atual (ver hooks/reconstrucao.py)
+                painel_reconstrucao()
 
                 if st.button("🗑 Limpar Cache"):
-                    st.cache_data.clear()
+                    limpar_caches()
                     st.success("Cache limpo com sucesso!")
                     st.rerun()
 
@@ -182,8 +167,8 @@ else:
                 unsafe_allow_html=True
             )
 
-        # 📌 Função para Destacar Totais na Tabela e Identificar Itens Omissos
-        def destacar_totais(df, coluna_grupo):
+        # 📌 Totais calculados em pandas (usado quando há filtros além do demandante)
+        def calcular_totais(df, coluna_grupo):
             df_total = df.groupby(coluna_grupo).agg({
                 "Nome da Proposta/Iniciativa Estruturante": "nunique",
                 "Unidade de Conservação": "nunique",
@@ -204,6 +189,50 @@ else:
 
             # 🔥 Garante que os valores sejam numéricos e sem infinitos
             df_total["% Valor Alocado"] = df_total["% Valor Alocado"].replace([np.inf, -np.inf], 0).fillna(0).round(2)
+            return df_total
+
+        # 📌 Totais pré-calculados no ETL (tabela tf_totais_consulta)
+        def carregar_totais(coluna_grupo, demandante):
+            conn = get_connection()
+            try:
+                df_total = pd.read_sql_query("""
+                    SELECT grupo, total_iniciativas, total_ucs, valor_total_alocado,
+                           valor_total_iniciativa, saldo, percentual_alocado
+                    FROM tf_totais_consulta
+                    WHERE dimensao = ? AND demandante = ?
+                    ORDER BY grupo
+                """, conn, params=(coluna_grupo, demandante))
+            except Exception:
+                return None  # banco gerado antes da tabela de totais
+
+            if df_total.empty:
+                return None
+            return df_total.rename(columns={
+                "grupo": coluna_grupo,
+                "total_iniciativas": "Total de Iniciativas",
+                "total_ucs": "Total de UCs",
+                "valor_total_alocado": "VALOR TOTAL ALOCADO",
+                "valor_total_iniciativa": "Valor Total da Iniciativa",
+                "saldo": "SALDO",
+                "percentual_alocado": "% Valor Alocado"
+            })
+
+        # 📌 Os totais pré-calculados só valem quando não há filtros além do demandante
+        filtros_extras = [filtro_uc, filtro_acao, filtro_gr, filtro_uf, filtro_bioma, filtro_categoria]
+        if any(filtro not in ("Todos", "Todas") for filtro in filtros_extras):
+            escopo_totais = None
+        elif st.session_state["perfil"] != "admin":
+            escopo_totais = st.session_state["setor"]
+        elif filtro_demandante != "Todos":
+            escopo_totais = filtro_demandante
+        else:
+            escopo_totais = DEMANDANTE_TODOS
+
+        # 📌 Função para Destacar Totais na Tabela e Identificar Itens Omissos
+        def destacar_totais(df, coluna_grupo):
+            df_total = carregar_totais(coluna_grupo, escopo_totais) if escopo_totais is not None else None
+            if df_total is None:
+                df_total = calcular_totais(df, coluna_grupo)
 
             # 📌 Criando a barra de progresso com valores limitados entre 0 e 100
             def gerar_barra_progresso(perc):
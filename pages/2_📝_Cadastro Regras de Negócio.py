@@ -3,16 +3,18 @@
 ###############################################################################
 
 import streamlit as st
-import sqlite3
 import json
 import pandas as pd
 import time as time
 
-import streamlit as st
-import sqlite3
-import json
-import pandas as pd
-import time as time
+from hooks.alocacoes import alocacoes_por_eixo, gravar_alocacoes
+from hooks.cache import cache_por_tabelas
+from hooks.conexao import get_connection
+from hooks.consultas import get_iniciativas_usuario, get_options_from_table
+from hooks.escrita import executar_escrita
+from hooks.insumos_crud import catalogo_insumos
+from hooks.migracoes import preparar_banco
+from hooks.regras import gravar_itens_regra, marcar_regra_atual, remover_itens_regra
 
 # -----------------------------------------------------------------------------
 #                     Verificação de Login e Configurações de Página
@@ -42,51 +44,28 @@ st.markdown("""
 # Caminho do banco de dados
 DB_PATH = "database/app_data.db"
 
+# Migrações pendentes do esquema (tabelas filhas das regras, índices), uma vez por processo
+preparar_banco()
+
 
 # -----------------------------------------------------------------------------
 #                          FUNÇÕES AUXILIARES / CACHED
 # -----------------------------------------------------------------------------
-@st.cache_data
-def get_iniciativas_usuario(perfil: str, setor: str) -> pd.DataFrame:
-    """
-    Retorna as iniciativas disponíveis para o usuário,
-    filtradas por perfil e setor, se não for 'admin'.
-    """
-    conn = sqlite3.connect(DB_PATH)
-    query = "SELECT id_iniciativa, nome_iniciativa FROM td_iniciativas"
-    if perfil != "admin":
-        query += """
-            WHERE id_iniciativa IN (
-               SELECT id_iniciativa 
-               FROM tf_cadastros_iniciativas 
-               WHERE id_demandante = (
-                  SELECT id_demandante FROM td_demandantes WHERE nome_demandante = ?
-               )
-            )
-        """
-        iniciativas = pd.read_sql_query(query, conn, params=[setor])
-    else:
-        iniciativas = pd.read_sql_query(query, conn)
-    conn.close()
-    return iniciativas
-
-
-@st.cache_data
+@cache_por_tabelas("tf_regra_atual", "tf_cadastro_regras_negocio", max_entradas=256, max_bytes=8 * 1024 * 1024,
+                   entre_processos=True)
 def carregar_dados_iniciativa(id_iniciativa: int) -> dict | None:
     """
     Carrega a última linha de tf_cadastro_regras_negocio para a iniciativa dada.
     Retorna um dicionário com as colunas esperadas ou None se não existir.
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_connection()
     query = """
-        SELECT *
-        FROM tf_cadastro_regras_negocio
-        WHERE id_iniciativa = ?
-        ORDER BY data_hora DESC
-        LIMIT 1
+        SELECT r.*
+        FROM tf_regra_atual a
+        JOIN tf_cadastro_regras_negocio r ON r.id = a.id_regra
+        WHERE a.id_iniciativa = ?
     """
     df = pd.read_sql_query(query, conn, params=[id_iniciativa])
-    conn.close()
 
     if df.empty:
         return None
@@ -117,16 +96,15 @@ def carregar_dados_iniciativa(id_iniciativa: int) -> dict | None:
     }
 
 
-@st.cache_data
+@cache_por_tabelas("td_dados_resumos_sei", max_entradas=32)
 def carregar_resumo_iniciativa(setor: str) -> pd.DataFrame | None:
     """
     Carrega o resumo a partir de td_dados_resumos_sei, filtrando por 'demandante' = setor.
     Retorna um DataFrame ou None se vazio.
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_connection()
     query = "SELECT * FROM td_dados_resumos_sei WHERE demandante = ?"
     df = pd.read_sql_query(query, conn, params=[setor])
-    conn.close()
     if df.empty:
         return None
     return df
@@ -150,29 +128,8 @@ def salvar_dados_iniciativa(
     - demais_informacoes: dict de informações complementares
 
     Também atualiza as colunas "acoes_manejo" e "insumos" com base nos eixos.
+    A gravação é feita pelo escritor único do banco (hooks/escrita.py).
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # Limite de 3 históricos por iniciativa
-    cursor.execute("""
-        SELECT COUNT(*)
-        FROM tf_cadastro_regras_negocio
-        WHERE id_iniciativa = ?
-    """, (id_iniciativa,))
-    total_reg = cursor.fetchone()[0]
-    if total_reg >= 3:
-        cursor.execute("""
-            DELETE FROM tf_cadastro_regras_negocio
-            WHERE id IN (
-                SELECT id
-                FROM tf_cadastro_regras_negocio
-                WHERE id_iniciativa = ?
-                ORDER BY data_hora ASC
-                LIMIT 1
-            )
-        """, (id_iniciativa,))
-
     # Converte listas/dicts para JSON
     objetivos_json = json.dumps(objetivos_especificos or [])
     eixos_json     = json.dumps(eixos_tematicos or [])
@@ -214,7 +171,53 @@ def salvar_dados_iniciativa(
     else:
         formas_contratacao_json = "{}"
 
-    # Insere no banco
+    # Insere no banco (aguarda a confirmação do escritor)
+    registro = (
+        id_iniciativa,
+        usuario,
+        objetivo_geral,
+        objetivos_json,
+        eixos_json,
+        acoes_json,
+        insumos_json,
+        regra_json,
+        introducao,
+        justificativa,
+        metodologia,
+        demais_info_json,
+        distribuicao_ucs_json,
+        formas_contratacao_json
+    )
+    executar_escrita(_gravar_regra_negocio, registro, eixos_tematicos or []).result()
+
+
+def _gravar_regra_negocio(conn, registro: tuple, eixos_tematicos: list[dict]):
+    """
+    Comando do escritor: insere a nova versão da regra e os seus itens
+    (tf_regra_eixo/acao/insumo), mantendo histórico máximo de 3 registros por iniciativa.
+    """
+    id_iniciativa = registro[0]
+    cursor = conn.cursor()
+
+    # Limite de 3 históricos por iniciativa
+    cursor.execute("""
+        SELECT COUNT(*)
+        FROM tf_cadastro_regras_negocio
+        WHERE id_iniciativa = ?
+    """, (id_iniciativa,))
+    total_reg = cursor.fetchone()[0]
+    if total_reg >= 3:
+        cursor.execute("""
+            SELECT id
+            FROM tf_cadastro_regras_negocio
+            WHERE id_iniciativa = ?
+            ORDER BY data_hora ASC
+            LIMIT 1
+        """, (id_iniciativa,))
+        id_mais_antigo = cursor.fetchone()[0]
+        remover_itens_regra(conn, id_mais_antigo)
+        cursor.execute("DELETE FROM tf_cadastro_regras_negocio WHERE id = ?", (id_mais_antigo,))
+
     cursor.execute("""
         INSERT INTO tf_cadastro_regras_negocio (
             id_iniciativa,
@@ -233,50 +236,11 @@ def salvar_dados_iniciativa(
             formas_contratacao
         )
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        id_iniciativa,
-        usuario,
-        objetivo_geral,
-        objetivos_json,
-        eixos_json,
-        acoes_json,
-        insumos_json,
-        regra_json,
-        introducao,
-        justificativa,
-        metodologia,
-        demais_info_json,
-        distribuicao_ucs_json,
-        formas_contratacao_json   # Alterado aqui
-    ))
-
-    conn.commit()
-    conn.close()
-
-@st.cache_data
-def get_options_from_table(
-    table_name: str,
-    id_col: str,
-    name_col: str,
-    filter_col: str | None = None,
-    filter_val: str | None = None
-) -> dict[str, str]:
-    """
-    Lê da tabela `table_name` as colunas `id_col` e `name_col`.
-    Opcionalmente filtra por `filter_col = filter_val`.
-    Retorna um dict { id_val: name_val }.
-    """
-    conn = sqlite3.connect(DB_PATH)
-    query = f"SELECT {id_col}, {name_col} FROM {table_name}"
-    params = ()
-    if filter_col and filter_val is not None:
-        query += f" WHERE {filter_col} = ?"
-        params = (str(filter_val),)
-
-    df = pd.read_sql_query(query, conn, params=params)
-    conn.close()
+    """, registro)
+    id_regra = cursor.lastrowid
+    gravar_itens_regra(conn, id_regra, id_iniciativa, eixos_tematicos)
+    marcar_regra_atual(conn, id_iniciativa, id_regra)
 
-    return {str(row[id_col]): row[name_col] for _, row in df.iterrows()}
 
 
 # -----------------------------------------------------------------------------
@@ -360,17 +324,15 @@ if "carregou_iniciativa" not in st.session_state or st.session_state["carregou_i
     # >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
     # 1️⃣ BUSCA DADOS NA TABELA PRINCIPAL PRIMEIRO (tf_cadastro_regras_negocio)
     # >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_connection()
     query = """
-        SELECT objetivo_geral, objetivos_especificos, eixos_tematicos,
-               introducao, justificativa, metodologia, demais_informacoes
-        FROM tf_cadastro_regras_negocio
-        WHERE id_iniciativa = ?
-        ORDER BY data_hora DESC
-        LIMIT 1
+        SELECT r.objetivo_geral, r.objetivos_especificos, r.eixos_tematicos,
+               r.introducao, r.justificativa, r.metodologia, r.demais_informacoes
+        FROM tf_regra_atual a
+        JOIN tf_cadastro_regras_negocio r ON r.id = a.id_regra
+        WHERE a.id_iniciativa = ?
     """
     dados_iniciativa = pd.read_sql_query(query, conn, params=[nova_iniciativa])
-    conn.close()
 
     if not dados_iniciativa.empty:
         row = dados_iniciativa.iloc[0]
@@ -415,12 +377,11 @@ if "carregou_iniciativa" not in st.session_state or st.session_state["carregou_i
         # 2️⃣ FALLBACK: BUSCA DADOS NO RESUMO (td_dados_resumos_sei) APENAS SE O PRINCIPAL ESTIVER VAZIO
         # >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
         if not st.session_state["objetivo_geral"]:
-            conn = sqlite3.connect(DB_PATH)
+            conn = get_connection()
             row_fallback = conn.execute("""
                 SELECT objetivo_geral FROM td_dados_resumos_sei
                 WHERE id_resumo = ? LIMIT 1
             """, (nova_iniciativa,)).fetchone()
-            conn.close()
 
             if row_fallback:
                 obj_geral_sei = row_fallback[0] or ""
@@ -428,14 +389,13 @@ if "carregou_iniciativa" not in st.session_state or st.session_state["carregou_i
                     st.session_state["objetivo_geral"] = obj_geral_sei
 
         if not st.session_state["introducao"] or not st.session_state["justificativa"] or not st.session_state["metodologia"]:
-            conn = sqlite3.connect(DB_PATH)
+            conn = get_connection()
             row_resumo_2 = conn.execute("""
                 SELECT introdução, justificativa, metodologia
                 FROM td_dados_resumos_sei
                 WHERE id_resumo = ?
                 LIMIT 1
             """, (nova_iniciativa,)).fetchone()
-            conn.close()
 
             if row_resumo_2:
                 intro_sei, justif_sei, metod_sei = row_resumo_2
@@ -710,13 +670,8 @@ with st.form("form_textos_resumo"):
     with tab_insumos:
         st.subheader("Insumos por Ação")
 
-        # Conectar ao banco para carregar a tabela de insumos
-        conn = sqlite3.connect(DB_PATH)
-        df_insumos_all = pd.read_sql_query(
-            "SELECT id, elemento_despesa, especificacao_padrao, descricao_insumo FROM td_insumos",
-            conn
-        )
-        conn.close()
+        # Catálogo de insumos (compartilhado pelo processo, ver hooks/insumos_crud.py)
+        df_insumos_all = catalogo_insumos()
 
         # Inicializar estado para armazenar insumos selecionados, se ainda não existir
         if "insumos_selecionados" not in st.session_state:
@@ -1064,15 +1019,35 @@ with st.form("form_textos_resumo"):
         # -------------------------------------------------------------------------
         # 1) Carrega do banco e filtra pela iniciativa
         # -------------------------------------------------------------------------
-        conn = sqlite3.connect(DB_PATH)
-        df_uc = pd.read_sql_query("SELECT * FROM tf_distribuicao_elegiveis", conn)
-        conn.close()
-
-        df_uc = df_uc[df_uc["id_iniciativa"] == nova_iniciativa]
+        conn = get_connection()
+        df_uc = pd.read_sql_query(
+            "SELECT * FROM tf_distribuicao_elegiveis WHERE id_iniciativa = ? AND ativo = 1 ORDER BY id",
+            conn,
+            params=[int(nova_iniciativa)],
+        )
         if df_uc.empty:
             st.warning("Nenhuma Unidade de Conservação disponível para distribuição de recursos.")
             st.stop()
 
+        # Valores alocados por eixo (hooks/alocacoes.py): uma coluna para cada eixo
+        # da regra e para os eixos que já têm valor alocado nesta iniciativa.
+        # As colunas são identificadas pelo id do eixo ("eixo_<id_p>"); o nome
+        # do processo, que pode se repetir, é só o rótulo exibido
+        df_alocacoes = alocacoes_por_eixo(int(nova_iniciativa))
+        nomes_processos = get_options_from_table("td_samge_processos", "id_p", "nome")
+        ids_regra = list(dict.fromkeys(int(e["id_eixo"]) for e in st.session_state.get("eixos_tematicos", [])))
+        ids_eixos = ids_regra + [id_p for id_p in df_alocacoes.columns if id_p not in ids_regra]
+        colunas_eixos = [f"eixo_{id_p}" for id_p in ids_eixos]
+        rotulos_eixos = {f"eixo_{id_p}": nomes_processos.get(str(id_p), str(id_p)) for id_p in ids_eixos}
+        eixos_regra = {f"eixo_{id_p}": id_p for id_p in ids_regra}
+        df_uc = df_uc.join(
+            df_alocacoes.reindex(columns=ids_eixos, fill_value=0.0).set_axis(colunas_eixos, axis=1), on="id"
+        )
+        df_uc[colunas_eixos] = df_uc[colunas_eixos].fillna(0.0)
+
+        # Valores numéricos, antes da formatação em HTML (totais e edição)
+        df_raw = df_uc.copy()
+
         # -------------------------------------------------------------------------
         # 2) Colunas extras p/ tooltip (opcional)
         # -------------------------------------------------------------------------
@@ -1096,7 +1071,7 @@ with st.form("form_textos_resumo"):
 
         # Podemos exibir também "Unidade de Conservação"
         # Lembre de *não* sobrepor a col. "id" se quiser usá-la
-        df_uc = df_uc[["Unidade de Conservação"] + colunas_principais + col_tooltip]
+        df_uc = df_uc[["Unidade de Conservação"] + colunas_principais + colunas_eixos + col_tooltip]
 
         # -------------------------------------------------------------------------
         # 4) Inserir ÍNDICE numérico à esquerda
@@ -1123,6 +1098,8 @@ with st.form("form_textos_resumo"):
             df_uc["TetoTotalDisponivel"] = df_uc["TetoTotalDisponivel"].apply(fmt_real)
         if "A Distribuir" in df_uc.columns:
             df_uc["A Distribuir"] = df_uc["A Distribuir"].apply(fmt_real)
+        for c in colunas_eixos:
+            df_uc[c] = df_uc[c].apply(fmt_real)
 
         # -------------------------------------------------------------------------
         # 6) Criar nova coluna “Detalhes” com ícone e tooltip (opcional)
@@ -1154,7 +1131,7 @@ with st.form("form_textos_resumo"):
         #    - Somar as colunas monetárias (TetoTotalDisponivel, A Distribuir, etc.)
         # -------------------------------------------------------------------------
         # Precisamos identificar quais colunas monetárias. Exemplo:
-        colunas_monetarias = ["TetoTotalDisponivel", "A Distribuir"] + col_tooltip
+        colunas_monetarias = ["TetoTotalDisponivel", "A Distribuir"] + colunas_eixos + col_tooltip
         colunas_monetarias = [c for c in colunas_monetarias if c in df_uc.columns]
 
         # Remover colunas que já foram transformadas em HTML (ficou <div>...).
@@ -1167,8 +1144,6 @@ with st.form("form_textos_resumo"):
 
         # Fazemos uma cópia do df *antes* de formatar o Teto e Saldo, somente para somar
         # (abaixo, assumimos esse "df_raw" era antes da .apply(fmt_real)).
-        df_raw = pd.read_sql_query("SELECT * FROM tf_distribuicao_elegiveis", sqlite3.connect(DB_PATH))
-        df_raw = df_raw[df_raw["id_iniciativa"] == nova_iniciativa].reset_index(drop=True)
         # Precisamos do "TetoTotalDisponivel" e "A Distribuir" e col_tooltip
         # e também inserir o "No" para alinhar
         df_raw.insert(0, "No", range(1, len(df_raw)+1))
@@ -1177,7 +1152,7 @@ with st.form("form_textos_resumo"):
         # Ajustamos nomes e merges se for preciso. Exemplo rápido:
         # Mapeamos as colunas cruas para as do df_uc se quiser (ex.: "TetoTotalDisponivel" => "TetoTotalDisponivel")
         # Vamos supor que os nomes batem. Precisamos filtrar colunas
-        df_somas = df_raw[["No", "TetoTotalDisponivel", "A Distribuir"] + col_tooltip]
+        df_somas = df_raw[["No", "TetoTotalDisponivel", "A Distribuir"] + colunas_eixos + col_tooltip]
 
         # convertemos para float
         for c in [cc for cc in df_somas.columns if cc != "No"]:
@@ -1228,9 +1203,9 @@ with st.form("form_textos_resumo"):
 
         # Reordena se quiser
         # Exemplo: ["No", "Unidade de Conservação", "+", "Teto Total", "Saldo a Distribuir"]
-        final_cols = ["No", "Unidade de Conservação", "+", "Teto Total", "Saldo a Distribuir"]
+        final_cols = ["No", "Unidade de Conservação", "+", "Teto Total"] + colunas_eixos + ["Saldo a Distribuir"]
         final_cols = [c for c in final_cols if c in df_final.columns]
-        df_final = df_final[final_cols]
+        df_final = df_final[final_cols].rename(columns=rotulos_eixos)
 
         # -------------------------------------------------------------------------
         # 9) Converte p/ HTML
@@ -1308,20 +1283,52 @@ with st.form("form_textos_resumo"):
         st.markdown(f"<div class='table-container'>{html_table}</div>", unsafe_allow_html=True)
 
         # -------------------------------------------------------------------------
-        # 11) Botão para "Distribuir" (consumindo eixos temáticos)
+        # 11) Distribuição dos valores por eixo temático (tf_alocacao_uc_eixo)
         # -------------------------------------------------------------------------
         st.write("### Distribuir valores por Eixos Temáticos")
-        if st.button("Distribuir"):
-            eixos = st.session_state.get("eixos_tematicos", [])
-            if not eixos:
-                st.warning("Não há eixos temáticos selecionados na outra aba!")
-            else:
-                # Exemplo: faz alguma lógica fictícia de distribuição
-                # Aqui, só exibimos. Ajuste conforme sua regra real.
-                st.success(f"Distribuindo recursos para {len(eixos)} eixos temáticos: "
-                        + ", ".join([e['nome_eixo'] for e in eixos]))
-                # ... Lógica real de distribuição ...
-                # ex: recalcular saldos, atualizar o df_final, etc.
+        if not eixos_regra:
+            st.warning("Não há eixos temáticos selecionados na outra aba!")
+        else:
+            colunas_fixas = ["id", "Unidade de Conservação", "TetoTotalDisponivel"]
+            df_edicao = df_raw[colunas_fixas + list(eixos_regra)]
+            editado = st.data_editor(
+                df_edicao,
+                hide_index=True,
+                disabled=colunas_fixas,
+                column_config={
+                    "id": None,
+                    "TetoTotalDisponivel": st.column_config.NumberColumn("Teto Total", format="R$ %.2f"),
+                    **{
+                        coluna: st.column_config.NumberColumn(
+                            rotulos_eixos[coluna], min_value=0.0, step=0.01, format="R$ %.2f"
+                        )
+                        for coluna in eixos_regra
+                    },
+                },
+                key=f"alocacoes_{nova_iniciativa}",
+            )
+            editado[list(eixos_regra)] = editado[list(eixos_regra)].fillna(0.0)
+
+            if st.button("Distribuir"):
+                # O total alocado (inclusive a eixos fora da regra) não pode passar do teto
+                outros_eixos = [c for c in colunas_eixos if c not in eixos_regra]
+                alocado = editado[list(eixos_regra)].sum(axis=1) + df_raw[outros_eixos].sum(axis=1)
+                excedidas = editado.loc[alocado.round(2) > editado["TetoTotalDisponivel"].round(2), "Unidade de Conservação"]
+                if not excedidas.empty:
+                    st.error("O valor distribuído passa do teto total em: " + ", ".join(excedidas))
+                else:
+                    alteracoes = [
+                        (id_distribuicao, id_p, novo)
+                        for coluna, id_p in eixos_regra.items()
+                        for id_distribuicao, antigo, novo in zip(editado["id"], df_edicao[coluna], editado[coluna])
+                        if round(float(antigo), 2) != round(float(novo), 2)
+                    ]
+                    try:
+                        gravadas = gravar_alocacoes(alteracoes)
+                        st.success(f"Distribuição gravada ({gravadas} valor(es) alterado(s)).")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"Erro ao gravar a distribuição: {e}")
 
 
 
@@ -1451,15 +1458,13 @@ with st.form("form_textos_resumo"):
             st.session_state["formas_carregou_iniciativa"] = nova_iniciativa
 
             # 1.1) Consulta a coluna 'formas_contratacao' no banco
-            conn = sqlite3.connect(DB_PATH)
+            conn = get_connection()
             row_formas = conn.execute("""
-                SELECT formas_contratacao
-                FROM tf_cadastro_regras_negocio
-                WHERE id_iniciativa = ?
-                ORDER BY data_hora DESC
-                LIMIT 1
+                SELECT r.formas_contratacao
+                FROM tf_regra_atual a
+                JOIN tf_cadastro_regras_negocio r ON r.id = a.id_regra
+                WHERE a.id_iniciativa = ?
             """, (nova_iniciativa,)).fetchone()
-            conn.close()
 
             # 1.2) Se existir JSON no banco, parseamos
             if row_formas and row_formas[0]:
@@ -2,7 +2,6 @@
 #                       1. IMPORTAÇÕES E CONFIGURAÇÕES                        #
 ###############################################################################
 import streamlit as st
-import sqlite3
 import pandas as pd
 import json
 from datetime import datetime
@@ -17,6 +16,10 @@ from xhtml2pdf import pisa
 # Visualização de PDF
 from streamlit_pdf_viewer import pdf_viewer
 
+from hooks.cache import cache_por_tabelas
+from hooks.conexao import get_connection
+from hooks.migracoes import preparar_banco
+
 # Verificação de login no Streamlit
 if "usuario_logado" not in st.session_state or not st.session_state["usuario_logado"]:
     st.warning("🔒 Acesso negado! Faça login na página principal para acessar esta seção.")
@@ -34,18 +37,13 @@ st.subheader("📊 Visualização de Cadastros Realizados")
 ###############################################################################
 def load_iniciativas(setor: str, perfil: str) -> pd.DataFrame:
     """Carrega iniciativas do banco SQLite conforme setor e perfil."""
-    conn = sqlite3.connect("database/app_data.db")
+    conn = get_connection()
     if perfil in ("admin", "cocam"):
         query = """
         SELECT r.*, i.nome_iniciativa
         FROM tf_cadastro_regras_negocio r
+        JOIN tf_regra_atual a ON a.id_regra = r.id
         JOIN td_iniciativas i ON r.id_iniciativa = i.id_iniciativa
-        JOIN (
-            SELECT id_iniciativa, MAX(data_hora) AS max_data
-            FROM tf_cadastro_regras_negocio
-            GROUP BY id_iniciativa
-        ) sub ON sub.id_iniciativa = r.id_iniciativa
-             AND sub.max_data = r.data_hora
         ORDER BY r.data_hora DESC
         """
         df = pd.read_sql_query(query, conn)
@@ -55,33 +53,30 @@ def load_iniciativas(setor: str, perfil: str) -> pd.DataFrame:
         FROM tf_cadastro_regras_negocio r
         JOIN td_iniciativas i ON r.id_iniciativa = i.id_iniciativa
         JOIN tf_usuarios u ON r.usuario = u.cpf
-        JOIN (
-            SELECT id_iniciativa, MAX(data_hora) AS max_data
-            FROM tf_cadastro_regras_negocio
-            GROUP BY id_iniciativa
-        ) sub ON sub.id_iniciativa = r.id_iniciativa
-             AND sub.max_data = r.data_hora
+        JOIN tf_regra_atual a ON a.id_regra = r.id
         WHERE u.setor_demandante = ?
         ORDER BY r.data_hora DESC
         """
         df = pd.read_sql_query(query, conn, params=[setor])
-    conn.close()
     return df
 
+@cache_por_tabelas("td_samge_acoes_manejo", max_entradas=1, compartilhado=True)
 def load_acoes_map():
-    """Retorna dict id_acao -> nome_acao."""
-    conn = sqlite3.connect("database/app_data.db")
+    """Retorna dict id_acao -> nome_acao (somente-leitura, compartilhado entre as sessões)."""
+    conn = get_connection()
     df = pd.read_sql_query("SELECT id_ac, nome FROM td_samge_acoes_manejo", conn)
-    conn.close()
     return {str(row['id_ac']): row['nome'] for _, row in df.iterrows()}
 
+@cache_por_tabelas("td_insumos", max_entradas=1, compartilhado=True)
 def load_insumos_map():
-    """Retorna dict id_insumo -> descricao_insumo."""
-    conn = sqlite3.connect("database/app_data.db")
+    """Retorna dict id_insumo -> descricao_insumo (somente-leitura, compartilhado entre as sessões)."""
+    conn = get_connection()
     df = pd.read_sql_query("SELECT id, descricao_insumo FROM td_insumos", conn)
-    conn.close()
     return {str(row['id']): row['descricao_insumo'] for _, row in df.iterrows()}
 
+# Migrações pendentes do esquema (tabelas filhas das regras, índices), uma vez por processo
+preparar_banco()
+
 acoes_map = load_acoes_map()
 insumos_map = load_insumos_map()
 
@@ -121,11 +116,51 @@ def format_objetivos_especificos(json_str):
     except Exception:
         return html.escape(json_str)
 
-def format_eixos_tematicos_table(json_str):
-    """Tabela de Eixos Temáticos (Eixo, Ação de Manejo, Insumos) em HTML."""
+def carregar_itens_eixos(ids_regra: list[int]) -> pd.DataFrame:
+    """
+    Itens da árvore eixos -> ações -> insumos das versões `ids_regra`, lidos de
+    tf_regra_eixo / tf_regra_acao / tf_regra_insumo, na ordem gravada: uma
+    linha por insumo (ação sem insumo e eixo sem ação vêm com NULL).
+    """
+    colunas = ["id_regra", "id_iniciativa", "id_eixo", "nome_eixo", "acao_id", "acao_nome", "insumo_id", "insumo_nome"]
+    if not ids_regra:
+        return pd.DataFrame(columns=colunas)
+    marcadores = ", ".join("?" * len(ids_regra))
+    conn = get_connection()
+    return pd.read_sql_query(f"""
+        SELECT
+            e.id_regra,
+            e.id_iniciativa,
+            e.id_eixo,
+            e.nome_eixo,
+            CAST(a.id_ac AS TEXT) AS acao_id,
+            CASE WHEN a.id_ac IS NULL THEN NULL
+                 ELSE COALESCE(am.nome, 'Ação ' || a.id_ac) END AS acao_nome,
+            ri.id_insumo AS insumo_id,
+            CASE WHEN ri.id_insumo IS NULL THEN NULL
+                 ELSE COALESCE(ti.descricao_insumo, CAST(ri.id_insumo AS TEXT)) END AS insumo_nome
+        FROM tf_regra_eixo e
+        LEFT JOIN tf_regra_acao a
+               ON a.id_regra = e.id_regra AND a.id_eixo = e.id_eixo
+        LEFT JOIN tf_regra_insumo ri
+               ON ri.id_regra = a.id_regra AND ri.id_eixo = a.id_eixo AND ri.id_ac = a.id_ac
+        LEFT JOIN td_samge_acoes_manejo am ON am.id_ac = a.id_ac
+        LEFT JOIN td_insumos ti ON ti.id = ri.id_insumo
+        WHERE e.id_regra IN ({marcadores})
+        ORDER BY e.id_regra, e.ordem, a.ordem, ri.ordem
+    """, conn, params=[int(i) for i in ids_regra])
+
+def itens_eixos_por_regra(df: pd.DataFrame) -> dict:
+    """{id_regra: itens da versão} das regras de `df`, numa única consulta."""
+    if df.empty:
+        return {}
+    itens = carregar_itens_eixos(df["id"].tolist())
+    return {int(id_regra): grupo for id_regra, grupo in itens.groupby("id_regra", sort=False)}
+
+def format_eixos_tematicos_table(itens: pd.DataFrame | None):
+    """Tabela de Eixos Temáticos (Eixo, Ação de Manejo, Insumos) em HTML, a partir dos itens da regra."""
     try:
-        data = json.loads(json_str)
-        if not data:
+        if itens is None or itens.empty:
             return "Nenhum eixo temático cadastrado."
 
         table_html = """<table>
@@ -138,10 +173,9 @@ def format_eixos_tematicos_table(json_str):
 </thead>
 <tbody>
 """
-        for eixo in data:
-            nome_eixo = eixo.get("nome_eixo", "Sem nome")
-            acoes = eixo.get("acoes_manejo", {})
-            if not acoes:
+        for _, eixo in itens.groupby("id_eixo", sort=False):
+            nome_eixo = html.escape(str(eixo["nome_eixo"].iloc[0] or "Sem nome"))
+            if eixo["acao_id"].isna().all():
                 table_html += f"""
 <tr>
 <td>{nome_eixo}</td>
@@ -150,11 +184,11 @@ def format_eixos_tematicos_table(json_str):
 </tr>
 """
             else:
-                for acao_id, detalhes in acoes.items():
-                    nome_acao = acoes_map.get(str(acao_id), f"Ação {acao_id}")
-                    insumos_list = detalhes.get("insumos", [])
-                    if insumos_list:
-                        insumos_html = ", ".join(insumos_map.get(str(i), str(i)) for i in insumos_list)
+                for _, acao in eixo.groupby("acao_id", sort=False):
+                    nome_acao = html.escape(str(acao["acao_nome"].iloc[0]))
+                    insumos_list = acao["insumo_nome"].dropna()
+                    if not insumos_list.empty:
+                        insumos_html = ", ".join(html.escape(str(i)) for i in insumos_list)
                     else:
                         insumos_html = "-"
                     table_html += f"""
@@ -484,6 +518,7 @@ st.markdown(card_css, unsafe_allow_html=True)
 
 # Exibe os cards HTML na interface
 st.markdown("<div class='card-container'>", unsafe_allow_html=True)
+itens_eixos = itens_eixos_por_regra(df_filtrado)
 for _, row in df_filtrado.iterrows():
     nome_iniciativa  = safe_html(row.get('nome_iniciativa', ''))
     objetivo_geral   = safe_html(row.get('objetivo_geral', ''))
@@ -493,7 +528,7 @@ for _, row in df_filtrado.iterrows():
     responsavel      = safe_html(row.get('usuario', ''))
 
     objetivos_especificos = format_objetivos_especificos(row.get('objetivos_especificos', '') or '')
-    eixos_tematicos       = format_eixos_tematicos_table(row.get('eixos_tematicos', '') or '')
+    eixos_tematicos       = format_eixos_tematicos_table(itens_eixos.get(int(row['id'])))
     insumos               = format_insumos(row.get('insumos', '') or '')
     distribuicao_ucs      = format_distribuicao_ucs(row.get('distribuicao_ucs', '') or '')
     distribuicao_ucs_eixo = format_distribuicao_por_eixo(row.get('distribuicao_ucs', '') or '')
@@ -622,6 +657,7 @@ def generate_html_for_iniciativas(df: pd.DataFrame) -> str:
     <h2>Relatório de Iniciativas e Regras de Negócio</h2>
     """
 
+    itens_eixos = itens_eixos_por_regra(df)
     for _, row in df.iterrows():
         nome_iniciativa  = safe_html(row.get('nome_iniciativa', ''))
         objetivo_geral   = safe_html(row.get('objetivo_geral', ''))
@@ -631,7 +667,7 @@ def generate_html_for_iniciativas(df: pd.DataFrame) -> str:
         responsavel      = safe_html(row.get('usuario', ''))
 
         objetivos_especificos = format_objetivos_especificos(row.get('objetivos_especificos', '') or '')
-        eixos_tematicos       = format_eixos_tematicos_table(row.get('eixos_tematicos', '') or '')
+        eixos_tematicos       = format_eixos_tematicos_table(itens_eixos.get(int(row['id'])))
         insumos               = format_insumos(row.get('insumos', '') or '')
         distrib_ucs           = format_distribuicao_ucs(row.get('distribuicao_ucs', '') or '')
         distrib_ucs_eixo      = format_distribuicao_por_eixo(row.get('distribuicao_ucs', '') or '')
@@ -706,6 +742,8 @@ def create_pdf_from_html(html_string: str) -> str:
 
     return pdf_path
 
+# O HTML do extrato já traz tudo o que entra no PDF: basta ele como chave
+@cache_por_tabelas(max_entradas=16, max_bytes=64 * 1024 * 1024, entre_processos=True)
 def create_pdf_bytes(html_string: str) -> bytes:
     pdf_buffer = BytesIO()
     pisa_status = pisa.CreatePDF(
@@ -727,63 +765,25 @@ def create_pdf_bytes(html_string: str) -> bytes:
 ###############################################################################
 def parse_eixos_tematicos(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Converte a coluna 'eixos_tematicos' (JSON) em um DataFrame tabular:
+    Monta o DataFrame tabular dos eixos temáticos a partir das tabelas
+    tf_regra_eixo / tf_regra_acao / tf_regra_insumo:
     id_iniciativa, nome_iniciativa, nome_eixo, acao_id, acao_nome, insumo_id, insumo_nome
     """
-    rows = []
-    for _, row in df.iterrows():
-        eixos_json = row.get('eixos_tematicos', '')
-        nome_ini = row.get('nome_iniciativa', '')
-        id_ini   = row.get('id_iniciativa', '')
-        try:
-            data = json.loads(eixos_json)
-            for eixo in data:
-                nome_eixo = eixo.get("nome_eixo", "")
-                acoes = eixo.get("acoes_manejo", {})
-                if not acoes:
-                    rows.append({
-                        "id_iniciativa": id_ini,
-                        "nome_iniciativa": nome_ini,
-                        "nome_eixo": nome_eixo,
-                        "acao_id": None,
-                        "acao_nome": None,
-                        "insumo_id": None,
-                        "insumo_nome": None
-                    })
-                else:
-                    for acao_id, detalhes in acoes.items():
-                        nome_acao = acoes_map.get(str(acao_id), f"Ação {acao_id}")
-                        insumos_list = detalhes.get("insumos", [])
-                        if insumos_list:
-                            for ins_id in insumos_list:
-                                rows.append({
-                                    "id_iniciativa": id_ini,
-                                    "nome_iniciativa": nome_ini,
-                                    "nome_eixo": nome_eixo,
-                                    "acao_id": acao_id,
-                                    "acao_nome": nome_acao,
-                                    "insumo_id": ins_id,
-                                    "insumo_nome": insumos_map.get(str(ins_id), str(ins_id))
-                                })
-                        else:
-                            rows.append({
-                                "id_iniciativa": id_ini,
-                                "nome_iniciativa": nome_ini,
-                                "nome_eixo": nome_eixo,
-                                "acao_id": acao_id,
-                                "acao_nome": nome_acao,
-                                "insumo_id": None,
-                                "insumo_nome": None
-                            })
-        except:
-            pass
-
-    if rows:
-        return pd.DataFrame(rows)
-    else:
-        return pd.DataFrame(columns=[
-            "id_iniciativa","nome_iniciativa","nome_eixo","acao_id","acao_nome","insumo_id","insumo_nome"
-        ])
+    colunas = ["id_iniciativa","nome_iniciativa","nome_eixo","acao_id","acao_nome","insumo_id","insumo_nome"]
+    if df.empty:
+        return pd.DataFrame(columns=colunas)
+
+    ids_regra = [int(i) for i in df["id"]]
+    df_itens = carregar_itens_eixos(ids_regra)
+
+    # Mantém a ordem das iniciativas recebidas em `df`
+    ordem = pd.DataFrame({
+        "id_regra": ids_regra,
+        "nome_iniciativa": df["nome_iniciativa"].values,
+        "posicao": range(len(ids_regra))
+    })
+    df_itens = df_itens.merge(ordem, on="id_regra").sort_values("posicao", kind="stable")
+    return df_itens[colunas].reset_index(drop=True)
 
 def parse_distribuicao_ucs(df: pd.DataFrame) -> pd.DataFrame:
     """
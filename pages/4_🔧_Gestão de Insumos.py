@@ -1,7 +1,8 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
-import os
+
+from hooks.conexao import get_connection
+from hooks.escrita import executar_escrita, escrever
 
 # ------------------------------------------------------------------------
 #           Configurações de Página e Verificação de Login
@@ -20,19 +21,19 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-os.makedirs("database", exist_ok=True)
-conn = sqlite3.connect("database/app_data.db", check_same_thread=False)
-cursor = conn.cursor()
-
 # ------------------------------------------------------------------------
 #              Funções Auxiliares
 # ------------------------------------------------------------------------
 def get_distinct_elementos():
+    conn = get_connection()
+    cursor = conn.cursor()
     cursor.execute("SELECT DISTINCT elemento_despesa FROM td_insumos ORDER BY elemento_despesa")
     rows = cursor.fetchall()
     return [row[0] for row in rows if row[0]]
 
 def get_distinct_espec_padrao(elemento=None):
+    conn = get_connection()
+    cursor = conn.cursor()
     if elemento:
         cursor.execute("""
             SELECT DISTINCT especificacao_padrao 
@@ -56,11 +57,14 @@ def get_distinct_insumos(elemento=None, espec=None):
         params.append(espec)
     query += " ORDER BY descricao_insumo"
     
+    cursor = get_connection().cursor()
     cursor.execute(query, params)
     rows = cursor.fetchall()
     return [row[0] for row in rows if row[0]]
 
 def check_existing_insumo(elemento, espec, insumo):
+    conn = get_connection()
+    cursor = conn.cursor()
     query = """
         SELECT COUNT(*) 
           FROM td_insumos
@@ -76,7 +80,7 @@ def check_existing_insumo(elemento, espec, insumo):
     return count > 0
 
 def insert_insumo(elemento, espec_padrao, nome_insumo, preco, origem, situacao, registrado_por):
-    cursor.execute("""
+    escrever("""
         INSERT INTO td_insumos (
             elemento_despesa,
             especificacao_padrao,
@@ -97,30 +101,49 @@ def insert_insumo(elemento, espec_padrao, nome_insumo, preco, origem, situacao,
         situacao,
         registrado_por
     ))
-    conn.commit()
-
-def update_insumo(insumo_id, elemento, espec_padrao, nome_insumo, espec_tecnica, preco, situacao):
-    cursor.execute("""
-        UPDATE td_insumos
-           SET elemento_despesa = ?,
-               especificacao_padrao = ?,
-               descricao_insumo = ?,
-               especificacao_tecnica = ?,
-               preco_referencia = ?,
-               situacao = ?
-         WHERE id = ?
-    """, (
-        elemento,
-        espec_padrao,
-        nome_insumo,
-        espec_tecnica,
-        preco,
-        situacao,
-        insumo_id
-    ))
-    conn.commit()
+
+SQL_UPDATE_INSUMO = """
+    UPDATE td_insumos
+       SET elemento_despesa = ?,
+           especificacao_padrao = ?,
+           descricao_insumo = ?,
+           especificacao_tecnica = ?,
+           preco_referencia = ?,
+           situacao = ?
+     WHERE id = ?
+"""
+
+def _gravar_insumos_editados(conn, atualizacoes, exclusoes):
+    """Comando do escritor: aplica todas as edições de uma tabela em uma única transação."""
+    if exclusoes:
+        conn.executemany("DELETE FROM td_insumos WHERE id = ?", exclusoes)
+    if atualizacoes:
+        conn.executemany(SQL_UPDATE_INSUMO, atualizacoes)
+
+def salvar_insumos_editados(df_editado):
+    """
+    Grava as linhas editadas em um data_editor de uma só vez.
+    Linhas com a coluna "excluir" marcada são removidas.
+    """
+    atualizacoes = []
+    exclusoes = []
+    for _, row in df_editado.iterrows():
+        if "excluir" in row and row["excluir"]:
+            exclusoes.append((int(row["id"]),))
+        else:
+            atualizacoes.append((
+                row["elemento_despesa"],
+                row["especificacao_padrao"],
+                row["descricao_insumo"],
+                "",  # especificacao_tecnica
+                row["preco_referencia"],
+                row["situacao"],
+                int(row["id"])
+            ))
+    executar_escrita(_gravar_insumos_editados, atualizacoes, exclusoes).result()
 
 def get_sugestoes_insumos(perfil):
+    conn = get_connection()
     if perfil == "cocam":
         query = "SELECT * FROM td_insumos WHERE situacao = 'em análise' ORDER BY id DESC"
         df = pd.read_sql_query(query, conn)
@@ -130,10 +153,12 @@ def get_sugestoes_insumos(perfil):
     return df
 
 def get_insumos_ativos():
+    conn = get_connection()
     query = "SELECT * FROM td_insumos WHERE situacao = 'ativo' ORDER BY id DESC"
     return pd.read_sql_query(query, conn)
 
 def get_insumos_desativados():
+    conn = get_connection()
     query = "SELECT * FROM td_insumos WHERE situacao = 'desativado' ORDER BY id DESC"
     return pd.read_sql_query(query, conn)
 
@@ -297,16 +322,7 @@ else:
     )
 
     if st.button("Salvar Alterações em Itens Sugeridos"):
-        for index, row in edited_df_sug.iterrows():
-            update_insumo(
-                insumo_id=row["id"],
-                elemento=row["elemento_despesa"],
-                espec_padrao=row["especificacao_padrao"],
-                nome_insumo=row["descricao_insumo"],
-                espec_tecnica="",
-                preco=row["preco_referencia"],
-                situacao=row["situacao"]
-            )
+        salvar_insumos_editados(edited_df_sug)
         st.success("Sugestões atualizadas com sucesso!")
         st.rerun()
 
@@ -387,16 +403,7 @@ else:
     # só cocam ou admin podem alterar
     if usuario_perfil in ["cocam", "admin"]:
         if st.button("Salvar Alterações em Itens Ativos"):
-            for index, row in edited_df_ativos.iterrows():
-                update_insumo(
-                    insumo_id=row["id"],
-                    elemento=row["elemento_despesa"],
-                    espec_padrao=row["especificacao_padrao"],
-                    nome_insumo=row["descricao_insumo"],
-                    espec_tecnica="",
-                    preco=row["preco_referencia"],
-                    situacao=row["situacao"]
-                )
+            salvar_insumos_editados(edited_df_ativos)
             st.success("Itens ativos atualizados com sucesso!")
             st.rerun()
 
@@ -491,20 +498,7 @@ with st.expander("Itens Desativados"):
         # Apenas cocam ou admin podem salvar (e excluir)
         if usuario_perfil in ["cocam", "admin"]:
             if st.button("Salvar Alterações nos Itens Desativados"):
-                for index, row in edited_df_des.iterrows():
-                    # Se "excluir" estiver marcado, removemos do banco
-                    if "excluir" in row and row["excluir"]:
-                        cursor.execute("DELETE FROM td_insumos WHERE id = ?", (row["id"],))
-                        conn.commit()
-                    else:
-                        update_insumo(
-                            insumo_id=row["id"],
-                            elemento=row["elemento_despesa"],
-                            espec_padrao=row["especificacao_padrao"],
-                            nome_insumo=row["descricao_insumo"],
-                            espec_tecnica="",
-                            preco=row["preco_referencia"],
-                            situacao=row["situacao"]
-                        )
+                # Linhas com "excluir" marcado são removidas do banco
+                salvar_insumos_editados(edited_df_des)
                 st.success("Itens desativados atualizados com sucesso!")
                 st.rerun()
@@ -1,32 +1,8 @@
 import streamlit as st
-import os
-import sqlite3
 import math
 
-# -------------------------------------------------------------------
-# Configurações e inicialização do banco de dados
-# -------------------------------------------------------------------
-db_path = "database/app_data.db"
-
-def init_db():
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("DROP TABLE IF EXISTS tf_usuarios")
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS tf_usuarios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            cpf TEXT UNIQUE NOT NULL,
-            nome_completo TEXT NOT NULL,
-            email TEXT NOT NULL,
-            setor_demandante TEXT NOT NULL,
-            perfil TEXT NOT NULL DEFAULT 'comum'
-        )
-    """)
-    conn.commit()
-    conn.close()
-
-if not os.path.exists(db_path):
-    init_db()
+from hooks.conexao import get_connection
+from hooks.escrita import escrever
 
 # -------------------------------------------------------------------
 # Autenticação (verifica se está logado e se é admin)
@@ -50,40 +26,27 @@ st.title("Gestão de Usuários - Administração")
 # Funções de banco de dados
 # -------------------------------------------------------------------
 def get_all_users():
-    conn = sqlite3.connect(db_path)
+    conn = get_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM tf_usuarios")
     users = cursor.fetchall()
-    conn.close()
     return users
 
 def update_user(user_id, cpf, nome_completo, email, setor_demandante, perfil_user):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("""
+    escrever("""
         UPDATE tf_usuarios 
         SET cpf = ?, nome_completo = ?, email = ?, setor_demandante = ?, perfil = ?
         WHERE id = ?
     """, (cpf, nome_completo, email, setor_demandante, perfil_user, user_id))
-    conn.commit()
-    conn.close()
 
 def create_user(cpf, nome_completo, email, setor_demandante, perfil_user):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("""
+    escrever("""
         INSERT INTO tf_usuarios (cpf, nome_completo, email, setor_demandante, perfil)
         VALUES (?, ?, ?, ?, ?)
     """, (cpf, nome_completo, email, setor_demandante, perfil_user))
-    conn.commit()
-    conn.close()
 
 def delete_user(user_id):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM tf_usuarios WHERE id = ?", (user_id,))
-    conn.commit()
-    conn.close()
+    escrever("DELETE FROM tf_usuarios WHERE id = ?", (user_id,))
 
 # -------------------------------------------------------------------
 # Auxiliar para recarregar a página
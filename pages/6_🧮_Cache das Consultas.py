@@ -0,0 +1,89 @@
+import streamlit as st
+
+from hooks.aquecimento import progresso_aquecimento
+from hooks.cache import entradas_cache, estatisticas_caches, limpar_caches, registro_caches
+
+# -------------------------------------------------------------------
+# Autenticação (verifica se está logado e se é admin)
+# -------------------------------------------------------------------
+if "usuario_logado" not in st.session_state or not st.session_state["usuario_logado"]:
+    st.warning("🔒 Acesso negado! Faça login na página principal para acessar esta seção.")
+    st.stop()
+
+perfil = st.session_state.get("perfil", "comum")
+if perfil != "admin":
+    st.error("🚫 Acesso restrito: somente administradores podem acessar esta página.")
+    st.stop()
+
+# -------------------------------------------------------------------
+# Configuração da página
+# -------------------------------------------------------------------
+st.set_page_config(page_title="Cache das Consultas", page_icon="🧮", layout="wide")
+st.title("Cache das Consultas - Administração")
+st.caption(
+    "Consultas em cache neste processo (ver hooks/cache.py). Cada consulta tem a sua política: "
+    "máximo de entradas, orçamento em MB e validade (TTL); a entrada menos usada é descartada primeiro. "
+    "Uma gravação invalida só as entradas das consultas que leem a tabela gravada. "
+    "As consultas marcadas como entre processos também ficam no armazém compartilhado pelas réplicas "
+    "do servidor; esvaziar uma consulta aqui esvazia também o armazém."
+)
+
+# -------------------------------------------------------------------
+# Aquecimento na subida do servidor (hooks/aquecimento.py)
+# -------------------------------------------------------------------
+aquecimento = progresso_aquecimento()
+st.subheader("Aquecimento")
+if aquecimento["situacao"] in ("iniciando", "aquecendo"):
+    total = aquecimento["total"] or 1
+    st.progress(
+        aquecimento["concluidas"] / total,
+        text=f"{aquecimento['concluidas']}/{aquecimento['total']} consultas - {aquecimento['atual'] or '...'}",
+    )
+    if st.button("🔁 Atualizar situação"):
+        st.rerun()
+else:
+    st.write(
+        f"Aquecimento {aquecimento['situacao']}: {aquecimento['concluidas']}/{aquecimento['total']} consultas "
+        f"em {aquecimento['segundos'] or 0:.1f}s (iniciado em {aquecimento['iniciado_em']:%d/%m/%Y %H:%M:%S})."
+    )
+for erro in aquecimento["erros"]:
+    st.write(f"❌ {erro}")
+
+# -------------------------------------------------------------------
+# Resumo por consulta
+# -------------------------------------------------------------------
+estatisticas = estatisticas_caches()
+if estatisticas.empty:
+    st.info("Nenhuma consulta em cache ainda. Elas são registradas quando as páginas são abertas.")
+    st.stop()
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Entradas", int(estatisticas["Entradas"].sum()))
+col2.metric("Memória (MB)", f"{estatisticas['MB'].sum():.2f}")
+col3.metric("Armazém (MB)", f"{estatisticas['MB no armazém'].sum():.2f}")
+acertos = int(estatisticas["Acertos"].sum() + estatisticas["Acertos do armazém"].sum())
+chamadas = acertos + int(estatisticas["Falhas"].sum())
+col4.metric("% acerto", f"{100 * acertos / chamadas:.1f}" if chamadas else "-")
+
+st.dataframe(estatisticas, hide_index=True)
+
+if st.button("🗑 Esvaziar todas as consultas"):
+    limpar_caches()
+    st.success("Cache limpo com sucesso!")
+    st.rerun()
+
+# -------------------------------------------------------------------
+# Entradas de uma consulta
+# -------------------------------------------------------------------
+st.subheader("Entradas por consulta")
+nome = st.selectbox("Consulta", estatisticas["Consulta"].tolist())
+entradas = entradas_cache(nome)
+if entradas.empty:
+    st.info("Consulta sem entradas.")
+else:
+    st.dataframe(entradas, hide_index=True)
+
+if st.button(f"🗑 Esvaziar {nome}"):
+    registro_caches()[nome].esvaziar(armazem=True)
+    st.success(f"Cache de {nome} esvaziado.")
+    st.rerun()
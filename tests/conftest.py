@@ -0,0 +1,39 @@
+# ---------------------------------------------------------
+# arquivo: tests/conftest.py
+# ---------------------------------------------------------
+# Fixtures dos testes: cada teste recebe um banco vazio, migrado, em
+# database/app_data.db dentro de um diretório temporário (o caminho padrão
+# da aplicação, relativo ao diretório atual), com o pool de conexões
+# renovado e sem o armazém de cache entre processos.
+#
+#   python -m pytest
+# ---------------------------------------------------------
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hooks.cache import armazem_cache, definir_armazem  # noqa: E402
+from hooks.conexao import DB_PATH, abrir_conexao, get_pool  # noqa: E402
+from hooks.migracoes import aplicar_migracoes  # noqa: E402
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    """Conexão avulsa (como a do ETL) com um banco novo, com todas as migrações."""
+    monkeypatch.chdir(tmp_path)
+    armazem = armazem_cache()
+    definir_armazem(None)
+    get_pool.clear()
+
+    conn = abrir_conexao(DB_PATH)
+    aplicar_migracoes(conn)
+    conn.commit()
+    yield conn
+
+    conn.close()
+    get_pool.clear()
+    definir_armazem(armazem)
+
@@ -0,0 +1,89 @@
+import sqlite3
+
+import pandas as pd
+
+from hooks.cache import cache_por_tabelas
+from hooks.conexao import DB_PATH, get_connection
+
+
+def _gravar(sql: str, params=()):
+    """Gravação por outra conexão, como a do ETL ou da linha de comando."""
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute(sql, params)
+    conn.commit()
+    conn.close()
+
+
+def test_gravacao_invalida_so_as_consultas_da_tabela(banco):
+    calculos = {"unidades": 0, "demandantes": 0}
+
+    @cache_por_tabelas("td_unidades")
+    def unidades(uf: str) -> pd.DataFrame:
+        calculos["unidades"] += 1
+        return pd.read_sql_query("SELECT cnuc FROM td_unidades WHERE uf = ?", get_connection(), params=[uf])
+
+    @cache_por_tabelas("td_demandantes")
+    def demandantes() -> pd.DataFrame:
+        calculos["demandantes"] += 1
+        return pd.read_sql_query("SELECT nome_demandante FROM td_demandantes", get_connection())
+
+    assert unidades("GO").empty
+    demandantes()
+    unidades("GO")
+    demandantes()
+    assert calculos == {"unidades": 1, "demandantes": 1}
+
+    _gravar("INSERT INTO td_unidades (cnuc, nome_unidade, uf) VALUES ('1', 'PARNA A', 'GO')")
+    assert unidades("GO")["cnuc"].tolist() == ["1"]
+    demandantes()
+    assert calculos == {"unidades": 2, "demandantes": 1}
+
+
+def test_argumentos_diferentes_tem_entradas_diferentes(banco):
+    calculos = []
+
+    @cache_por_tabelas("td_unidades")
+    def unidades(uf: str) -> int:
+        calculos.append(uf)
+        return get_connection().execute("SELECT COUNT(*) FROM td_unidades WHERE uf = ?", (uf,)).fetchone()[0]
+
+    for uf in ["GO", "PB", "GO", "PB"]:
+        unidades(uf)
+    assert calculos == ["GO", "PB"]
+
+    unidades.clear()
+    unidades("GO")
+    assert calculos == ["GO", "PB", "GO"]
+
+
+def test_resultado_none_fica_em_cache(banco):
+    calculos = []
+
+    @cache_por_tabelas("td_unidades")
+    def nome(cnuc: str):
+        calculos.append(cnuc)
+        linha = get_connection().execute("SELECT nome_unidade FROM td_unidades WHERE cnuc = ?", (cnuc,)).fetchone()
+        return linha[0] if linha else None
+
+    assert nome("1") is None
+    assert nome("1") is None
+    assert calculos == ["1"]
+
+
+def test_alteracao_do_chamador_nao_chega_ao_cache(banco):
+    _gravar("INSERT INTO td_unidades (cnuc, nome_unidade, uf) VALUES ('1', 'PARNA A', 'GO')")
+
+    @cache_por_tabelas("td_unidades")
+    def copiada() -> pd.DataFrame:
+        return pd.read_sql_query("SELECT cnuc, nome_unidade FROM td_unidades", get_connection())
+
+    @cache_por_tabelas("td_unidades", compartilhado=True)
+    def compartilhada() -> pd.DataFrame:
+        return pd.read_sql_query("SELECT cnuc, nome_unidade FROM td_unidades", get_connection())
+
+    for consulta in (copiada, compartilhada):
+        df = consulta()
+        df.loc[0, "nome_unidade"] = "alterado pelo chamador"
+        df["nova"] = 1
+        assert consulta()["nome_unidade"].tolist() == ["PARNA A"]
+        assert "nova" not in consulta().columns
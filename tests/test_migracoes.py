@@ -0,0 +1,110 @@
+import sqlite3
+
+import pandas as pd
+
+from hooks import migracoes
+from hooks.migracoes import MIGRACOES, TABELAS_VERSIONADAS, VERSAO_ESQUEMA, aplicar_migracoes, versao_esquema
+
+
+def test_passos_numerados_em_sequencia():
+    assert [versao for versao, _, _ in MIGRACOES] == list(range(1, len(MIGRACOES) + 1))
+    assert VERSAO_ESQUEMA == len(MIGRACOES)
+
+
+def test_banco_novo_recebe_todos_os_passos(banco):
+    assert versao_esquema(banco) == VERSAO_ESQUEMA
+    registradas = [row[0] for row in banco.execute("SELECT versao FROM schema_version ORDER BY versao")]
+    assert registradas == list(range(1, VERSAO_ESQUEMA + 1))
+
+
+def test_migracoes_sao_idempotentes(banco):
+    assert aplicar_migracoes(banco) == []
+    assert banco.execute("SELECT COUNT(*) FROM schema_version").fetchone()[0] == VERSAO_ESQUEMA
+
+
+def test_banco_anterior_recebe_so_os_passos_pendentes(tmp_path, monkeypatch):
+    conn = sqlite3.connect(tmp_path / "anterior.db")
+    monkeypatch.setattr(migracoes, "MIGRACOES", MIGRACOES[:10])
+    monkeypatch.setattr(migracoes, "VERSAO_ESQUEMA", 10)
+    assert aplicar_migracoes(conn) == list(range(1, 11))
+    conn.commit()
+
+    monkeypatch.undo()
+    assert aplicar_migracoes(conn) == list(range(11, VERSAO_ESQUEMA + 1))
+    assert versao_esquema(conn) == VERSAO_ESQUEMA
+    conn.close()
+
+
+def test_passo_com_erro_nao_deixa_alteracoes(tmp_path, monkeypatch):
+    conn = sqlite3.connect(tmp_path / "erro.db")
+
+    def passo_com_erro(conn):
+        conn.execute("CREATE TABLE parcial (id INTEGER)")
+        raise RuntimeError("falhou no meio")
+
+    monkeypatch.setattr(migracoes, "MIGRACOES", [(1, "Passo com erro", passo_com_erro)])
+    monkeypatch.setattr(migracoes, "VERSAO_ESQUEMA", 1)
+    try:
+        aplicar_migracoes(conn)
+    except RuntimeError:
+        pass
+    conn.commit()
+
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'parcial'").fetchone() is None
+    assert versao_esquema(conn) == 0
+    conn.close()
+
+
+def test_tabelas_versionadas_tem_contador_e_gatilhos(banco):
+    contadores = {row[0] for row in banco.execute("SELECT tabela FROM versao_tabelas")}
+    assert contadores == set(TABELAS_VERSIONADAS)
+
+    gatilhos = {row[0] for row in banco.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    for tabela in TABELAS_VERSIONADAS:
+        for evento in ("insert", "update", "delete"):
+            assert f"trg_versao_{tabela}_{evento}" in gatilhos
+
+
+def test_elegiveis_anteriores_mantem_ids_na_primeira_carga(tmp_path, monkeypatch, capsys):
+    from init_db import carregar_elegiveis
+
+    # Banco no passo 12, com as elegíveis como a carga anterior as gravava
+    # (demandante, iniciativa e ação em minúsculas)
+    conn = sqlite3.connect(tmp_path / "anterior.db")
+    monkeypatch.setattr(migracoes, "MIGRACOES", MIGRACOES[:12])
+    monkeypatch.setattr(migracoes, "VERSAO_ESQUEMA", 12)
+    aplicar_migracoes(conn)
+    colunas = '"DEMANDANTE (diretoria)", "Nome da Proposta/Iniciativa Estruturante", "AÇÃO DE APLICAÇÃO", "CNUC"'
+    conn.executemany(f"INSERT INTO tf_distribuicao_elegiveis ({colunas}) VALUES (?, ?, ?, ?)", [
+        ("dibio", "manejo de espécies exóticas", "implementação da uc", "0000.00.0041"),
+        ("dibio", "manejo de espécies exóticas", "implementação da uc", "0000.00.0041"),
+        ("disat", "participação social", "implementação da uc", "0000.00.0014"),
+    ])
+    conn.commit()
+    ids = [row[0] for row in conn.execute("SELECT id FROM tf_distribuicao_elegiveis ORDER BY id")]
+    versao = conn.execute(
+        "SELECT versao FROM versao_tabelas WHERE tabela = 'tf_distribuicao_elegiveis'"
+    ).fetchone()[0]
+
+    monkeypatch.undo()
+    assert aplicar_migracoes(conn) == [13, 14]
+    conn.commit()
+    # O preenchimento das chaves avança a versão uma única vez
+    assert conn.execute(
+        "SELECT versao FROM versao_tabelas WHERE tabela = 'tf_distribuicao_elegiveis'"
+    ).fetchone()[0] == versao + 1
+
+    # A planilha traz os nomes com maiúsculas
+    planilha = pd.DataFrame({
+        "DEMANDANTE (diretoria)": ["DIBIO", "DIBIO", "DISAT"],
+        "Nome da Proposta/Iniciativa Estruturante": [
+            "Manejo de Espécies Exóticas", "Manejo de Espécies Exóticas", "Participação Social",
+        ],
+        "AÇÃO DE APLICAÇÃO": ["Implementação da UC"] * 3,
+        "CNUC": ["0000.00.0041", "0000.00.0041", "0000.00.0014"],
+    })
+    carregar_elegiveis(conn, planilha)
+    assert "0 inseridas, 3 atualizadas, 0 inativadas" in capsys.readouterr().out
+    linhas = conn.execute("SELECT id, ativo FROM tf_distribuicao_elegiveis ORDER BY id").fetchall()
+    assert linhas == [(id_, 1) for id_ in ids]
+    conn.close()
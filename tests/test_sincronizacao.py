@@ -0,0 +1,83 @@
+import pandas as pd
+
+from hooks.sincronizacao import calcular_chaves, recarregar_tabela, sincronizar_tabela
+
+
+def _versao(conn, tabela: str) -> int:
+    return conn.execute("SELECT versao FROM versao_tabelas WHERE tabela = ?", (tabela,)).fetchone()[0]
+
+
+def _unidades(*linhas) -> pd.DataFrame:
+    return pd.DataFrame(linhas, columns=["cnuc", "nome_unidade", "uf"])
+
+
+def _sincronizar(conn, df: pd.DataFrame) -> dict:
+    resultado = sincronizar_tabela(conn.cursor(), "td_unidades", "cnuc", df)
+    conn.commit()
+    return resultado
+
+
+def _situacao(conn) -> dict:
+    return {cnuc: (nome, ativo) for cnuc, nome, ativo in conn.execute(
+        "SELECT cnuc, nome_unidade, ativo FROM td_unidades"
+    )}
+
+
+def test_sincronizar_insere_atualiza_e_inativa(banco):
+    assert _sincronizar(banco, _unidades(("1", "PARNA A", "GO"), ("2", "FLONA B", "PB"))) == {
+        "inseridas": 2, "atualizadas": 0, "inativadas": 0,
+    }
+
+    resultado = _sincronizar(banco, _unidades(("1", "PARNA A", "GO"), ("2", "FLONA B2", "PB"), ("3", "REBIO C", "AM")))
+    assert resultado == {"inseridas": 1, "atualizadas": 1, "inativadas": 0}
+
+    resultado = _sincronizar(banco, _unidades(("2", "FLONA B2", "PB"), ("3", "REBIO C", "AM")))
+    assert resultado == {"inseridas": 0, "atualizadas": 0, "inativadas": 1}
+    assert _situacao(banco) == {"1": ("PARNA A", 0), "2": ("FLONA B2", 1), "3": ("REBIO C", 1)}
+
+
+def test_sincronizar_reativa_linha_que_voltou(banco):
+    _sincronizar(banco, _unidades(("1", "PARNA A", "GO"), ("2", "FLONA B", "PB")))
+    _sincronizar(banco, _unidades(("2", "FLONA B", "PB")))
+
+    resultado = _sincronizar(banco, _unidades(("1", "PARNA A", "GO"), ("2", "FLONA B", "PB")))
+    assert resultado == {"inseridas": 0, "atualizadas": 1, "inativadas": 0}
+    assert _situacao(banco)["1"] == ("PARNA A", 1)
+
+
+def test_sincronizar_avanca_a_versao_uma_vez_e_so_se_mudou(banco):
+    inicial = _versao(banco, "td_unidades")
+    _sincronizar(banco, _unidades(*[(str(n), f"UC {n}", "GO") for n in range(50)]))
+    assert _versao(banco, "td_unidades") == inicial + 1
+
+    _sincronizar(banco, _unidades(*[(str(n), f"UC {n}", "GO") for n in range(50)]))
+    assert _versao(banco, "td_unidades") == inicial + 1
+
+    # Fora de uma carga em lote, os gatilhos continuam avançando a versão
+    banco.execute("UPDATE td_unidades SET uf = 'DF' WHERE cnuc = '1'")
+    banco.commit()
+    assert _versao(banco, "td_unidades") == inicial + 2
+    assert banco.execute("SELECT SUM(em_lote) FROM versao_tabelas").fetchone()[0] == 0
+
+
+def test_recarregar_descarta_chaves_repetidas(banco):
+    macroprocessos = pd.DataFrame({
+        "id_m": [1, 2, 2, None],
+        "nome": ["Macroprocesso 1", "Macroprocesso 2", "Macroprocesso 2 repetido", "Sem chave"],
+    })
+    inicial = _versao(banco, "td_samge_macroprocessos")
+    assert recarregar_tabela(banco.cursor(), "td_samge_macroprocessos", macroprocessos, chave=["id_m"]) == 2
+    banco.commit()
+
+    linhas = banco.execute("SELECT id_m, nome FROM td_samge_macroprocessos ORDER BY id_m").fetchall()
+    assert linhas == [(1, "Macroprocesso 1"), (2, "Macroprocesso 2")]
+    assert _versao(banco, "td_samge_macroprocessos") == inicial + 1
+
+
+def test_chaves_estaveis_e_distintas_para_linhas_repetidas():
+    df = pd.DataFrame({"demandante": ["DIMAN", "DIMAN", "DIBIO"], "uc": ["A", "A", None]})
+    chaves = calcular_chaves(df, ["demandante", "uc"])
+    assert chaves.is_unique
+    assert chaves.tolist() == calcular_chaves(df.copy(), ["demandante", "uc"]).tolist()
+    # A chave da primeira ocorrência não depende das linhas seguintes
+    assert calcular_chaves(df.iloc[[0]], ["demandante", "uc"]).iloc[0] == chaves.iloc[0]